@@ -4,34 +4,41 @@ import asyncio
 import base64
 import logging
 import os
+from contextlib import nullcontext
 
 from bedrock_agentcore.runtime import BedrockAgentCoreApp
 
 from strands import AgentSkills
 
 from src.agent.sub_agents import (
+    SUB_AGENT_TOOLS_STATE_KEY,
     briefing_agent,
     calendar_agent,
     diary_agent,
     gmail_agent,
-    init_sub_agent_tools,
     intro_agent,
     notion_agent,
-    split_mcp_tools,
     task_agent,
     twitter_agent,
 )
 from strands_tools.tavily import tavily_search
 from src.agent.twitter_tools import TWITTER_TOOLS
+from src.agent.agent_pool import (
+    DEFAULT_MAX_SIZE,
+    DEFAULT_TTL_SECONDS,
+    AgentPool,
+    PooledAgent,
+)
 from src.agent.aws_cost import get_aws_cost
-from src.agent.code_interpreter import drain_pending_images, execute_python
+from src.agent.code_interpreter import ImageQueue, execute_python, image_queue_scope
+from src.agent import request_trace
+from src.agent.gateway_connection import get_gateway_connection
+from src.agent.tool_progress import progress_reporter
 from src.agent.tonari_agent import (
     MODEL_PROVIDER_BEDROCK,
     _get_default_model_provider,
-    create_mcp_client,
     create_tonari_agent,
     create_tonari_agent_pipeline,
-    create_tonari_agent_with_gateway,
 )
 
 logger = logging.getLogger(__name__)
@@ -42,7 +49,8 @@ def _init_tavily_api_key():
     if os.getenv("TAVILY_API_KEY"):
         return
     try:
-        from src.agent.notion_auth import _run_async, AWS_REGION
+        from src.agent.async_bridge import run_sync
+        from src.agent.notion_auth import AWS_REGION
         from bedrock_agentcore.runtime import BedrockAgentCoreContext
         from bedrock_agentcore.services.identity import IdentityClient
 
@@ -57,7 +65,7 @@ def _init_tavily_api_key():
                 agent_identity_token=workload_token,
             )
 
-        api_key = _run_async(_fetch())
+        api_key = run_sync(_fetch())
         os.environ["TAVILY_API_KEY"] = api_key
         logger.info("TAVILY_API_KEY set from AgentCore Identity")
     except Exception as e:
@@ -78,55 +86,28 @@ if os.path.isdir(SKILLS_DIR):
     except Exception as e:
         logger.warning("Failed to load AgentSkills: %s", e)
 
-# 保持中のAgentとそのセッション情報
-_current_agent = None
-_current_mcp_client = None
-_current_session_id = None
-_current_actor_id = None
-_current_model_provider = None
-_current_reasoning_enabled = None
+# セッション単位で構築済みAgentを保持するプール
+_agent_pool = AgentPool(
+    max_size=int(os.getenv("AGENT_POOL_MAX_SIZE", str(DEFAULT_MAX_SIZE))),
+    ttl_seconds=float(os.getenv("AGENT_POOL_TTL_SECONDS", str(DEFAULT_TTL_SECONDS))),
+)
 
 
-def _get_or_create_agent(
-    session_id: str, actor_id: str, model_provider: str = MODEL_PROVIDER_BEDROCK,
-    reasoning_enabled: bool = False,
-):
-    """同じセッション・同じモデルならAgentを使い回し、変わったら作り直す"""
-    global _current_agent, _current_mcp_client, _current_session_id, _current_actor_id, _current_model_provider, _current_reasoning_enabled
-
-    if (
-        _current_agent is not None
-        and _current_session_id == session_id
-        and _current_actor_id == actor_id
-        and _current_model_provider == model_provider
-        and _current_reasoning_enabled == reasoning_enabled
-    ):
-        return _current_agent
-
-    # 既存のMCPClient接続があれば閉じる
-    if _current_mcp_client is not None:
-        try:
-            _current_mcp_client.stop()
-        except Exception:
-            pass
-        _current_mcp_client = None
+# 香水系ツールはコスト削減のため除外
+EXCLUDED_TOOLS = {"perfume-search___search_perfumes"}
 
-    # フル装備のAgentを作成（LTM + Gateway + ツール）
-    try:
-        agent, mcp_client = create_tonari_agent_with_gateway(
-            session_id=session_id, actor_id=actor_id
-        )
-        mcp_client.start()
-        all_tools = mcp_client.list_tools_sync()
-        # 香水系ツールはコスト削減のため除外
-        EXCLUDED_TOOLS = {"perfume-search___search_perfumes"}
-        tools = [t for t in all_tools if t.tool_name not in EXCLUDED_TOOLS] if all_tools else []
-        tool_names = [t.tool_name for t in tools]
-        logger.info("Gateway tools discovered: %s (excluded: %s)", tool_names, EXCLUDED_TOOLS)
 
+def _build_agent(
+    session_id: str, actor_id: str, model_provider: str, reasoning_enabled: bool,
+) -> PooledAgent:
+    """フル装備のAgentを作成（LTM + Gateway + ツール）
+
+    Gatewayの接続とツールカタログはプロセス共有のGatewayConnectionから取得する。
+    """
+    try:
         # ツールをサブエージェント用とメイン用に分割
-        tool_map = split_mcp_tools(tools)
-        init_sub_agent_tools(tool_map, actor_id=actor_id)
+        with request_trace.span("gateway.tool_map"):
+            tool_map = get_gateway_connection().tool_map(excluded=EXCLUDED_TOOLS)
         main_tools = tool_map["main"] + [
             task_agent, calendar_agent, gmail_agent, notion_agent,
             briefing_agent, diary_agent, intro_agent, twitter_agent,
@@ -143,20 +124,35 @@ def _get_or_create_agent(
             reasoning_enabled=reasoning_enabled,
             plugins=plugins,
         )
-        _current_mcp_client = mcp_client
+        return PooledAgent(agent=agent, tool_map=tool_map)
     except Exception as e:
         logger.warning("Gateway connection failed, running without tools: %s", e, exc_info=True)
         agent = create_tonari_agent(
             session_id=session_id, actor_id=actor_id, model_provider=model_provider,
             reasoning_enabled=reasoning_enabled,
         )
+        # ツールなしのAgentはプールせず、次のリクエストでGateway接続をやり直す
+        return PooledAgent(agent=agent, poolable=False)
+
+
+def _get_or_create_agent(
+    session_id: str, actor_id: str, model_provider: str = MODEL_PROVIDER_BEDROCK,
+    reasoning_enabled: bool = False,
+) -> PooledAgent:
+    """同じセッション・同じモデルのAgentはプールから使い回し、無ければ作成する"""
+    key = (session_id, actor_id, model_provider, reasoning_enabled)
+    built = False
+
+    def _build() -> PooledAgent:
+        nonlocal built
+        built = True
+        with request_trace.span("agent.build"):
+            return _build_agent(session_id, actor_id, model_provider, reasoning_enabled)
 
-    _current_agent = agent
-    _current_session_id = session_id
-    _current_actor_id = actor_id
-    _current_model_provider = model_provider
-    _current_reasoning_enabled = reasoning_enabled
-    return agent
+    with request_trace.span("agent.get_or_create") as span:
+        entry = _agent_pool.get_or_create(key, _build)
+        span.set_attribute("pool_hit", not built)
+    return entry
 
 
 # パイプラインモード別のGateway MCPツールフィルタ
@@ -172,45 +168,27 @@ PIPELINE_DIRECT_TOOLS = {
 
 
 def _create_pipeline_agent(session_id: str, actor_id: str, mode: str):
-    """パイプライン用軽量エージェントを作成（毎回新規、キャッシュしない）"""
-    import os
-    gateway_url = os.getenv(
-        "AGENTCORE_GATEWAY_URL",
-        "https://tonari-gateway-umzqvn6zkm.gateway.bedrock-agentcore.ap-northeast-1.amazonaws.com/mcp",
-    )
-    region = os.getenv("AWS_REGION", "ap-northeast-1")
-
+    """パイプライン用軽量エージェントを作成（Agentは毎回新規、Gateway接続は共有）"""
     allowed_prefixes = PIPELINE_TOOL_FILTERS.get(mode, set())
     direct_tools = PIPELINE_DIRECT_TOOLS.get(mode, [])
-    mcp_client = None
     gateway_tools = []
 
     # Gateway MCP ツールの取得（MCPフィルタがある場合のみ）
     if allowed_prefixes:
-        mcp_client = create_mcp_client(gateway_url, region)
         try:
-            mcp_client.start()
-            all_tools = mcp_client.list_tools_sync()
-            gateway_tools = [
-                t for t in (all_tools or [])
-                if t.tool_name.split("___")[0] in allowed_prefixes
-            ]
+            with request_trace.span("gateway.tools_with_prefixes"):
+                gateway_tools = get_gateway_connection().tools_with_prefixes(allowed_prefixes)
         except Exception as e:
             logger.warning("Pipeline gateway failed: %s", e)
-            try:
-                mcp_client.stop()
-            except Exception:
-                pass
-            mcp_client = None
 
     # MCPツールと@toolは混在不可のため、分けて渡す
-    agent = create_tonari_agent_pipeline(
-        session_id=session_id,
-        actor_id=actor_id,
-        mcp_tools=gateway_tools or None,
-        extra_tools=direct_tools or None,
-    )
-    return agent, mcp_client
+    with request_trace.span("agent.build", mode=mode):
+        return create_tonari_agent_pipeline(
+            session_id=session_id,
+            actor_id=actor_id,
+            mcp_tools=gateway_tools or None,
+            extra_tools=direct_tools or None,
+        )
 
 
 def build_content_blocks(
@@ -245,72 +223,110 @@ def build_content_blocks(
     return blocks
 
 
-async def _stream_response(agent, content):
+async def _stream_response(
+    agent,
+    content,
+    trace: request_trace.RequestTrace | None = None,
+    invocation_state: dict | None = None,
+):
     """エージェントのストリーミングレスポンスを生成
 
     エージェント実行をバックグラウンドタスクで走らせ、ストリームイベントを
-    キュー経由でyieldする。
+    キュー経由でyieldする。trace を渡すと、実行中はそのトレースを現在のリクエストとし、
+    最初のテキストまでの時間とエラーを記録する。invocation_state はツールに渡る
+    （execute_python はセッション単位のサンドボックスを選ぶのに使う）。
 
     Yields:
         str: テキストチャンク
         dict: ツールイベント ({"type": "tool_start", "tool": name} or {"type": "tool_end"})
-        dict: 画像イベント ({"type": "image", "base64": ..., "format": "png"})
+        dict: 画像イベント ({"type": "image", "url": 署名付きURL}、ツール実行中でもアップロード完了ごとに送出)
+        dict: サブエージェント内のツール進捗
+            ({"type": "sub_tool_start" | "sub_tool_end", "parent": 親ツール名, "tool": name,
+              "elapsed_ms": 親ツール開始からの経過ms, "usage": {"inputTokens", "outputTokens", "totalTokens"}}
+             sub_tool_end は内部ツールの所要時間 "duration_ms" も持つ)
+        dict: サブエージェント完了 ({"type": "sub_agent_end", "parent": 親ツール名, "elapsed_ms", "usage"})
     """
     event_queue = asyncio.Queue()
-
-    async def _emit_pending_images():
-        """保留画像URLをキューに送出"""
-        images = drain_pending_images()
-        for img in images:
-            url = img.get("url", "")
-            if url:
-                logger.info("Emitting image URL: %s...", url[:80])
-                await event_queue.put({
-                    "type": "image",
-                    "url": url,
-                })
+    # このストリーム専用の画像キュー（execute_python はContextVar経由でここに送る）
+    # 上限付きのキューから直接レスポンスに送るため、クライアントが読まない間はアップロード側が待つ
+    image_queue = ImageQueue(asyncio.get_running_loop())
 
     async def _run_agent():
         active_tool = None
         try:
-            async for event in agent.stream_async(content):
-                if isinstance(event, dict):
-                    if "data" in event:
-                        text = event["data"]
-                        if isinstance(text, str):
-                            if active_tool is not None:
-                                await event_queue.put({"type": "tool_end"})
-                                await _emit_pending_images()
-                                active_tool = None
-                            await event_queue.put(text)
-                    elif "current_tool_use" in event:
-                        tool_info = event["current_tool_use"]
-                        tool_name = tool_info.get("name", "unknown")
-                        if tool_name != active_tool:
-                            if active_tool is not None:
-                                await event_queue.put({"type": "tool_end"})
-                                await _emit_pending_images()
-                            active_tool = tool_name
-                            await event_queue.put({"type": "tool_start", "tool": tool_name})
+            # サブエージェントの進捗はツール実行タスクからこのキューに直接届く
+            with (
+                progress_reporter(event_queue.put_nowait),
+                image_queue_scope(image_queue),
+                trace.activate() if trace else nullcontext(),
+                request_trace.span("agent.stream"),
+            ):
+                async for event in agent.stream_async(content, invocation_state=invocation_state):
+                    if isinstance(event, dict):
+                        if "data" in event:
+                            text = event["data"]
+                            if isinstance(text, str):
+                                if trace:
+                                    trace.mark_first_token()
+                                if active_tool is not None:
+                                    await event_queue.put({"type": "tool_end"})
+                                    active_tool = None
+                                await event_queue.put(text)
+                        elif "current_tool_use" in event:
+                            tool_info = event["current_tool_use"]
+                            tool_name = tool_info.get("name", "unknown")
+                            if tool_name != active_tool:
+                                if active_tool is not None:
+                                    await event_queue.put({"type": "tool_end"})
+                                active_tool = tool_name
+                                await event_queue.put({"type": "tool_start", "tool": tool_name})
             if active_tool is not None:
                 await event_queue.put({"type": "tool_end"})
-                await _emit_pending_images()
         except Exception as e:
             logger.error("Agent stream error: %s", e, exc_info=True)
+            if trace:
+                trace.error = str(e)
             await event_queue.put({"type": "error", "message": str(e)})
         finally:
+            await image_queue.close()
             await event_queue.put(None)  # 終了シグナル
 
     task = asyncio.create_task(_run_agent())
+    # 両方のキューが終了シグナルを返すまで、届いた順に送出する
+    next_event = asyncio.ensure_future(event_queue.get())
+    next_image = asyncio.ensure_future(image_queue.get())
 
     try:
-        while True:
-            item = await event_queue.get()
-            if item is None:
-                break
-            yield item
+        while next_event is not None or next_image is not None:
+            waiting = {f for f in (next_event, next_image) if f is not None}
+            done, _ = await asyncio.wait(waiting, return_when=asyncio.FIRST_COMPLETED)
+            if next_image in done:
+                image = next_image.result()
+                next_image = None if image is None else asyncio.ensure_future(image_queue.get())
+                url = (image or {}).get("url", "")
+                if url:
+                    logger.info("Emitting image URL: %s...", url[:80])
+                    yield {"type": "image", "url": url}
+            if next_event in done:
+                item = next_event.result()
+                next_event = None if item is None else asyncio.ensure_future(event_queue.get())
+                if item is not None:
+                    yield item
     finally:
-        await task
+        for pending in (next_event, next_image):
+            if pending is not None:
+                pending.cancel()
+        if next_image is not None:
+            # 読み手が途中でいなくなった場合も、待っている put() と close() が詰まらないよう捨て続ける
+            async def _discard_images():
+                while await image_queue.get() is not None:
+                    pass
+
+            discard = asyncio.create_task(_discard_images())
+            await task
+            await discard
+        else:
+            await task
 
 
 @app.entrypoint
@@ -339,28 +355,37 @@ async def invoke(payload: dict):
 
     content = build_content_blocks(prompt, image_base64, image_format)
 
-    # パイプラインモード: 軽量エージェントを毎回作成
-    if mode in PIPELINE_TOOL_FILTERS or mode in PIPELINE_DIRECT_TOOLS:
-        pipeline_mcp_client = None
-        try:
-            agent, pipeline_mcp_client = _create_pipeline_agent(
-                session_id, actor_id, mode
-            )
-            async for chunk in _stream_response(agent, content):
-                yield chunk
-        finally:
-            if pipeline_mcp_client:
-                try:
-                    pipeline_mcp_client.stop()
-                except Exception:
-                    pass
-        return
-
-    # 通常モード: フルエージェント（キャッシュ付き）
-    agent = _get_or_create_agent(session_id, actor_id, model_provider, reasoning_enabled)
-
-    async for chunk in _stream_response(agent, content):
-        yield chunk
+    # リクエスト単位の計測（終了時にサマリーを1件出力）
+    trace = request_trace.RequestTrace(
+        session_id=session_id,
+        mode=mode or "chat",
+        model_provider=model_provider,
+        reasoning_enabled=reasoning_enabled,
+    )
+    try:
+        with trace.activate():
+            if mode in PIPELINE_TOOL_FILTERS or mode in PIPELINE_DIRECT_TOOLS:
+                # パイプラインモード: 軽量エージェントを毎回作成
+                agent = _create_pipeline_agent(session_id, actor_id, mode)
+                tool_map = {}
+            else:
+                # 通常モード: フルエージェント（キャッシュ付き）
+                entry = _get_or_create_agent(session_id, actor_id, model_provider, reasoning_enabled)
+                agent, tool_map = entry.agent, entry.tool_map
+
+        # サブエージェントツールは actor_id とツールをここから受け取る
+        invocation_state = {
+            "session_id": session_id,
+            "actor_id": actor_id,
+            SUB_AGENT_TOOLS_STATE_KEY: tool_map,
+        }
+        async for chunk in _stream_response(agent, content, trace, invocation_state):
+            yield chunk
+    except Exception as e:
+        trace.error = str(e)
+        raise
+    finally:
+        trace.finish()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,161 @@
+"""エージェントプールモジュール
+
+(session_id, actor_id, model_provider, reasoning_enabled) をキーに構築済みAgentを保持し、
+複数タブ・複数セッションが交互に呼び出しても毎回Agentを作り直さないようにする。
+件数上限（LRU）とアイドルTTLで古いエントリを破棄する。
+Gateway の接続は GatewayConnection がプロセス全体で持つため、破棄時に閉じるリソースはない。
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Hashable
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_SIZE = 8
+DEFAULT_TTL_SECONDS = 30 * 60
+
+
+@dataclass
+class PooledAgent:
+    """プールに格納する構築済みAgentと、サブエージェントに渡すツール構成"""
+
+    agent: Any
+    tool_map: dict[str, list] = field(default_factory=dict)
+    created_at: float = 0.0
+    last_used: float = 0.0
+    # False ならプールに入れない（Gateway接続に失敗したツールなしAgentなど）
+    poolable: bool = True
+
+
+@dataclass
+class _KeyLock:
+    """同一キーの同時構築をまとめるロック（待っているスレッドがいる間は残す）"""
+
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    waiters: int = 0
+
+
+class AgentPool:
+    """LRU + TTL で上限付きのAgentプール
+
+    キー単位のロックで同一キーの同時構築を1回にまとめ、
+    異なるキーの構築は互いにブロックしない。
+    """
+
+    def __init__(
+        self,
+        max_size: int = DEFAULT_MAX_SIZE,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_size = max(1, max_size)
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries: OrderedDict[Hashable, PooledAgent] = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks: dict[Hashable, _KeyLock] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_or_create(
+        self, key: Hashable, factory: Callable[[], PooledAgent]
+    ) -> PooledAgent:
+        """キーに対応するAgentを返す。無ければfactoryで構築してプールに追加する。"""
+        with self._lock:
+            entry = self._lookup(key)
+            if entry is not None:
+                return entry
+            key_lock = self._key_locks.setdefault(key, _KeyLock())
+            key_lock.waiters += 1
+
+        try:
+            with key_lock.lock:
+                # ロック待ちの間に他スレッドが構築済みなら再利用
+                with self._lock:
+                    entry = self._lookup(key)
+                    if entry is not None:
+                        return entry
+                    self.misses += 1
+
+                entry = factory()
+                now = self._clock()
+                entry.created_at = now
+                entry.last_used = now
+                with self._lock:
+                    if entry.poolable:
+                        self._entries[key] = entry
+                        self._entries.move_to_end(key)
+                        self._evict_overflow()
+                    stats = self._stats_locked()
+        finally:
+            with self._lock:
+                key_lock.waiters -= 1
+                # 最後の1人が抜けたらロックを消す（プールしないエントリのキーも残さない）
+                if key_lock.waiters == 0 and self._key_locks.get(key) is key_lock:
+                    del self._key_locks[key]
+
+        logger.info("AgentPool miss: key=%s poolable=%s stats=%s", key, entry.poolable, stats)
+        return entry
+
+    def invalidate(self, key: Hashable) -> None:
+        """指定キーのエントリを破棄する"""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """全エントリを破棄する"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict[str, int]:
+        """ヒット・ミス・破棄件数と現在のエントリ数を返す"""
+        with self._lock:
+            return self._stats_locked()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def _stats_locked(self) -> dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self._entries),
+        }
+
+    def _lookup(self, key: Hashable) -> PooledAgent | None:
+        """self._lock 保持中に呼ぶ。期限切れエントリは先に取り除く。"""
+        self._evict_expired()
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        entry.last_used = self._clock()
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def _evict_expired(self) -> None:
+        if self.ttl_seconds <= 0:
+            return
+        now = self._clock()
+        expired_keys = [
+            k for k, e in self._entries.items()
+            if now - e.last_used > self.ttl_seconds
+        ]
+        for k in expired_keys:
+            self._evict(k)
+
+    def _evict_overflow(self) -> None:
+        while len(self._entries) > self.max_size:
+            self._evict(next(iter(self._entries)))
+
+    def _evict(self, key: Hashable) -> None:
+        del self._entries[key]
+        self.evictions += 1
+        logger.info("AgentPool evict: key=%s", key)
@@ -0,0 +1,100 @@
+"""同期コードからコルーチンを実行するためのバックグラウンドイベントループ
+
+プロセス内に常駐するイベントループスレッドを1本だけ持ち、
+run_coroutine_threadsafe でコルーチンを投入する。呼び出しごとにスレッドや
+イベントループを作らないため、AgentCore Identity 呼び出しなどのホットパスが軽くなる。
+"""
+
+import asyncio
+import logging
+import os
+import threading
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Coroutine
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT_SECONDS = float(os.getenv("ASYNC_BRIDGE_TIMEOUT_SECONDS", "30"))
+
+
+class BackgroundLoop:
+    """デーモンスレッド上で動き続けるイベントループ
+
+    初回の run() でスレッドを起動し、以降は同じループを使い回す。
+    """
+
+    def __init__(self, name: str = "async-bridge"):
+        self.name = name
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """起動済みのループを返す（未起動なら起動する）"""
+        with self._lock:
+            if self._loop is None or not self._thread.is_alive():
+                self._start_locked()
+            return self._loop
+
+    def run(self, coro: Coroutine[Any, Any, Any], timeout: float | None = DEFAULT_TIMEOUT_SECONDS):
+        """コルーチンをバックグラウンドループで実行し、結果を待って返す
+
+        Raises:
+            TimeoutError: timeout 秒以内に完了しなかった（コルーチンはキャンセルされる）
+            RuntimeError: バックグラウンドループ自身のスレッドから呼ばれた（デッドロック防止）
+        """
+        loop = self.loop
+        if threading.current_thread() is self._thread:
+            coro.close()
+            raise RuntimeError("BackgroundLoop.run() cannot be called from its own loop thread")
+
+        future = asyncio.run_coroutine_threadsafe(coro, loop)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise TimeoutError(f"Coroutine did not finish within {timeout}s") from None
+        except BaseException:
+            # KeyboardInterrupt などで待機を中断した場合もコルーチンを残さない
+            future.cancel()
+            raise
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """ループを停止してスレッドの終了を待つ"""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = None
+            self._thread = None
+        if loop is None:
+            return
+        loop.call_soon_threadsafe(loop.stop)
+        if thread is not None:
+            thread.join(timeout=timeout)
+
+    def _start_locked(self) -> None:
+        loop = asyncio.new_event_loop()
+        ready = threading.Event()
+
+        def _run():
+            asyncio.set_event_loop(loop)
+            loop.call_soon(ready.set)
+            try:
+                loop.run_forever()
+            finally:
+                loop.close()
+
+        thread = threading.Thread(target=_run, name=self.name, daemon=True)
+        thread.start()
+        ready.wait()
+        self._loop = loop
+        self._thread = thread
+        logger.info("Background event loop started: %s", self.name)
+
+
+_background_loop = BackgroundLoop()
+
+
+def run_sync(coro: Coroutine[Any, Any, Any], timeout: float | None = DEFAULT_TIMEOUT_SECONDS):
+    """プロセス共有のバックグラウンドループでコルーチンを実行する"""
+    return _background_loop.run(coro, timeout=timeout)
@@ -1,16 +1,20 @@
 """AWS Cost Explorer tool for Strands Agent.
 
 Runtime 側で IAM 権限を使ってコストデータを取得する。
-取得したデータは execute_python (Code Interpreter) でグラフ化できる。
+取得したデータは CSV のデータセットとして保持し、参照ID（dataset_id）を返す。
+execute_python (Code Interpreter) に参照ID を渡すと DataFrame として読み込まれ、グラフ化できる。
 """
 
 import json
 import logging
 import os
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 
 import boto3
-from strands import tool
+from strands import ToolContext, tool
+
+from .cost_cache import CostCache, default_store
+from .datasets import dataset_owner, dataset_store
 
 logger = logging.getLogger(__name__)
 
@@ -20,17 +24,27 @@ _ce_client = boto3.client(
 )
 logger.info("Cost Explorer client initialized")
 
+# 同じ期間の問い合わせは期間単位のキャッシュから返し、新しい日の分だけを取得する
+_cost_cache = CostCache(_ce_client, store=default_store())
+
+# 期間数がこれ以下なら期間ごとの合計も結果に含める（グラフ化せずに答えられるように）
+MAX_INLINE_PERIODS = 31
+TOP_SERVICES = 5
 
-@tool
+
+@tool(context=True)
 def get_aws_cost(
     period: str = "monthly",
     months: int = 1,
     group_by_service: bool = True,
+    tool_context: ToolContext | None = None,
 ) -> str:
     """Retrieve AWS cost data from Cost Explorer.
 
-    Use this tool to fetch cost data. Then pass the result to execute_python
-    to create matplotlib charts for visualization.
+    Use this tool to fetch cost data. The full data is stored as a dataset and
+    only a short summary is returned. To analyze or chart it, call execute_python
+    with datasets=[dataset_id] and use `datasets["<dataset_id>"]` (a pandas
+    DataFrame with the listed columns) in the code.
 
     Args:
         period: Granularity - "monthly" or "daily".
@@ -38,11 +52,9 @@ def get_aws_cost(
         group_by_service: If True, break down costs by AWS service.
 
     Returns:
-        JSON string with cost data.
+        JSON string with dataset_id, columns and a cost summary.
     """
-    ce = _ce_client
-
-    now = datetime.utcnow()
+    now = datetime.now(timezone.utc)
     end = now.strftime("%Y-%m-%d")
     months = min(max(months, 1), 6)
     start = (now - timedelta(days=30 * months)).replace(day=1).strftime("%Y-%m-%d")
@@ -50,47 +62,52 @@ def get_aws_cost(
     granularity = "MONTHLY" if period == "monthly" else "DAILY"
 
     try:
-        kwargs = {
-            "TimePeriod": {"Start": start, "End": end},
-            "Granularity": granularity,
-            "Metrics": ["UnblendedCost"],
-        }
-        if group_by_service:
-            kwargs["GroupBy"] = [{"Type": "DIMENSION", "Key": "SERVICE"}]
-
-        response = ce.get_cost_and_usage(**kwargs)
-        results = response.get("ResultsByTime", [])
-
-        if group_by_service:
-            data = []
-            for r in results:
-                services = {}
+        results = _cost_cache.results_by_time(
+            granularity, start, end, group_by="SERVICE" if group_by_service else None
+        )
+
+        rows = []
+        totals = []
+        service_totals: dict[str, float] = {}
+        for r in results:
+            period_start = r["TimePeriod"]["Start"]
+            period_end = r["TimePeriod"]["End"]
+            if group_by_service:
+                period_total = 0.0
                 for group in r.get("Groups", []):
                     amount = float(group["Metrics"]["UnblendedCost"]["Amount"])
                     if amount > 0.01:
-                        services[group["Keys"][0]] = round(amount, 2)
-                data.append({
-                    "start": r["TimePeriod"]["Start"],
-                    "end": r["TimePeriod"]["End"],
-                    "total": round(sum(services.values()), 2),
-                    "services": services,
-                })
-        else:
-            data = [
-                {
-                    "start": r["TimePeriod"]["Start"],
-                    "end": r["TimePeriod"]["End"],
-                    "total": round(float(r["Total"]["UnblendedCost"]["Amount"]), 2),
-                }
-                for r in results
-            ]
-
-        return json.dumps({
+                        service = group["Keys"][0]
+                        rows.append((period_start, period_end, service, round(amount, 2)))
+                        service_totals[service] = service_totals.get(service, 0.0) + amount
+                        period_total += amount
+            else:
+                period_total = float(r["Total"]["UnblendedCost"]["Amount"])
+                rows.append((period_start, period_end, round(period_total, 2)))
+            totals.append({"start": period_start, "total": round(period_total, 2)})
+
+        columns = ["start", "end", "service", "cost"] if group_by_service else ["start", "end", "cost"]
+        dataset = dataset_store.put(
+            f"aws_cost_{granularity.lower()}",
+            columns,
+            rows,
+            parse_dates=["start", "end"],
+            owner=dataset_owner(tool_context),
+        )
+
+        result = {
             "granularity": granularity,
             "start": start,
             "end": end,
-            "data": data,
-        }, ensure_ascii=False)
+            **dataset.handle(),
+            "total": round(sum(t["total"] for t in totals), 2),
+        }
+        if len(totals) <= MAX_INLINE_PERIODS:
+            result["totals"] = totals
+        if service_totals:
+            top = sorted(service_totals.items(), key=lambda x: x[1], reverse=True)[:TOP_SERVICES]
+            result["top_services"] = {name: round(amount, 2) for name, amount in top}
+        return json.dumps(result, ensure_ascii=False)
 
     except Exception as e:
         logger.error("Cost Explorer error: %s", e, exc_info=True)
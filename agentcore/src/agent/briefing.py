@@ -0,0 +1,210 @@
+"""ブリーフィング用の並列データ収集
+
+予定・未読メール・期限間近のタスク・天気・今週の支出を並列に取得する。
+ソースごとにタイムアウトを持ち、失敗・タイムアウトしたソースがあっても
+取得できた分だけで結果を返す。要約はこの結果を受け取ったモデルが1回で行う。
+
+待つのをやめても実行中の取得は止まらないため、各ソースの呼び出し自体にもタイムアウトを付け、
+共有プールのスレッドが詰まったまま残らないようにする（MCPは read_timeout_seconds、
+Google API は google_auth の HTTP タイムアウト）。
+"""
+
+import json
+import logging
+import os
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable
+
+from .google_calendar_tools import calendar_list_events
+from .google_gmail_tools import gmail_search_emails
+
+logger = logging.getLogger(__name__)
+
+JST = timezone(timedelta(hours=9))
+
+DEFAULT_SOURCE_TIMEOUT_SECONDS = float(os.getenv("BRIEFING_SOURCE_TIMEOUT_SECONDS", "15"))
+WEATHER_LOCATION = os.getenv("BRIEFING_WEATHER_LOCATION", "東京")
+URGENT_TASK_DAYS = 3
+
+# ソース取得に使うスレッド数（同時に走るブリーフィングの分も含む）
+SOURCE_MAX_WORKERS = int(os.getenv("BRIEFING_SOURCE_MAX_WORKERS", "16"))
+
+STATUS_OK = "ok"
+STATUS_ERROR = "error"
+STATUS_TIMEOUT = "timeout"
+
+
+# Google API のサービスはスレッド単位でキャッシュされるため、
+# 呼び出しごとにスレッドを作り直さず、プロセス共有のプールを使い回す
+_executor = ThreadPoolExecutor(max_workers=SOURCE_MAX_WORKERS, thread_name_prefix="briefing")
+
+
+@dataclass(frozen=True)
+class BriefingSource:
+    """ブリーフィングの1データソース"""
+
+    name: str
+    fetch: Callable[[], Any]
+    timeout: float = DEFAULT_SOURCE_TIMEOUT_SECONDS
+
+
+def gather_sources(sources: list[BriefingSource]) -> dict[str, dict]:
+    """全ソースを並列に取得し、ソース名ごとの結果を返す
+
+    所要時間は最も遅いソース（またはそのタイムアウト）で頭打ちになる。
+
+    Returns:
+        {name: {"status": "ok"|"error"|"timeout", "data"?: ..., "error"?: str, "elapsed_ms": int}}
+    """
+    if not sources:
+        return {}
+
+    started = time.monotonic()
+    futures = {s.name: _executor.submit(_timed, s.fetch) for s in sources}
+    results: dict[str, dict] = {}
+    try:
+        for source in sources:
+            remaining = max(0.0, started + source.timeout - time.monotonic())
+            try:
+                data, elapsed_ms = futures[source.name].result(timeout=remaining)
+                results[source.name] = {
+                    "status": STATUS_OK, "data": data, "elapsed_ms": elapsed_ms,
+                }
+            except FutureTimeoutError:
+                logger.warning("Briefing source timed out: %s (%.1fs)", source.name, source.timeout)
+                results[source.name] = {
+                    "status": STATUS_TIMEOUT,
+                    "elapsed_ms": int(source.timeout * 1000),
+                }
+            except Exception as e:
+                logger.warning("Briefing source failed: %s: %s", source.name, e)
+                results[source.name] = {
+                    "status": STATUS_ERROR,
+                    "error": str(e),
+                    "elapsed_ms": int((time.monotonic() - started) * 1000),
+                }
+    finally:
+        # タイムアウトしたソースの完了は待たず、まだ始まっていなければ取り消す
+        for future in futures.values():
+            future.cancel()
+
+    logger.info(
+        "Briefing sources gathered in %dms: %s",
+        int((time.monotonic() - started) * 1000),
+        {name: (r["status"], r["elapsed_ms"]) for name, r in results.items()},
+    )
+    return results
+
+
+def _timed(fetch: Callable[[], Any]) -> tuple[Any, int]:
+    started = time.monotonic()
+    data = fetch()
+    return data, int((time.monotonic() - started) * 1000)
+
+
+def _parse_json(text: Any) -> Any:
+    """ツールが返すJSON文字列をdictに戻す（JSONでなければそのまま返す）"""
+    if not isinstance(text, str):
+        return text
+    try:
+        return json.loads(text)
+    except (json.JSONDecodeError, TypeError):
+        return text
+
+
+def _call_mcp_tool(mcp_tool, arguments: dict, timeout: float) -> Any:
+    """Gateway MCPツールをモデルを介さず直接呼び出す（timeout 秒で打ち切る）"""
+    result = mcp_tool.mcp_client.call_tool_sync(
+        tool_use_id=f"briefing-{uuid.uuid4().hex[:8]}",
+        name=mcp_tool.mcp_tool.name,
+        arguments=arguments,
+        read_timeout_seconds=timedelta(seconds=timeout),
+    )
+    if result.get("status") == "error":
+        texts = [c.get("text", "") for c in result.get("content", []) if "text" in c]
+        raise RuntimeError(" ".join(texts) or f"{mcp_tool.tool_name} failed")
+    texts = [c["text"] for c in result.get("content", []) if "text" in c]
+    return _parse_json("".join(texts))
+
+
+def _find_tool(tools: list, prefix: str):
+    return next((t for t in tools if t.tool_name.startswith(prefix)), None)
+
+
+def build_briefing_sources(
+    now: datetime,
+    actor_id: str,
+    task_tools: list,
+    main_tools: list,
+    timeout: float = DEFAULT_SOURCE_TIMEOUT_SECONDS,
+) -> list[BriefingSource]:
+    """ブリーフィングのデータソース一覧を構築する
+
+    Args:
+        now: 基準日時（JST）
+        actor_id: タスク取得に使うオーナーID
+        task_tools: task-tool のMCPツール
+        main_tools: メイン用のMCPツール（TavilySearchを探す）
+        timeout: 各ソースのタイムアウト秒数（MCP呼び出しにも同じ値を使う）
+    """
+    today = now.strftime("%Y-%m-%d")
+    tomorrow = (now + timedelta(days=1)).strftime("%Y-%m-%d")
+    # 週は月曜始まり
+    monday = (now - timedelta(days=now.weekday())).strftime("%Y/%m/%d")
+
+    sources = [
+        BriefingSource(
+            "calendar",
+            lambda: _parse_json(calendar_list_events(date_from=today, date_to=tomorrow)),
+            timeout,
+        ),
+        BriefingSource(
+            "mail",
+            lambda: _parse_json(gmail_search_emails(query="is:unread newer_than:1d")),
+            timeout,
+        ),
+        BriefingSource(
+            "spending",
+            lambda: _parse_json(gmail_search_emails(query=f"from:カード after:{monday}")),
+            timeout,
+        ),
+    ]
+
+    list_tasks = _find_tool(task_tools, "task-tool___list_tasks")
+    if list_tasks is not None:
+        sources.append(BriefingSource(
+            "tasks",
+            lambda: _call_mcp_tool(list_tasks, {
+                "user_id": actor_id, "days_until_due": URGENT_TASK_DAYS,
+            }, timeout),
+            timeout,
+        ))
+
+    tavily = _find_tool(main_tools, "TavilySearch")
+    if tavily is not None:
+        sources.append(BriefingSource(
+            "weather",
+            lambda: _call_mcp_tool(tavily, {
+                "query": f"{WEATHER_LOCATION} 今日の天気 {now.strftime('%Y年%m月%d日')}",
+                "max_results": 3,
+            }, timeout),
+            timeout,
+        ))
+
+    return sources
+
+
+def format_briefing_message(request: str, now: datetime, results: dict[str, dict]) -> str:
+    """収集結果を要約モデルへの入力メッセージに整形する"""
+    weekdays = "月火水木金土日"
+    header = (
+        f"現在日時: {now.strftime('%Y年%m月%d日')}（{weekdays[now.weekday()]}）"
+        f" {now.strftime('%H:%M')}（JST）"
+    )
+    payload = json.dumps(results, ensure_ascii=False, default=str)
+    return f"{header}\n\n## 依頼\n{request}\n\n## 収集データ\n{payload}"
@@ -2,18 +2,40 @@
 
 AgentCore Code Interpreter sandbox を使って Python コードを実行し、
 matplotlib で生成されたグラフを S3 にアップロードして署名付き URL を返す。
+
+グラフはサンドボックスのファイルシステムに保存し、readFiles でバイナリのまま取得する
+（stdout に base64 で載せない）。アップロードは並列で、大きい画像はマルチパートになる。
+画像形式（webp / png）と DPI は環境変数で変更できる。
+サンドボックスは会話（actor_id, session_id）ごとに CodeInterpreterPool で使い回す。
+アップロードが終わった画像は、呼び出し元ストリームの ImageQueue（ContextVar で設定）に1枚ずつ届ける。
+datasets に参照ID（get_aws_cost などが返す）を渡すと、CSV をサンドボックスに書き込んで DataFrame として読み込む。
 """
 
+import asyncio
 import base64
+import io
 import json
 import logging
 import os
 import threading
 import uuid
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Iterator
 
 import boto3
-from strands import tool
+from boto3.s3.transfer import TransferConfig
+from strands import ToolContext, tool
+
+from .code_interpreter_pool import (
+    DEFAULT_IDLE_TTL_SECONDS,
+    DEFAULT_MAX_LIFETIME_SECONDS,
+    DEFAULT_MAX_SIZE,
+    CodeInterpreterPool,
+)
+from .datasets import Dataset, dataset_load_code, dataset_owner, dataset_store
 
 logger = logging.getLogger(__name__)
 
@@ -21,24 +43,138 @@ CODE_INTERPRETER_REGION = os.getenv("CODE_INTERPRETER_REGION", "ap-northeast-1")
 OUTPUT_BUCKET = os.getenv("CODE_INTERPRETER_OUTPUT_BUCKET", "")
 AWS_REGION = os.getenv("AWS_REGION", "ap-northeast-1")
 
+# グラフの出力形式: webp（既定、PNGより大幅に小さい）または png（最大圧縮）
+FIGURE_FORMAT = os.getenv("CODE_INTERPRETER_FIGURE_FORMAT", "webp").lower()
+FIGURE_DPI = int(os.getenv("CODE_INTERPRETER_FIGURE_DPI", "100"))
+FIGURE_WEBP_QUALITY = int(os.getenv("CODE_INTERPRETER_FIGURE_WEBP_QUALITY", "85"))
+# サンドボックス内のグラフ保存先（実行ごとに作り直す）
+FIGURE_DIR = "_tonari_figures"
+FIGURE_MARKER = "_TONARI_FIGURES_"
+
+CONTENT_TYPES = {"png": "image/png", "webp": "image/webp"}
+
+# この大きさを超える画像はマルチパートでアップロードする
+UPLOAD_CONFIG = TransferConfig(multipart_threshold=8 * 1024 * 1024, multipart_chunksize=8 * 1024 * 1024)
+UPLOAD_MAX_WORKERS = 4
+
+# 会話ごとのサンドボックスの保持数と寿命
+SESSION_POOL_MAX_SIZE = int(os.getenv("CODE_INTERPRETER_POOL_MAX_SIZE", str(DEFAULT_MAX_SIZE)))
+SESSION_IDLE_TTL_SECONDS = float(
+    os.getenv("CODE_INTERPRETER_IDLE_TTL_SECONDS", str(DEFAULT_IDLE_TTL_SECONDS))
+)
+SESSION_MAX_LIFETIME_SECONDS = float(
+    os.getenv("CODE_INTERPRETER_MAX_LIFETIME_SECONDS", str(DEFAULT_MAX_LIFETIME_SECONDS))
+)
+
 # モジュールロード時に S3 クライアントを即時初期化
 _s3_client = boto3.client("s3", region_name=AWS_REGION)
 
 
-# ツール実行後に画像 URL を SSE ストリームへ送出するためのキュー
-_pending_images: list[dict] = []
-_pending_images_lock = threading.Lock()
+# ストリームが受け取っていない画像の上限（超えるとアップロード側が待つ）
+MAX_PENDING_IMAGES = int(os.getenv("CODE_INTERPRETER_MAX_PENDING_IMAGES", "8"))
+IMAGE_PUT_TIMEOUT_SECONDS = 30.0
+
 
+_session_pool: CodeInterpreterPool | None = None
+_session_pool_lock = threading.Lock()
 
-def drain_pending_images() -> list[dict]:
-    """保留中の画像URLをすべて取り出して返す"""
-    with _pending_images_lock:
-        images = list(_pending_images)
-        _pending_images.clear()
-    return images
 
+def _get_session_pool() -> CodeInterpreterPool:
+    global _session_pool
+    with _session_pool_lock:
+        if _session_pool is None:
+            from bedrock_agentcore.tools.code_interpreter_client import CodeInterpreter
+
+            _session_pool = CodeInterpreterPool(
+                client_factory=lambda: CodeInterpreter(CODE_INTERPRETER_REGION),
+                max_size=SESSION_POOL_MAX_SIZE,
+                idle_ttl_seconds=SESSION_IDLE_TTL_SECONDS,
+                max_lifetime_seconds=SESSION_MAX_LIFETIME_SECONDS,
+            )
+        return _session_pool
+
+
+@contextmanager
+def _code_session(tool_context: ToolContext | None) -> Iterator:
+    """会話ごとのサンドボックスを借りる（会話が特定できなければ使い捨てのセッション）"""
+    state = tool_context.invocation_state if tool_context is not None else {}
+    session_id = state.get("session_id")
+    if not session_id:
+        from bedrock_agentcore.tools.code_interpreter_client import code_session
+
+        with code_session(CODE_INTERPRETER_REGION) as code_client:
+            yield code_client
+        return
+    with _get_session_pool().session((state.get("actor_id", ""), session_id)) as code_client:
+        yield code_client
+
+
+class ImageQueue:
+    """1ストリーム分の画像URLキュー（上限付き）
+
+    ツールのワーカースレッドから put() し、ストリーム側のイベントループで get() する。
+    キューが満杯の間は put() が待つため、ストリームが読まない限り画像は溜まり続けない。
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, maxsize: int = MAX_PENDING_IMAGES):
+        self._loop = loop
+        self._queue: asyncio.Queue[dict | None] = asyncio.Queue(maxsize)
+        self._closed = False
+
+    def put(self, image: dict, timeout: float = IMAGE_PUT_TIMEOUT_SECONDS) -> bool:
+        """画像を送る。タイムアウトやストリーム終了で届けられなければ False"""
+        if self._closed:
+            logger.warning("Image stream already closed, dropping image")
+            return False
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            # イベントループ上からは待てないため、満杯なら諦める
+            try:
+                self._queue.put_nowait(image)
+                return True
+            except asyncio.QueueFull:
+                logger.warning("Image queue full, dropping image")
+                return False
+        try:
+            future = asyncio.run_coroutine_threadsafe(self._queue.put(image), self._loop)
+        except RuntimeError:
+            logger.warning("Image stream already closed, dropping image")
+            return False
+        try:
+            future.result(timeout)
+            return True
+        except Exception:
+            future.cancel()
+            logger.warning("Timed out delivering image to stream, dropping image")
+            return False
+
+    async def get(self) -> dict | None:
+        """次の画像を待つ。close() 後は None"""
+        return await self._queue.get()
+
+    async def close(self) -> None:
+        """ストリーム終了を伝える（以降の put() は捨てられる）"""
+        self._closed = True
+        await self._queue.put(None)
+
+
+_image_queue: ContextVar[ImageQueue | None] = ContextVar("code_interpreter_image_queue", default=None)
+
+
+@contextmanager
+def image_queue_scope(queue: ImageQueue) -> Iterator[ImageQueue]:
+    """このコンテキストで実行される execute_python の画像の送り先を設定する"""
+    token = _image_queue.set(queue)
+    try:
+        yield queue
+    finally:
+        _image_queue.reset(token)
 
-def _upload_to_s3(img_bytes: bytes, figure_num: int) -> str | None:
+
+def _upload_to_s3(img_bytes: bytes, figure_num: int, fmt: str = "png") -> str | None:
     """画像を S3 にアップロードして署名付き URL を返す"""
     if not OUTPUT_BUCKET:
         logger.warning("CODE_INTERPRETER_OUTPUT_BUCKET not set, skipping S3 upload")
@@ -46,14 +182,15 @@ def _upload_to_s3(img_bytes: bytes, figure_num: int) -> str | None:
 
     try:
         s3 = _s3_client
-        timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
-        key = f"outputs/{timestamp}_{uuid.uuid4().hex[:8]}_fig{figure_num}.png"
-
-        s3.put_object(
-            Bucket=OUTPUT_BUCKET,
-            Key=key,
-            Body=img_bytes,
-            ContentType="image/png",
+        timestamp = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
+        key = f"outputs/{timestamp}_{uuid.uuid4().hex[:8]}_fig{figure_num}.{fmt}"
+
+        s3.upload_fileobj(
+            io.BytesIO(img_bytes),
+            OUTPUT_BUCKET,
+            key,
+            ExtraArgs={"ContentType": CONTENT_TYPES.get(fmt, "application/octet-stream")},
+            Config=UPLOAD_CONFIG,
         )
 
         url = s3.generate_presigned_url(
@@ -68,15 +205,128 @@ def _upload_to_s3(img_bytes: bytes, figure_num: int) -> str | None:
         return None
 
 
-@tool
-def execute_python(code: str, description: str = "") -> str:
+def _upload_figures(figures: list[tuple[int, str, bytes]], queue: ImageQueue | None = None) -> list[str]:
+    """グラフを並列にアップロードし、成功した URL を図番号順に返す
+
+    queue があれば、アップロードが終わった順に1枚ずつ送る。
+    """
+    if not figures:
+        return []
+    urls: dict[int, str] = {}
+    with ThreadPoolExecutor(max_workers=min(UPLOAD_MAX_WORKERS, len(figures))) as executor:
+        futures = {executor.submit(_upload_to_s3, data, num, fmt): num for num, fmt, data in figures}
+        for future in as_completed(futures):
+            url = future.result()
+            if not url:
+                continue
+            urls[futures[future]] = url
+            if queue is not None:
+                queue.put({"url": url})
+    return [urls[num] for num, _, _ in figures if num in urls]
+
+
+def _figure_export_code(fmt: str, dpi: int) -> str:
+    """開いている matplotlib の図をサンドボックスのファイルに保存するコード
+
+    webp を保存できない環境では png にフォールバックする。
+    保存したファイルの一覧（図番号・形式・パス）を1行のマーカーとして stdout に出す。
+    """
+    return f"""
+import matplotlib.pyplot as _plt, json as _json, os as _os, shutil as _shutil
+_shutil.rmtree({FIGURE_DIR!r}, ignore_errors=True)
+_figs = []
+if _plt.get_fignums():
+    _os.makedirs({FIGURE_DIR!r}, exist_ok=True)
+for _i in _plt.get_fignums():
+    _fmt = {fmt!r}
+    _path = {FIGURE_DIR!r} + f'/fig{{_i}}.' + _fmt
+    try:
+        if _fmt == 'webp':
+            _plt.figure(_i).savefig(_path, format='webp', bbox_inches='tight', dpi={dpi},
+                                    pil_kwargs={{'quality': {FIGURE_WEBP_QUALITY}, 'method': 6}})
+        else:
+            raise ValueError(_fmt)
+    except Exception:
+        _fmt = 'png'
+        _path = _os.path.splitext(_path)[0] + '.png'
+        _plt.figure(_i).savefig(_path, format='png', bbox_inches='tight', dpi={dpi},
+                                pil_kwargs={{'optimize': True, 'compress_level': 9}})
+    _figs.append({{'i': _i, 'f': _fmt, 'p': _path}})
+if _figs:
+    print({FIGURE_MARKER!r} + _json.dumps(_figs))
+_plt.close('all')
+"""
+
+
+def _split_figure_marker(stdout: str) -> tuple[str, list[dict]]:
+    """stdout からグラフ一覧のマーカー行を取り除き、(stdout, 一覧) を返す"""
+    index = stdout.rfind(FIGURE_MARKER)
+    if index == -1:
+        return stdout, []
+    line_end = stdout.find("\n", index)
+    marker = stdout[index + len(FIGURE_MARKER):line_end if line_end != -1 else None]
+    try:
+        figures = json.loads(marker)
+    except json.JSONDecodeError:
+        logger.warning("Invalid figure marker in stdout")
+        return stdout, []
+    rest = stdout[line_end + 1:] if line_end != -1 else ""
+    return (stdout[:index] + rest).strip(), figures
+
+
+def _read_files(code_client, paths: list[str]) -> dict[str, bytes]:
+    """readFiles でサンドボックスのファイルをバイナリのまま取得する"""
+    response = code_client.invoke("readFiles", {"paths": paths})
+    files: dict[str, bytes] = {}
+    for event in response.get("stream", []):
+        for item in event.get("result", {}).get("content", []):
+            if item.get("type") != "resource":
+                continue
+            resource = item.get("resource", {})
+            uri = resource.get("uri", "").removeprefix("file://")
+            blob = resource.get("blob")
+            if blob is None:
+                continue
+            data = base64.b64decode(blob) if isinstance(blob, str) else blob
+            # URI は絶対パスで返ることがあるため、要求したパスの末尾一致で対応付ける
+            for path in paths:
+                if uri == path or uri.endswith("/" + path):
+                    files[path] = data
+    return files
+
+
+def _write_datasets(code_client, datasets: list[Dataset]) -> None:
+    """writeFiles でデータセットの CSV をサンドボックスに書き込む"""
+    response = code_client.invoke(
+        "writeFiles",
+        {"content": [{"path": d.path, "text": d.csv_text} for d in datasets]},
+    )
+    for event in response.get("stream", []):
+        result = event.get("result", {})
+        if result.get("isError"):
+            raise RuntimeError(f"writeFiles failed: {result.get('content')}")
+
+
+@tool(context=True)
+def execute_python(
+    code: str,
+    description: str = "",
+    datasets: list[str] | None = None,
+    tool_context: ToolContext | None = None,
+) -> str:
     """Execute Python code in a sandboxed environment. Use this to run data analysis,
     generate charts with matplotlib, or perform calculations.
 
     Available libraries: pandas, numpy, matplotlib, json, datetime.
+    Variables and DataFrames from earlier calls in the same conversation are kept,
+    so follow-up analysis can reuse them instead of reloading the data.
     Use ONLY matplotlib for plotting (not seaborn).
     Use English for all chart labels and titles (Japanese fonts are not available).
 
+    Data tools such as get_aws_cost return a dataset_id instead of the full data.
+    Pass those IDs in `datasets` and read them in the code as pandas DataFrames via
+    `datasets["<dataset_id>"]`. Do NOT paste the data into the code.
+
     IMPORTANT for chart generation:
     - Do NOT call plt.savefig() — images are auto-captured from open figures.
     - Do NOT call plt.close() — closing figures prevents image capture.
@@ -86,34 +336,39 @@ def execute_python(code: str, description: str = "") -> str:
     Args:
         code: Python code to execute.
         description: Optional description of what the code does.
+        datasets: Optional list of dataset IDs to preload as DataFrames.
 
     Returns:
         JSON string with execution results including stdout, stderr, and image URLs.
     """
-    from bedrock_agentcore.tools.code_interpreter_client import code_session
-
     if description:
         code = f"# {description}\n{code}"
 
-    # matplotlib の画像キャプチャコードを注入
+    loaded: list[Dataset] = []
+    owner = dataset_owner(tool_context)
+    for dataset_id in datasets or []:
+        dataset = dataset_store.get(dataset_id, owner=owner)
+        if dataset is None:
+            return json.dumps({
+                "isError": True,
+                "stdout": "",
+                "stderr": f"Unknown or expired dataset: {dataset_id}. Fetch the data again to get a new dataset_id.",
+            })
+        loaded.append(dataset)
+    if loaded:
+        code = f"{dataset_load_code(loaded)}{code}"
+
+    # ユーザーコードの後に、開いている図をファイルへ保存するコードを追加
     img_code = f"""
 import matplotlib
 matplotlib.use('Agg')
 {code}
-import matplotlib.pyplot as plt, base64, io, json as _json
-_imgs = []
-for _i in plt.get_fignums():
-    _b = io.BytesIO()
-    plt.figure(_i).savefig(_b, format='png', bbox_inches='tight', dpi=100)
-    _b.seek(0)
-    _imgs.append({{'i': _i, 'd': base64.b64encode(_b.read()).decode()}})
-if _imgs:
-    print('_IMG_' + _json.dumps(_imgs) + '_END_')
-plt.close('all')
-"""
+{_figure_export_code(FIGURE_FORMAT, FIGURE_DPI)}"""
 
     try:
-        with code_session(CODE_INTERPRETER_REGION) as code_client:
+        with _code_session(tool_context) as code_client:
+            if loaded:
+                _write_datasets(code_client, loaded)
             response = code_client.invoke(
                 "executeCode",
                 {
@@ -133,31 +388,29 @@ plt.close('all')
                     "stderr": "No result from Code Interpreter",
                 })
 
-        stdout = result.get("structuredContent", {}).get("stdout", "")
-        stderr = result.get("structuredContent", {}).get("stderr", "")
-        is_error = result.get("isError", False)
+            stdout = result.get("structuredContent", {}).get("stdout", "")
+            stderr = result.get("structuredContent", {}).get("stderr", "")
+            is_error = result.get("isError", False)
 
-        # base64 画像の抽出 → S3 アップロード → 署名付き URL をキューに追加
-        image_urls = []
-        clean_stdout = stdout
-        if "_IMG_" in stdout and "_END_" in stdout:
-            try:
-                start = stdout.find("_IMG_") + 5
-                end = stdout.find("_END_")
-                img_json = stdout[start:end]
-                imgs = json.loads(img_json)
-                for img in imgs:
-                    img_bytes = base64.b64decode(img["d"])
-                    url = _upload_to_s3(img_bytes, img["i"])
-                    if url:
-                        image_urls.append(url)
-                        with _pending_images_lock:
-                            _pending_images.append({"url": url})
-                clean_stdout = stdout[:stdout.find("_IMG_")].strip()
-                logger.info("Code Interpreter generated %d image(s), uploaded %d to S3",
-                            len(imgs), len(image_urls))
-            except Exception as e:
-                logger.warning("Failed to parse/upload image data: %s", e)
+            clean_stdout, figure_list = _split_figure_marker(stdout)
+            figures = []
+            if figure_list:
+                try:
+                    files = _read_files(code_client, [f["p"] for f in figure_list])
+                    for f in figure_list:
+                        data = files.get(f["p"])
+                        if data:
+                            figures.append((f["i"], f["f"], data))
+                        else:
+                            logger.warning("Figure file not returned: %s", f["p"])
+                except Exception as e:
+                    logger.warning("Failed to read figure files: %s", e)
+
+        # S3 アップロード（並列） → 署名付き URL を終わった順にストリームへ送る
+        image_urls = _upload_figures(figures, _image_queue.get())
+        if figure_list:
+            logger.info("Code Interpreter generated %d image(s), uploaded %d to S3",
+                        len(figure_list), len(image_urls))
 
         result = {
             "isError": is_error,
@@ -0,0 +1,262 @@
+"""Code Interpreter セッションプールモジュール
+
+(actor_id, session_id) をキーに起動済みの Code Interpreter セッションを保持し、
+execute_python の呼び出しごとにサンドボックスを起動し直さないようにする。
+同じ会話の続きの分析では、前回読み込んだ DataFrame や変数がそのまま使える。
+
+- 起動直後のウォームアップで pandas / numpy / matplotlib を import しておく
+- アイドルTTLと最大寿命を超えたセッションは借り出し時に破棄して作り直す
+- しばらく使われていないセッションは借り出し前にヘルスチェックし、失敗すれば作り直す
+- 件数上限を超えたら最も古く使われたセッションから停止する
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Hashable, Iterator
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_SIZE = 8
+DEFAULT_IDLE_TTL_SECONDS = 10 * 60
+DEFAULT_MAX_LIFETIME_SECONDS = 50 * 60
+DEFAULT_HEALTH_CHECK_AFTER_SECONDS = 60
+# サンドボックス側のタイムアウトは最大寿命より長く取り、使用中に切れないようにする
+DEFAULT_SESSION_TIMEOUT_SECONDS = 60 * 60
+
+WARMUP_CODE = """
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot
+import numpy
+import pandas
+"""
+HEALTH_CHECK_CODE = "print('ok')"
+
+
+@dataclass
+class PooledSession:
+    """プールに格納する起動済みの Code Interpreter セッション"""
+
+    client: Any
+    created_at: float = 0.0
+    last_used: float = 0.0
+    # 同じセッションでのコード実行は1つずつ（サンドボックスの状態を共有するため）
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    retired: bool = False
+
+    def close(self) -> None:
+        """サンドボックスのセッションを停止する"""
+        try:
+            self.client.stop()
+        except Exception:
+            logger.warning("Failed to stop Code Interpreter session", exc_info=True)
+
+
+def _run_code(client, code: str) -> bool:
+    """コードを実行し、エラーなく結果が返ったかを返す"""
+    response = client.invoke("executeCode", {"code": code, "language": "python", "clearContext": False})
+    result = None
+    for event in response["stream"]:
+        result = event.get("result")
+    return result is not None and not result.get("isError", False)
+
+
+class CodeInterpreterPool:
+    """キー単位で Code Interpreter セッションを使い回すプール
+
+    キー単位のロックで同一キーの同時起動を1回にまとめ、
+    異なるキーの起動は互いにブロックしない。
+    """
+
+    def __init__(
+        self,
+        client_factory: Callable[[], Any],
+        max_size: int = DEFAULT_MAX_SIZE,
+        idle_ttl_seconds: float = DEFAULT_IDLE_TTL_SECONDS,
+        max_lifetime_seconds: float = DEFAULT_MAX_LIFETIME_SECONDS,
+        health_check_after_seconds: float = DEFAULT_HEALTH_CHECK_AFTER_SECONDS,
+        session_timeout_seconds: int = DEFAULT_SESSION_TIMEOUT_SECONDS,
+        warmup_code: str = WARMUP_CODE,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._client_factory = client_factory
+        self.max_size = max(1, max_size)
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self.max_lifetime_seconds = max_lifetime_seconds
+        self.health_check_after_seconds = health_check_after_seconds
+        self.session_timeout_seconds = session_timeout_seconds
+        self.warmup_code = warmup_code
+        self._clock = clock
+        self._entries: OrderedDict[Hashable, PooledSession] = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks: dict[Hashable, threading.Lock] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @contextmanager
+    def session(self, key: Hashable) -> Iterator[Any]:
+        """キーに対応するセッションを借り出す
+
+        借り出し中に例外が起きたセッションは、サンドボックスが壊れている可能性があるため破棄する。
+        """
+        while True:
+            entry = self._checkout(key)
+            entry.lock.acquire()
+            if not entry.retired:
+                break
+            # 借り出しとロック取得の間に破棄された場合は取り直す
+            entry.lock.release()
+        try:
+            yield entry.client
+        except Exception:
+            self._discard(key, entry)
+            raise
+        finally:
+            entry.last_used = self._clock()
+            entry.lock.release()
+            # 使用中に破棄されたセッションは返却時に停止する
+            if entry.retired:
+                entry.close()
+
+    def invalidate(self, key: Hashable) -> None:
+        """指定キーのセッションを停止して破棄する"""
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None:
+            self._discard(key, entry)
+
+    def clear(self) -> None:
+        """全セッションを停止して破棄する"""
+        with self._lock:
+            entries = list(self._entries.values())
+            self._entries.clear()
+            self._key_locks.clear()
+        self._retire_all(entries)
+
+    def stats(self) -> dict[str, int]:
+        """ヒット・ミス・破棄件数と現在のセッション数を返す"""
+        with self._lock:
+            return self._stats_locked()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def _checkout(self, key: Hashable) -> PooledSession:
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            with self._lock:
+                stale = self._evict_stale()
+                entry = self._entries.get(key)
+            self._retire_all(stale)
+
+            if entry is not None and self._needs_health_check(entry) and not self._is_healthy(entry):
+                logger.info("CodeInterpreterPool health check failed: key=%s", key)
+                self._discard(key, entry)
+                entry = None
+
+            if entry is not None:
+                with self._lock:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                return entry
+
+            entry = self._start()
+            with self._lock:
+                self.misses += 1
+                self._entries[key] = entry
+                self._entries.move_to_end(key)
+                evicted = self._evict_overflow()
+                stats = self._stats_locked()
+            self._retire_all(evicted)
+            logger.info("CodeInterpreterPool miss: key=%s stats=%s", key, stats)
+            return entry
+
+    def _start(self) -> PooledSession:
+        """サンドボックスを起動し、重いライブラリを先に import しておく"""
+        client = self._client_factory()
+        client.start(session_timeout_seconds=self.session_timeout_seconds)
+        if self.warmup_code:
+            try:
+                if not _run_code(client, self.warmup_code):
+                    logger.warning("Code Interpreter warm-up reported an error")
+            except Exception:
+                logger.warning("Code Interpreter warm-up failed", exc_info=True)
+        now = self._clock()
+        return PooledSession(client=client, created_at=now, last_used=now)
+
+    def _needs_health_check(self, entry: PooledSession) -> bool:
+        return self._clock() - entry.last_used > self.health_check_after_seconds
+
+    def _is_healthy(self, entry: PooledSession) -> bool:
+        try:
+            with entry.lock:
+                return _run_code(entry.client, HEALTH_CHECK_CODE)
+        except Exception:
+            logger.warning("Code Interpreter health check error", exc_info=True)
+            return False
+
+    def _is_stale(self, entry: PooledSession, now: float) -> bool:
+        if self.idle_ttl_seconds > 0 and now - entry.last_used > self.idle_ttl_seconds:
+            return True
+        return self.max_lifetime_seconds > 0 and now - entry.created_at > self.max_lifetime_seconds
+
+    def _discard(self, key: Hashable, entry: PooledSession) -> None:
+        with self._lock:
+            if self._entries.get(key) is entry:
+                del self._entries[key]
+                self._drop_key_lock(key)
+                self.evictions += 1
+        self._retire_all([entry])
+
+    def _stats_locked(self) -> dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self._entries),
+        }
+
+    def _evict_stale(self) -> list[PooledSession]:
+        """self._lock 保持中に呼ぶ"""
+        now = self._clock()
+        stale_keys = [k for k, e in self._entries.items() if self._is_stale(e, now)]
+        return [self._pop_for_eviction(k) for k in stale_keys]
+
+    def _evict_overflow(self) -> list[PooledSession]:
+        """self._lock 保持中に呼ぶ"""
+        evicted = []
+        while len(self._entries) > self.max_size:
+            oldest_key = next(iter(self._entries))
+            evicted.append(self._pop_for_eviction(oldest_key))
+        return evicted
+
+    def _pop_for_eviction(self, key: Hashable) -> PooledSession:
+        entry = self._entries.pop(key)
+        self._drop_key_lock(key)
+        self.evictions += 1
+        logger.info("CodeInterpreterPool evict: key=%s", key)
+        return entry
+
+    def _drop_key_lock(self, key: Hashable) -> None:
+        lock = self._key_locks.get(key)
+        if lock is not None and not lock.locked():
+            del self._key_locks[key]
+
+    @staticmethod
+    def _retire_all(entries: list[PooledSession]) -> None:
+        """使用中のセッションは返却時に停止し、それ以外はすぐ停止する"""
+        for entry in entries:
+            entry.retired = True
+            if entry.lock.acquire(blocking=False):
+                try:
+                    entry.close()
+                finally:
+                    entry.lock.release()
@@ -0,0 +1,269 @@
+"""Cost Explorer のキャッシュモジュール
+
+get_cost_and_usage は1リクエストごとに課金されるため、取得した ResultsByTime を
+期間（日・月）単位で保持し、(granularity, start, end, group_by) の問い合わせに答える。
+
+- 確定済みの期間は SETTLED_TTL、見積もり（Estimated）の期間は ESTIMATED_TTL で再取得する。
+  Cost Explorer のデータは1日に数回更新されるため、直近の期間だけを短めに持つ
+- 足りない・古い期間があれば、その最初の期間から end までだけを取得して差し込む
+  （翌日に同じ問い合わせをすると、新しい日の分だけを取りにいく）
+- NextPageToken をたどってすべてのページを取得する
+- COST_CACHE_PATH（JSONファイル）または COST_CACHE_TABLE（DynamoDB、パーティションキー
+  "cacheKey"、TTL属性 "ttl"）を設定すると、プロセスをまたいでキャッシュを共有する。
+  メモリ上の期間が足りない・古いときは、取得する前に永続化先を読み直し、
+  別のインスタンスが取得済みの期間を使う
+- 取得中はそのキーのロックだけを持つので、別のキーの問い合わせは待たされない
+"""
+
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import zlib
+from datetime import date, timedelta
+from typing import Any, Callable, Protocol
+
+import boto3
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ESTIMATED_TTL_SECONDS = float(os.getenv("COST_CACHE_ESTIMATED_TTL_SECONDS", str(4 * 60 * 60)))
+DEFAULT_SETTLED_TTL_SECONDS = float(os.getenv("COST_CACHE_SETTLED_TTL_SECONDS", str(24 * 60 * 60)))
+
+METRICS = ["UnblendedCost"]
+
+# 期間の開始日 -> {"end", "estimated", "fetched_at", "result"}
+Rows = dict[str, dict]
+
+
+class CostStore(Protocol):
+    """キャッシュの永続化先"""
+
+    def load(self, key: str) -> Rows | None: ...
+
+    def save(self, key: str, rows: Rows, expires_at: float) -> None: ...
+
+
+class JsonFileStore:
+    """ローカルのJSONファイルに保存する（開発・単一プロセス向け）"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def _read(self) -> dict:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def load(self, key: str) -> Rows | None:
+        with self._lock:
+            return self._read().get(key)
+
+    def save(self, key: str, rows: Rows, expires_at: float) -> None:
+        with self._lock:
+            data = self._read()
+            data[key] = rows
+            directory = os.path.dirname(os.path.abspath(self.path))
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+
+
+class DynamoDBStore:
+    """DynamoDB に保存する（Runtime のインスタンス間で共有）
+
+    サービス別の日次データは大きくなるため、zlib で圧縮したバイナリとして1項目に格納する。
+    """
+
+    def __init__(self, table_name: str, region_name: str | None = None):
+        self._table = boto3.resource("dynamodb", region_name=region_name).Table(table_name)
+
+    def load(self, key: str) -> Rows | None:
+        item = self._table.get_item(Key={"cacheKey": key}).get("Item")
+        if not item:
+            return None
+        return json.loads(zlib.decompress(bytes(item["rows"])))
+
+    def save(self, key: str, rows: Rows, expires_at: float) -> None:
+        self._table.put_item(
+            Item={
+                "cacheKey": key,
+                "rows": zlib.compress(json.dumps(rows, ensure_ascii=False).encode()),
+                "ttl": int(expires_at),
+            }
+        )
+
+
+def default_store() -> CostStore | None:
+    table = os.getenv("COST_CACHE_TABLE")
+    if table:
+        return DynamoDBStore(table, region_name=os.getenv("AWS_REGION", "ap-northeast-1"))
+    path = os.getenv("COST_CACHE_PATH")
+    if path:
+        return JsonFileStore(path)
+    return None
+
+
+def _periods(granularity: str, start: str, end: str) -> list[tuple[str, str]]:
+    """[start, end) を Cost Explorer と同じ区切りの (開始日, 終了日) に分ける"""
+    current = date.fromisoformat(start)
+    last = date.fromisoformat(end)
+    periods = []
+    while current < last:
+        if granularity == "DAILY":
+            following = current + timedelta(days=1)
+        else:
+            following = (current.replace(day=1) + timedelta(days=32)).replace(day=1)
+        periods.append((current.isoformat(), min(following, last).isoformat()))
+        current = following
+    return periods
+
+
+class CostCache:
+    """get_cost_and_usage の ResultsByTime を期間単位でキャッシュする"""
+
+    def __init__(
+        self,
+        client,
+        store: CostStore | None = None,
+        estimated_ttl_seconds: float = DEFAULT_ESTIMATED_TTL_SECONDS,
+        settled_ttl_seconds: float = DEFAULT_SETTLED_TTL_SECONDS,
+        clock: Callable[[], float] = time.time,
+    ):
+        self._client = client
+        self._store = store
+        self.estimated_ttl_seconds = estimated_ttl_seconds
+        self.settled_ttl_seconds = settled_ttl_seconds
+        self._clock = clock
+        self._buckets: dict[str, Rows] = {}
+        # _buckets と _key_locks を守る。取得中はキーごとのロックだけを持つ
+        self._lock = threading.Lock()
+        self._key_locks: dict[str, threading.Lock] = {}
+        self.requests = 0
+
+    def results_by_time(
+        self, granularity: str, start: str, end: str, group_by: str | None = None
+    ) -> list[dict]:
+        """get_cost_and_usage の ResultsByTime と同じ形のリストを返す
+
+        Args:
+            granularity: "DAILY" または "MONTHLY"
+            start: 開始日（YYYY-MM-DD、含む）
+            end: 終了日（YYYY-MM-DD、含まない）
+            group_by: グループ化するディメンション（例: "SERVICE"）。None なら合計のみ
+        """
+        key = f"cost#{granularity}#{group_by or 'TOTAL'}"
+        periods = _periods(granularity, start, end)
+        with self._key_lock(key):
+            now = self._clock()
+            with self._lock:
+                rows = self._buckets.get(key)
+            if rows is None or self._first_stale(rows, periods, now) is not None:
+                # 別のインスタンスが取得済みかもしれないので永続化先を読み直す
+                rows = self._load(key)
+            stale = self._first_stale(rows, periods, now)
+            if stale is not None:
+                fetch_start = periods[stale][0]
+                logger.info(
+                    "CostCache miss: %s %s..%s (cached %d/%d periods)",
+                    key, fetch_start, end, stale, len(periods),
+                )
+                fetched = {
+                    result["TimePeriod"]["Start"]: {
+                        "end": result["TimePeriod"]["End"],
+                        "estimated": bool(result.get("Estimated", False)),
+                        "fetched_at": now,
+                        "result": result,
+                    }
+                    for result in self._fetch(granularity, fetch_start, end, group_by)
+                }
+                with self._lock:
+                    rows.update(fetched)
+                self._save(key, rows, now)
+            with self._lock:
+                return [rows[p_start]["result"] for p_start, _ in periods if p_start in rows]
+
+    def clear(self) -> None:
+        """メモリ上のキャッシュを破棄する（永続化先はそのまま）"""
+        with self._lock:
+            self._buckets.clear()
+
+    def _key_lock(self, key: str) -> threading.Lock:
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def _first_stale(self, rows: Rows, periods: list[tuple[str, str]], now: float) -> int | None:
+        """最初の足りない・古い期間の位置（すべて新しければ None）"""
+        with self._lock:
+            return next(
+                (i for i, (p_start, p_end) in enumerate(periods) if not self._is_fresh(rows.get(p_start), p_end, now)),
+                None,
+            )
+
+    def _is_fresh(self, row: dict | None, period_end: str, now: float) -> bool:
+        if row is None or row["end"] != period_end:
+            return False
+        ttl = self.estimated_ttl_seconds if row["estimated"] else self.settled_ttl_seconds
+        return now - row["fetched_at"] < ttl
+
+    def _fetch(self, granularity: str, start: str, end: str, group_by: str | None) -> list[dict]:
+        """NextPageToken をたどって全ページの ResultsByTime を取得する"""
+        kwargs: dict[str, Any] = {
+            "TimePeriod": {"Start": start, "End": end},
+            "Granularity": granularity,
+            "Metrics": METRICS,
+        }
+        if group_by:
+            kwargs["GroupBy"] = [{"Type": "DIMENSION", "Key": group_by}]
+
+        merged: dict[str, dict] = {}
+        while True:
+            self.requests += 1
+            response = self._client.get_cost_and_usage(**kwargs)
+            for result in response.get("ResultsByTime", []):
+                period_start = result["TimePeriod"]["Start"]
+                if period_start in merged:
+                    # ページをまたいだ期間はグループを連結する
+                    merged[period_start].setdefault("Groups", []).extend(result.get("Groups", []))
+                else:
+                    merged[period_start] = result
+            token = response.get("NextPageToken")
+            if not token:
+                return list(merged.values())
+            kwargs["NextPageToken"] = token
+
+    def _load(self, key: str) -> Rows:
+        """永続化先の期間のうち、メモリ上より新しいものを取り込んで返す（キーのロック保持中に呼ぶ）"""
+        stored: Rows = {}
+        if self._store is not None:
+            try:
+                stored = self._store.load(key) or {}
+            except Exception:
+                logger.warning("Failed to load cost cache %s", key, exc_info=True)
+        with self._lock:
+            rows = self._buckets.setdefault(key, {})
+            for p_start, row in stored.items():
+                current = rows.get(p_start)
+                if current is None or row["fetched_at"] > current["fetched_at"]:
+                    rows[p_start] = row
+            return rows
+
+    def _save(self, key: str, rows: Rows, now: float) -> None:
+        """キーのロック保持中に呼ぶ"""
+        with self._lock:
+            # 確定済みTTLも過ぎた期間は捨て、キャッシュが際限なく育たないようにする
+            for p_start in [p for p, row in rows.items() if now - row["fetched_at"] >= self.settled_ttl_seconds]:
+                del rows[p_start]
+            snapshot = dict(rows)
+        if self._store is None:
+            return
+        try:
+            self._store.save(key, snapshot, now + self.settled_ttl_seconds)
+        except Exception:
+            logger.warning("Failed to save cost cache %s", key, exc_info=True)
@@ -0,0 +1,169 @@
+"""データハンドルモジュール
+
+データ取得ツール（get_aws_cost など）の結果を CSV として保持し、短い参照ID を返す。
+execute_python は参照IDで指定されたデータをサンドボックスに書き込み、DataFrame として読み込む。
+モデルがデータをコードに書き写す必要がなくなり、出力トークンとレイテンシがデータ量に比例しなくなる。
+
+データセットは作成した会話（actor_id, session_id）に紐づけ、別の会話からは参照IDを知っていても取り出せない。
+"""
+
+import csv
+import io
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Callable, Iterable
+
+from strands import ToolContext
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ENTRIES = 64
+# 会話の続きでグラフを作り直せるよう、サンドボックスの寿命と同程度に保持する
+DEFAULT_TTL_SECONDS = 60 * 60
+
+# サンドボックス内の CSV ファイル名の接頭辞（writeFiles で作業ディレクトリ直下に書き込む）
+DATASET_FILE_PREFIX = "_tonari_dataset_"
+
+# データセットの持ち主（actor_id, session_id）
+Owner = tuple[str, str]
+
+
+def dataset_owner(tool_context: ToolContext | None) -> Owner:
+    """ToolContext の invocation_state から持ち主を取り出す"""
+    state = tool_context.invocation_state if tool_context is not None else {}
+    return (state.get("actor_id") or "", state.get("session_id") or "")
+
+
+@dataclass
+class Dataset:
+    """CSV で保持したデータセット"""
+
+    dataset_id: str
+    name: str
+    columns: list[str]
+    csv_text: str
+    row_count: int
+    # read_csv で日付として読み込む列
+    parse_dates: list[str] = field(default_factory=list)
+    owner: Owner = ("", "")
+    created_at: float = 0.0
+
+    @property
+    def path(self) -> str:
+        """サンドボックス内の CSV のパス"""
+        return f"{DATASET_FILE_PREFIX}{self.dataset_id}.csv"
+
+    def handle(self) -> dict:
+        """ツールの結果としてモデルに返す参照情報"""
+        return {
+            "dataset_id": self.dataset_id,
+            "name": self.name,
+            "columns": self.columns,
+            "rows": self.row_count,
+        }
+
+
+def _to_csv(columns: list[str], rows: Iterable[Iterable]) -> tuple[str, int]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(columns)
+    count = 0
+    for row in rows:
+        writer.writerow(row)
+        count += 1
+    return buffer.getvalue(), count
+
+
+class DatasetStore:
+    """参照ID でデータセットを保持するストア（件数上限とTTL付き、持ち主ごとに参照を制限）"""
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries: OrderedDict[str, Dataset] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(
+        self,
+        name: str,
+        columns: list[str],
+        rows: Iterable[Iterable],
+        parse_dates: list[str] | None = None,
+        *,
+        owner: Owner,
+    ) -> Dataset:
+        """行データを CSV にして保存し、参照ID付きのデータセットを返す"""
+        csv_text, row_count = _to_csv(columns, rows)
+        dataset = Dataset(
+            dataset_id=f"ds_{uuid.uuid4().hex[:12]}",
+            name=name,
+            columns=list(columns),
+            csv_text=csv_text,
+            row_count=row_count,
+            parse_dates=list(parse_dates or []),
+            owner=owner,
+            created_at=self._clock(),
+        )
+        with self._lock:
+            self._evict_expired()
+            self._entries[dataset.dataset_id] = dataset
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        logger.info(
+            "Stored dataset %s (%s): %d rows, %.1f KB",
+            dataset.dataset_id, name, row_count, len(csv_text.encode()) / 1024,
+        )
+        return dataset
+
+    def get(self, dataset_id: str, *, owner: Owner) -> Dataset | None:
+        """参照ID のデータセットを返す（期限切れ・不明・別の持ち主なら None）"""
+        with self._lock:
+            self._evict_expired()
+            dataset = self._entries.get(dataset_id)
+            if dataset is None or dataset.owner != owner:
+                return None
+            self._entries.move_to_end(dataset_id)
+            return dataset
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def _evict_expired(self) -> None:
+        """self._lock 保持中に呼ぶ"""
+        if self.ttl_seconds <= 0:
+            return
+        now = self._clock()
+        for dataset_id in [k for k, d in self._entries.items() if now - d.created_at > self.ttl_seconds]:
+            del self._entries[dataset_id]
+
+
+def dataset_load_code(datasets: list[Dataset]) -> str:
+    """書き込み済みの CSV を `datasets[<参照ID>]` の DataFrame として読み込むコード"""
+    lines = [
+        "import pandas as _pd",
+        "if not isinstance(globals().get('datasets'), dict):",
+        "    datasets = {}",
+    ]
+    for dataset in datasets:
+        lines.append(
+            f"datasets[{dataset.dataset_id!r}] = _pd.read_csv({dataset.path!r}, parse_dates={dataset.parse_dates!r})"
+        )
+    return "\n".join(lines) + "\n"
+
+
+dataset_store = DatasetStore()
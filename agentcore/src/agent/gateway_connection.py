@@ -0,0 +1,191 @@
+"""Gateway MCP接続マネージャー
+
+プロセス全体で1本のMCPClient接続を維持し、list_tools_sync() のツールカタログを
+TTL付きでキャッシュする。TTL切れ後は古いカタログを返しつつバックグラウンドで再取得する。
+フルエージェント・パイプラインエージェントはここからフィルタ済みのビューを受け取る。
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Callable, Iterable
+
+from strands.tools.mcp import MCPClient
+
+from .sub_agents import split_mcp_tools
+from .tonari_agent import DEFAULT_GATEWAY_URL, create_mcp_client
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CATALOG_TTL_SECONDS = 5 * 60
+
+
+class GatewayConnection:
+    """共有MCPClientとツールカタログのキャッシュ
+
+    MCPClientインスタンスは再接続時も使い回すため、
+    配布済みのMCPAgentToolは再接続後もそのまま利用できる。
+    """
+
+    def __init__(
+        self,
+        gateway_url: str,
+        region: str,
+        catalog_ttl_seconds: float = DEFAULT_CATALOG_TTL_SECONDS,
+        client_factory: Callable[[str, str], MCPClient] = create_mcp_client,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.gateway_url = gateway_url
+        self.region = region
+        self.catalog_ttl_seconds = catalog_ttl_seconds
+        self._client_factory = client_factory
+        self._clock = clock
+        self._client: MCPClient | None = None
+        self._started = False
+        self._tools: list | None = None
+        self._fetched_at = 0.0
+        self._views: dict = {}
+        # _lock: カタログ状態の保護 / _conn_lock: 接続とカタログ取得（ネットワークI/O）の直列化
+        self._lock = threading.Lock()
+        self._conn_lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._refresh_thread: threading.Thread | None = None
+
+    @property
+    def client(self) -> MCPClient:
+        """接続済みのMCPClientを返す（未接続なら接続する）"""
+        with self._conn_lock:
+            return self._ensure_started()
+
+    def list_tools(self) -> list:
+        """ツールカタログを返す。TTL切れならバックグラウンド再取得を起動する。"""
+        with self._lock:
+            tools = self._tools
+            stale = self._clock() - self._fetched_at > self.catalog_ttl_seconds
+        if tools is None:
+            # 初回ロードは同時要求があっても1回にまとめる
+            with self._load_lock:
+                with self._lock:
+                    tools = self._tools
+                if tools is None:
+                    tools = self.refresh()
+            return list(tools)
+        if stale:
+            self._start_background_refresh()
+        return list(tools)
+
+    def refresh(self) -> list:
+        """ツールカタログを同期的に再取得する（失敗時は1回だけ再接続して再試行）"""
+        with self._conn_lock:
+            try:
+                tools = list(self._ensure_started().list_tools_sync() or [])
+            except Exception as e:
+                logger.warning("Gateway list_tools failed, reconnecting: %s", e)
+                self._stop_locked()
+                tools = list(self._ensure_started().list_tools_sync() or [])
+        with self._lock:
+            self._tools = tools
+            self._fetched_at = self._clock()
+            self._views.clear()
+        logger.info("Gateway tools discovered: %s", [t.tool_name for t in tools])
+        return tools
+
+    def tools_excluding(self, excluded: Iterable[str] = ()) -> list:
+        """指定ツール名を除いたカタログを返す"""
+        excluded = frozenset(excluded)
+        return self._view(
+            ("exclude", excluded),
+            lambda tools: [t for t in tools if t.tool_name not in excluded],
+        )
+
+    def tools_with_prefixes(self, prefixes: Iterable[str]) -> list:
+        """ターゲット名プレフィックス（"___"の前）で絞り込んだカタログを返す"""
+        prefixes = frozenset(prefixes)
+        return self._view(
+            ("prefix", prefixes),
+            lambda tools: [t for t in tools if t.tool_name.split("___")[0] in prefixes],
+        )
+
+    def tool_map(self, excluded: Iterable[str] = ()) -> dict[str, list]:
+        """除外適用後のカタログを split_mcp_tools のバケットに分割して返す"""
+        excluded = frozenset(excluded)
+        tool_map = self._view(
+            ("split", excluded),
+            lambda tools: split_mcp_tools(
+                [t for t in tools if t.tool_name not in excluded]
+            ),
+        )
+        return {bucket: list(tools) for bucket, tools in tool_map.items()}
+
+    def close(self) -> None:
+        """MCPClient接続を閉じ、カタログを破棄する"""
+        with self._conn_lock:
+            self._stop_locked()
+        with self._lock:
+            self._tools = None
+            self._views.clear()
+
+    def _view(self, key, build):
+        tools = self.list_tools()
+        with self._lock:
+            view = self._views.get(key)
+            if view is None:
+                view = build(self._tools if self._tools is not None else tools)
+                self._views[key] = view
+        return list(view) if isinstance(view, list) else view
+
+    def _ensure_started(self) -> MCPClient:
+        """self._conn_lock 保持中に呼ぶ"""
+        if self._client is None:
+            self._client = self._client_factory(self.gateway_url, self.region)
+        if not self._started:
+            self._client.start()
+            self._started = True
+        return self._client
+
+    def _stop_locked(self) -> None:
+        if self._client is None or not self._started:
+            return
+        try:
+            self._client.stop(None, None, None)
+        except Exception:
+            pass
+        self._started = False
+
+    def _start_background_refresh(self) -> None:
+        with self._lock:
+            if self._refresh_thread is not None and self._refresh_thread.is_alive():
+                return
+            self._refresh_thread = threading.Thread(
+                target=self._background_refresh, name="gateway-catalog-refresh", daemon=True
+            )
+            self._refresh_thread.start()
+
+    def _background_refresh(self) -> None:
+        try:
+            self.refresh()
+        except Exception as e:
+            logger.warning("Gateway catalog background refresh failed: %s", e)
+            # 失敗時は次のTTLまで再試行を控え、古いカタログを使い続ける
+            with self._lock:
+                self._fetched_at = self._clock()
+
+
+_connection: GatewayConnection | None = None
+_connection_lock = threading.Lock()
+
+
+def get_gateway_connection() -> GatewayConnection:
+    """プロセス共有のGatewayConnectionを返す"""
+    global _connection
+    with _connection_lock:
+        if _connection is None:
+            _connection = GatewayConnection(
+                gateway_url=os.getenv("AGENTCORE_GATEWAY_URL", DEFAULT_GATEWAY_URL),
+                region=os.getenv("AWS_REGION", "ap-northeast-1"),
+                catalog_ttl_seconds=float(
+                    os.getenv("GATEWAY_CATALOG_TTL_SECONDS", str(DEFAULT_CATALOG_TTL_SECONDS))
+                ),
+            )
+        return _connection
@@ -2,47 +2,69 @@
 
 Provides access token retrieval and Google API service builders
 using refresh tokens stored in AWS SSM Parameter Store.
+
+Access tokens are cached in-process until shortly before ``expires_in``
+and refreshed under a lock, so concurrent tool calls share one refresh.
+Built service objects are cached per thread (httplib2 is not thread-safe)
+and rebuilt only when the access token changes. Every HTTP call made through
+them times out after ``GOOGLE_HTTP_TIMEOUT_SECONDS``, so a hung request does
+not hold a worker thread indefinitely. Services are built from the
+trimmed discovery documents vendored under ``discovery/`` (regenerate with
+``scripts/vendor-google-discovery.py``) so no discovery lookup happens at build time.
 """
 
 import json
 import logging
 import os
+import threading
+import time
 import urllib.parse
 import urllib.request
+from functools import lru_cache
 
-import boto3
+import httplib2
 from google.oauth2.credentials import Credentials
-from googleapiclient.discovery import build
+from google_auth_httplib2 import AuthorizedHttp
+from googleapiclient.discovery import build_from_document
+
+from . import secrets_cache
 
 logger = logging.getLogger(__name__)
 
-AWS_REGION = os.getenv("AWS_REGION", "ap-northeast-1")
 SSM_PREFIX = "/tonari/google"
 GOOGLE_TOKEN_ENDPOINT = "https://oauth2.googleapis.com/token"
+CREDENTIAL_KEYS = ("client_id", "client_secret", "refresh_token")
+DISCOVERY_DIR = os.path.join(os.path.dirname(__file__), "discovery")
 
-_ssm_client = None
+# Refresh this many seconds before the token actually expires
+TOKEN_REFRESH_MARGIN_SECONDS = 300
+# Google access tokens are valid for 1 hour unless expires_in says otherwise
+DEFAULT_EXPIRES_IN_SECONDS = 3600
+# Socket timeout for Google API and token requests (below the briefing source timeout)
+GOOGLE_HTTP_TIMEOUT_SECONDS = float(os.getenv("GOOGLE_HTTP_TIMEOUT_SECONDS", "10"))
 
+_token_lock = threading.Lock()
+_access_token: str | None = None
+_token_expires_at = 0.0
 
-def _get_ssm():
-    global _ssm_client
-    if _ssm_client is None:
-        _ssm_client = boto3.client("ssm", region_name=AWS_REGION)
-    return _ssm_client
+_service_cache = threading.local()
 
 
-def _get_ssm_param(name: str) -> str:
-    resp = _get_ssm().get_parameter(
-        Name=f"{SSM_PREFIX}/{name}", WithDecryption=True
-    )
-    return resp["Parameter"]["Value"]
+def _get_credentials() -> dict[str, str]:
+    """Fetch client_id, client_secret and refresh_token in one SSM call."""
+    names = [f"{SSM_PREFIX}/{key}" for key in CREDENTIAL_KEYS]
+    values = secrets_cache.get_parameters(names)
+    return {key: values[f"{SSM_PREFIX}/{key}"] for key in CREDENTIAL_KEYS}
 
 
-def get_access_token() -> str:
-    """Get a Google access token using refresh token from SSM."""
+def _request_access_token() -> tuple[str, int]:
+    """Exchange the refresh token for a new access token.
+
+    Returns:
+        (access_token, expires_in seconds)
+    """
     try:
-        client_id = _get_ssm_param("client_id")
-        client_secret = _get_ssm_param("client_secret")
-        refresh_token = _get_ssm_param("refresh_token")
+        creds = _get_credentials()
     except Exception as e:
         raise RuntimeError(
             "Google認証情報がSSMに設定されていません。"
@@ -50,9 +72,9 @@ def get_access_token() -> str:
         ) from e
 
     data = urllib.parse.urlencode({
-        "client_id": client_id,
-        "client_secret": client_secret,
-        "refresh_token": refresh_token,
+        "client_id": creds["client_id"],
+        "client_secret": creds["client_secret"],
+        "refresh_token": creds["refresh_token"],
         "grant_type": "refresh_token",
     }).encode("utf-8")
 
@@ -63,28 +85,81 @@ def get_access_token() -> str:
     )
 
     try:
-        with urllib.request.urlopen(req) as resp:
+        with urllib.request.urlopen(req, timeout=GOOGLE_HTTP_TIMEOUT_SECONDS) as resp:
             token_data = json.loads(resp.read().decode("utf-8"))
     except urllib.error.HTTPError as e:
         error_body = e.read().decode("utf-8")
+        # The refresh token may have been rotated via the settings screen
+        secrets_cache.invalidate_prefix(f"{SSM_PREFIX}/")
         raise RuntimeError(
             f"Google認証エラー: トークンの更新に失敗しました。"
             f"設定画面から「Google認証を更新」を実行してください。"
             f" ({error_body})"
         ) from e
 
-    return token_data["access_token"]
+    expires_in = int(token_data.get("expires_in", DEFAULT_EXPIRES_IN_SECONDS))
+    return token_data["access_token"], expires_in
+
+
+def get_access_token(force_refresh: bool = False) -> str:
+    """Get a Google access token, refreshing it only when close to expiry."""
+    global _access_token, _token_expires_at
+    with _token_lock:
+        now = time.time()
+        if (
+            not force_refresh
+            and _access_token is not None
+            and now < _token_expires_at - TOKEN_REFRESH_MARGIN_SECONDS
+        ):
+            return _access_token
+
+        token, expires_in = _request_access_token()
+        _access_token = token
+        _token_expires_at = now + expires_in
+        logger.info("Google access token refreshed (expires_in=%ds)", expires_in)
+        return token
+
+
+def invalidate_access_token() -> None:
+    """Drop the cached access token (e.g. after a 401 from Google)."""
+    global _access_token, _token_expires_at
+    with _token_lock:
+        _access_token = None
+        _token_expires_at = 0.0
+
+
+@lru_cache(maxsize=None)
+def _load_discovery_document(api: str, version: str) -> str:
+    """Read a vendored discovery document once per process."""
+    path = os.path.join(DISCOVERY_DIR, f"{api}.{version}.json")
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+
+def _get_service(api: str, version: str):
+    """Return a cached service for this thread, rebuilt when the token changes."""
+    token = get_access_token()
+    services = getattr(_service_cache, "services", None)
+    if services is None:
+        services = _service_cache.services = {}
+    cached = services.get((api, version))
+    if cached is not None and cached[0] == token:
+        return cached[1]
+
+    http = AuthorizedHttp(
+        Credentials(token=token),
+        http=httplib2.Http(timeout=GOOGLE_HTTP_TIMEOUT_SECONDS),
+    )
+    service = build_from_document(_load_discovery_document(api, version), http=http)
+    services[(api, version)] = (token, service)
+    return service
 
 
 def get_calendar_service():
     """Build a Google Calendar API service."""
-    token = get_access_token()
-    credentials = Credentials(token=token)
-    return build("calendar", "v3", credentials=credentials)
+    return _get_service("calendar", "v3")
 
 
 def get_gmail_service():
     """Build a Gmail API service."""
-    token = get_access_token()
-    credentials = Credentials(token=token)
-    return build("gmail", "v1", credentials=credentials)
+    return _get_service("gmail", "v1")
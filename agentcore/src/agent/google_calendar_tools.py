@@ -11,7 +11,7 @@ from datetime import datetime, timedelta, timezone
 from googleapiclient.errors import HttpError
 from strands import tool
 
-from .google_auth import get_calendar_service
+from .google_auth import get_calendar_service, invalidate_access_token
 
 logger = logging.getLogger(__name__)
 
@@ -24,6 +24,8 @@ def _handle_google_error(e: HttpError) -> str:
     """Convert Google API errors to user-friendly messages."""
     status = e.resp.status if hasattr(e, "resp") else 0
     if status == 401:
+        # Force a token refresh on the next call
+        invalidate_access_token()
         return json.dumps({"success": False, "message": "カレンダーにアクセスできません。認証情報を確認してください。"})
     if status == 404:
         return json.dumps({"success": False, "message": "指定された予定が見つかりません。"})
@@ -16,7 +16,7 @@ from html.parser import HTMLParser
 from googleapiclient.errors import HttpError
 from strands import tool
 
-from .google_auth import get_gmail_service
+from .google_auth import get_gmail_service, invalidate_access_token
 
 logger = logging.getLogger(__name__)
 
@@ -75,6 +75,8 @@ def _handle_gmail_error(e: HttpError) -> str:
     """Convert Gmail API errors to user-friendly messages."""
     status = e.resp.status if hasattr(e, "resp") else 0
     if status == 401:
+        # Force a token refresh on the next call
+        invalidate_access_token()
         return json.dumps({"success": False, "message": "Gmail認証が期限切れです。再認証が必要です。"})
     if status == 403:
         return json.dumps({"success": False, "message": "Gmailへのアクセス権限がありません。"})
@@ -2,15 +2,23 @@
 
 Provides API key retrieval and Notion client builder
 using AgentCore Identity's API Key Credential Provider.
+
+API keys are cached per workload access token for API_KEY_CACHE_TTL_SECONDS,
+and Notion clients are reused per API key so their httpx connection pools
+survive across tool calls. The Identity call itself runs on the shared
+background loop in async_bridge.
 """
 
-import asyncio
+import hashlib
 import logging
 import os
 import threading
+import time
 
 from notion_client import Client
 
+from .async_bridge import run_sync
+
 logger = logging.getLogger(__name__)
 
 CREDENTIAL_PROVIDER_NAME = os.getenv(
@@ -18,35 +26,19 @@ CREDENTIAL_PROVIDER_NAME = os.getenv(
     "notion_secrets",
 )
 AWS_REGION = os.getenv("AWS_REGION", "ap-northeast-1")
+API_KEY_CACHE_TTL_SECONDS = float(os.getenv("NOTION_API_KEY_CACHE_TTL_SECONDS", "900"))
+# Workload tokens rotate per session; keep only a handful of entries
+API_KEY_CACHE_MAX_ENTRIES = 16
 
-
-def _run_async(coro):
-    """Run an async coroutine from sync context, handling existing event loops."""
-    try:
-        asyncio.get_running_loop()
-        result = [None]
-        exc = [None]
-
-        def _run():
-            try:
-                result[0] = asyncio.run(coro)
-            except Exception as e:
-                exc[0] = e
-
-        t = threading.Thread(target=_run)
-        t.start()
-        t.join()
-        if exc[0]:
-            raise exc[0]
-        return result[0]
-    except RuntimeError:
-        return asyncio.run(coro)
+_lock = threading.Lock()
+_identity_client = None
+# sha256(workload token) -> (expires_at, api_key)
+_api_keys: dict[str, tuple[float, str]] = {}
+_client: tuple[str, Client] | None = None
 
 
-def get_api_key() -> str:
-    """Get a Notion API key via AgentCore Identity API Key Credential Provider."""
+def _get_workload_token() -> str:
     from bedrock_agentcore.runtime import BedrockAgentCoreContext
-    from bedrock_agentcore.services.identity import IdentityClient
 
     workload_token = BedrockAgentCoreContext.get_workload_access_token()
     if not workload_token:
@@ -54,27 +46,91 @@ def get_api_key() -> str:
             "No workload access token available. "
             "Ensure the agent is running inside AgentCore Runtime."
         )
+    return workload_token
 
-    client = IdentityClient(region=AWS_REGION)
 
-    async def _fetch():
-        return await client.get_api_key(
-            provider_name=CREDENTIAL_PROVIDER_NAME,
-            agent_identity_token=workload_token,
-        )
+def _get_identity_client():
+    global _identity_client
+    with _lock:
+        if _identity_client is None:
+            from bedrock_agentcore.services.identity import IdentityClient
 
-    try:
-        api_key = _run_async(_fetch())
+            _identity_client = IdentityClient(region=AWS_REGION)
+        return _identity_client
+
+
+def _cache_key(workload_token: str) -> str:
+    return hashlib.sha256(workload_token.encode("utf-8")).hexdigest()
+
+
+def _cached_api_key(key: str) -> str | None:
+    with _lock:
+        entry = _api_keys.get(key)
+        if entry is not None and time.monotonic() < entry[0]:
+            return entry[1]
+    return None
+
+
+def _store_api_key(key: str, api_key: str) -> None:
+    now = time.monotonic()
+    with _lock:
+        for k in [k for k, (expires_at, _) in _api_keys.items() if expires_at <= now]:
+            del _api_keys[k]
+        while len(_api_keys) >= API_KEY_CACHE_MAX_ENTRIES:
+            del _api_keys[next(iter(_api_keys))]
+        _api_keys[key] = (now + API_KEY_CACHE_TTL_SECONDS, api_key)
+
+
+def _auth_error(e: Exception) -> RuntimeError:
+    error_detail = f"{type(e).__name__}: {e}"
+    return RuntimeError(
+        f"Notion認証エラー: {error_detail}. "
+        f"provider={CREDENTIAL_PROVIDER_NAME}, region={AWS_REGION}"
+    )
+
+
+async def _fetch_api_key(workload_token: str) -> str:
+    return await _get_identity_client().get_api_key(
+        provider_name=CREDENTIAL_PROVIDER_NAME,
+        agent_identity_token=workload_token,
+    )
+
+
+def get_api_key() -> str:
+    """Get a Notion API key via AgentCore Identity API Key Credential Provider."""
+    workload_token = _get_workload_token()
+    key = _cache_key(workload_token)
+    api_key = _cached_api_key(key)
+    if api_key is not None:
         return api_key
+
+    try:
+        api_key = run_sync(_fetch_api_key(workload_token))
     except Exception as e:
-        error_detail = f"{type(e).__name__}: {e}"
-        raise RuntimeError(
-            f"Notion認証エラー: {error_detail}. "
-            f"provider={CREDENTIAL_PROVIDER_NAME}, region={AWS_REGION}"
-        ) from e
+        raise _auth_error(e) from e
+    _store_api_key(key, api_key)
+    return api_key
+
+
+def invalidate_api_key() -> None:
+    """Drop cached API keys and clients (e.g. after a 401 from Notion).
+
+    The previous client is not closed: another thread may still be using it,
+    and its connection pool is released when it is garbage-collected.
+    """
+    global _client
+    with _lock:
+        _api_keys.clear()
+        _client = None
 
 
 def get_notion_client() -> Client:
-    """Build a Notion client using AgentCore Identity API key."""
+    """Get a Notion client for the current API key, reusing its connection pool."""
+    global _client
     api_key = get_api_key()
-    return Client(auth=api_key)
+    with _lock:
+        if _client is not None and _client[0] == api_key:
+            return _client[1]
+        # The old client may still be in use on another thread; let GC release it
+        _client = (api_key, Client(auth=api_key))
+        return _client[1]
@@ -10,7 +10,7 @@ import logging
 from notion_client import APIResponseError
 from strands import tool
 
-from .notion_auth import get_notion_client
+from .notion_auth import get_notion_client, invalidate_api_key
 
 logger = logging.getLogger(__name__)
 
@@ -122,6 +122,8 @@ def _handle_notion_error(e: APIResponseError) -> str:
     """Convert Notion API errors to user-friendly messages."""
     status = getattr(e, "status", 0)
     if status == 401:
+        # Re-fetch the API key on the next call
+        invalidate_api_key()
         return json.dumps({"success": False, "message": "Notion認証が無効です。再認証が必要です。"})
     if status == 403:
         return json.dumps({"success": False, "message": "Notionへのアクセス権限がありません。"})
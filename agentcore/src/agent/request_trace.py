@@ -0,0 +1,321 @@
+"""リクエストトレースモジュール
+
+invoke 1回ごとの処理時間とトークン使用量を計測し、リクエスト終了時にサマリーを1件出力する。
+
+- span(): OpenTelemetry のスパンを開始し（opentelemetry-instrument 下ではADOT経由でエクスポートされる）、
+  同じ区間を現在のリクエストトレースにも記録する
+- TraceHooks: Strands のフックでAgent呼び出し・モデル呼び出し・ツール呼び出しを計測する。
+  プール内のAgentで共有するため、記録先は ContextVar の現在のトレースから引く
+- サマリーはログ（JSON）に出力し、REQUEST_TRACE_JSONL_PATH が設定されていれば JSON Lines にも追記する
+
+モデル・ツール単位のOpenTelemetryスパンはStrandsが出力するため、ここではサマリーへの記録だけを行う。
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Iterator, Protocol
+
+from opentelemetry import context as otel_context
+from opentelemetry import trace as otel_trace
+from strands.hooks import (
+    AfterInvocationEvent,
+    AfterModelCallEvent,
+    AfterToolCallEvent,
+    BeforeInvocationEvent,
+    BeforeModelCallEvent,
+    BeforeToolCallEvent,
+    HookProvider,
+    HookRegistry,
+)
+
+logger = logging.getLogger(__name__)
+
+_tracer = otel_trace.get_tracer(__name__)
+
+USAGE_KEYS = ("inputTokens", "outputTokens", "totalTokens", "cacheReadInputTokens", "cacheWriteInputTokens")
+
+_current: ContextVar["RequestTrace | None"] = ContextVar("request_trace", default=None)
+
+
+def _now_ms() -> float:
+    return time.monotonic() * 1000
+
+
+class TraceExporter(Protocol):
+    def export(self, record: dict) -> None: ...
+
+
+class LoggingExporter:
+    """サマリーを1行のJSONとしてログに出力する（CloudWatch Logs Insightsで集計できる）"""
+
+    def export(self, record: dict) -> None:
+        logger.info("request_trace %s", json.dumps(record, ensure_ascii=False))
+
+
+class JsonLinesExporter:
+    """サマリーをJSON Linesファイルに追記する（テスト・ローカル計測用）"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, record: dict) -> None:
+        line = json.dumps(record, ensure_ascii=False)
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+
+def default_exporters() -> list[TraceExporter]:
+    exporters: list[TraceExporter] = [LoggingExporter()]
+    path = os.getenv("REQUEST_TRACE_JSONL_PATH")
+    if path:
+        exporters.append(JsonLinesExporter(path))
+    return exporters
+
+
+class _Span:
+    """計測区間（OpenTelemetryスパンとサマリー上の記録を兼ねる）"""
+
+    def __init__(self, record: dict | None, otel_span):
+        self._record = record
+        self._otel_span = otel_span
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        if self._record is not None:
+            self._record[key] = value
+        self._otel_span.set_attribute(f"tonari.{key}", value)
+
+
+class RequestTrace:
+    """1リクエスト分の計測結果
+
+    区間（spans）、最初のテキストまでの時間、Agentごとのトークン使用量を集め、
+    finish() でサマリーをエクスポートする。
+    """
+
+    def __init__(self, exporters: list[TraceExporter] | None = None, **attributes: Any):
+        self.request_id = uuid.uuid4().hex
+        self.attributes = attributes
+        self.exporters = default_exporters() if exporters is None else exporters
+        self.spans: list[dict] = []
+        self.usage = dict.fromkeys(USAGE_KEYS, 0)
+        self.first_token_ms: float | None = None
+        self.error: str | None = None
+        self._started = _now_ms()
+        self._lock = threading.Lock()
+        # 進行中のAgent呼び出し・モデル呼び出し・ツール呼び出し
+        self._pending: dict[Any, tuple[float, Any]] = {}
+        self._root = _tracer.start_span(
+            "tonari.invoke",
+            attributes={"tonari.request_id": self.request_id, **_otel_attributes(attributes)},
+        )
+
+    def offset_ms(self) -> float:
+        return round(_now_ms() - self._started, 1)
+
+    @contextmanager
+    def activate(self) -> Iterator["RequestTrace"]:
+        """このトレースを現在のリクエストとし、OpenTelemetryの親スパンにする"""
+        token = _current.set(self)
+        otel_token = otel_context.attach(otel_trace.set_span_in_context(self._root))
+        try:
+            yield self
+        finally:
+            otel_context.detach(otel_token)
+            _current.reset(token)
+
+    def add_span(self, name: str, start_ms: float, **attributes: Any) -> dict:
+        record = {
+            "name": name,
+            "start_ms": round(start_ms - self._started, 1),
+            "duration_ms": round(_now_ms() - start_ms, 1),
+            **attributes,
+        }
+        with self._lock:
+            self.spans.append(record)
+        return record
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[_Span]:
+        start = _now_ms()
+        record = {"name": name}
+        with _tracer.start_as_current_span(name, attributes=_otel_attributes(attributes)) as otel_span:
+            span = _Span(record, otel_span)
+            try:
+                yield span
+            except Exception as e:
+                record["error"] = str(e)
+                raise
+            finally:
+                extra = {k: v for k, v in record.items() if k != "name"}
+                self.add_span(name, start, **{**attributes, **extra})
+
+    def mark_first_token(self) -> None:
+        if self.first_token_ms is None:
+            self.first_token_ms = self.offset_ms()
+
+    def add_usage(self, usage: dict) -> None:
+        with self._lock:
+            for key in USAGE_KEYS:
+                self.usage[key] += usage.get(key, 0)
+
+    def start(self, key: Any, payload: Any = None) -> None:
+        with self._lock:
+            self._pending[key] = (_now_ms(), payload)
+
+    def stop(self, key: Any) -> tuple[float, Any] | None:
+        with self._lock:
+            return self._pending.pop(key, None)
+
+    def summary(self) -> dict:
+        def _sum(prefix: str) -> float:
+            return round(sum(s["duration_ms"] for s in self.spans if s["name"].startswith(prefix)), 1)
+
+        return {
+            "request_id": self.request_id,
+            **self.attributes,
+            "total_ms": self.offset_ms(),
+            "first_token_ms": self.first_token_ms,
+            "model_calls": sum(1 for s in self.spans if s["name"] == "model.call"),
+            "model_ms": _sum("model.call"),
+            "tool_calls": sum(1 for s in self.spans if s["name"].startswith("tool.")),
+            "tool_ms": _sum("tool."),
+            "usage": dict(self.usage),
+            "error": self.error,
+            "spans": list(self.spans),
+        }
+
+    def finish(self) -> dict:
+        """ルートスパンを閉じ、サマリーを全エクスポーターに出力する"""
+        record = self.summary()
+        for key in ("total_ms", "first_token_ms", "model_calls", "model_ms", "tool_calls", "tool_ms"):
+            if record[key] is not None:
+                self._root.set_attribute(f"tonari.{key}", record[key])
+        for key, value in record["usage"].items():
+            self._root.set_attribute(f"tonari.usage.{key}", value)
+        if self.error:
+            self._root.set_status(otel_trace.Status(otel_trace.StatusCode.ERROR, self.error))
+        self._root.end()
+        for exporter in self.exporters:
+            try:
+                exporter.export(record)
+            except Exception:
+                logger.warning("Failed to export request trace", exc_info=True)
+        return record
+
+
+def _otel_attributes(attributes: dict) -> dict:
+    return {f"tonari.{k}": v for k, v in attributes.items() if isinstance(v, (str, bool, int, float))}
+
+
+def current() -> RequestTrace | None:
+    return _current.get()
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[_Span]:
+    """現在のリクエストトレースに区間を記録する（トレース外ではOpenTelemetryスパンのみ）"""
+    trace = _current.get()
+    if trace is None:
+        with _tracer.start_as_current_span(name, attributes=_otel_attributes(attributes)) as otel_span:
+            yield _Span(None, otel_span)
+        return
+    with trace.span(name, **attributes) as s:
+        yield s
+
+
+def _agent_name(agent) -> str:
+    return getattr(agent, "name", None) or "agent"
+
+
+def _usage_snapshot(agent) -> dict:
+    metrics = getattr(agent, "event_loop_metrics", None)
+    usage = getattr(metrics, "accumulated_usage", None) or {}
+    return {key: usage.get(key, 0) for key in USAGE_KEYS}
+
+
+class TraceHooks(HookProvider):
+    """Agent・モデル・ツールの呼び出しを現在のリクエストトレースに記録するフック
+
+    - agent.invoke: Agent呼び出し全体（トークン使用量はこの呼び出し分の差分）
+    - agent.prepare: 呼び出し開始から最初のモデル呼び出しまで（LTM検索・履歴保存を含む）
+    - model.call: モデル呼び出し1回
+    - tool.<name>: ツール呼び出し1回（サブエージェントツールを含む）
+    """
+
+    def register_hooks(self, registry: HookRegistry, **kwargs: Any) -> None:
+        registry.add_callback(BeforeInvocationEvent, self._before_invocation)
+        registry.add_callback(AfterInvocationEvent, self._after_invocation)
+        registry.add_callback(BeforeModelCallEvent, self._before_model_call)
+        registry.add_callback(AfterModelCallEvent, self._after_model_call)
+        registry.add_callback(BeforeToolCallEvent, self._before_tool_call)
+        registry.add_callback(AfterToolCallEvent, self._after_tool_call)
+
+    def _before_invocation(self, event: BeforeInvocationEvent) -> None:
+        trace = _current.get()
+        if trace is not None:
+            trace.start(("invoke", id(event.agent)), _usage_snapshot(event.agent))
+            trace.start(("prepare", id(event.agent)))
+
+    def _after_invocation(self, event: AfterInvocationEvent) -> None:
+        trace = _current.get()
+        if trace is None:
+            return
+        trace.stop(("prepare", id(event.agent)))
+        started = trace.stop(("invoke", id(event.agent)))
+        if started is None:
+            return
+        start_ms, before = started
+        after = _usage_snapshot(event.agent)
+        usage = {key: after[key] - before[key] for key in USAGE_KEYS}
+        trace.add_usage(usage)
+        trace.add_span("agent.invoke", start_ms, agent=_agent_name(event.agent), usage=usage)
+
+    def _before_model_call(self, event: BeforeModelCallEvent) -> None:
+        trace = _current.get()
+        if trace is None:
+            return
+        prepared = trace.stop(("prepare", id(event.agent)))
+        if prepared is not None:
+            trace.add_span("agent.prepare", prepared[0], agent=_agent_name(event.agent))
+        trace.start(("model", id(event.agent)))
+
+    def _after_model_call(self, event: AfterModelCallEvent) -> None:
+        trace = _current.get()
+        if trace is None:
+            return
+        started = trace.stop(("model", id(event.agent)))
+        if started is not None:
+            attributes = {"agent": _agent_name(event.agent)}
+            if event.exception is not None:
+                attributes["error"] = str(event.exception)
+            trace.add_span("model.call", started[0], **attributes)
+
+    def _before_tool_call(self, event: BeforeToolCallEvent) -> None:
+        trace = _current.get()
+        if trace is not None:
+            trace.start(("tool", event.tool_use["toolUseId"]))
+
+    def _after_tool_call(self, event: AfterToolCallEvent) -> None:
+        trace = _current.get()
+        if trace is None:
+            return
+        started = trace.stop(("tool", event.tool_use["toolUseId"]))
+        if started is not None:
+            status = event.result.get("status", "success") if isinstance(event.result, dict) else "success"
+            trace.add_span(
+                f"tool.{event.tool_use['name']}",
+                started[0],
+                agent=_agent_name(event.agent),
+                status=status,
+            )
+
+
+# 全Agentで共有するフック（状態は持たず、記録先は現在のリクエストトレース）
+trace_hooks = TraceHooks()
@@ -2,18 +2,34 @@
 
 MCPツールをドメイン別に分割し、各ドメインの専門サブエージェントを@toolとして提供する。
 メインエージェントは必要時にサブエージェントをツールとして呼び出す。
+サブエージェントはレジストリで使い回し、呼び出しごとに会話履歴だけをリセットする。
+ツールは非同期関数で、同じターンの複数呼び出しは並行に走る。
+内部のツール呼び出しは tool_progress 経由で進捗イベントとして親エージェントのストリームに流れる。
+actor_id とサブエージェント用ツールは呼び出し元リクエストの invocation_state から受け取る
+（同時に走る別ユーザーのリクエストと共有しないよう、モジュール変数には持たない）。
 """
 
+import asyncio
 import logging
 import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Iterator
 
-from strands import Agent, tool
+from strands import Agent, ToolContext, tool
+from strands.telemetry.metrics import EventLoopMetrics
 
+from .briefing import build_briefing_sources, format_briefing_message, gather_sources
 from .google_calendar_tools import CALENDAR_TOOLS
 from .google_gmail_tools import GMAIL_TOOLS
 from .notion_tools import NOTION_TOOLS
 from .twitter_tools import TWITTER_TOOLS
+from .tool_progress import callback_handler as progress_callback_handler
+from .tool_progress import child_tool, track_sub_agent
+from .request_trace import trace_hooks
 from .tonari_agent import _create_model
 from .sub_agent_prompts import (
     BRIEFING_AGENT_PROMPT,
@@ -28,11 +44,16 @@ from .sub_agent_prompts import (
 
 logger = logging.getLogger(__name__)
 
-# サブエージェント用ツール（init_sub_agent_toolsで設定）
-_task_tools: list = []
-_diary_tools: list = []
-_main_tools: list = []
-_actor_id: str = ""
+# invocation_state のキー（split_mcp_tools の結果）
+SUB_AGENT_TOOLS_STATE_KEY = "sub_agent_tools"
+
+# アイドルのままこの秒数が過ぎたサブエージェントは破棄する
+SUB_AGENT_IDLE_TTL_SECONDS = float(os.getenv("SUB_AGENT_IDLE_TTL_SECONDS", str(30 * 60)))
+# この回数使ったサブエージェントは返却時に破棄する（Agent内部の状態が際限なく育たないように）
+SUB_AGENT_MAX_USES = int(os.getenv("SUB_AGENT_MAX_USES", "50"))
+
+# briefing_agent のソース並列取得を表す進捗上のツール名
+BRIEFING_SOURCES_TOOL = "briefing_sources"
 
 # ツール名プレフィックス → サブエージェントバケット
 SUB_AGENT_PREFIXES = {
@@ -89,191 +110,300 @@ def split_mcp_tools(all_tools: list) -> dict[str, list]:
     return result
 
 
-def init_sub_agent_tools(tool_map: dict[str, list], actor_id: str = "") -> None:
-    """split_mcp_toolsの結果とactor_idをモジュール変数にセットする（起動時1回）"""
-    global _task_tools
-    global _diary_tools, _main_tools, _actor_id
-    _task_tools = tool_map.get("task", [])
-    _diary_tools = tool_map.get("diary", [])
-    _main_tools = tool_map.get("main", [])
-    _actor_id = actor_id
+@dataclass(frozen=True)
+class Caller:
+    """サブエージェントツールを呼び出したリクエストのオーナーとツール"""
+
+    actor_id: str = ""
+    tool_map: dict[str, list] = field(default_factory=dict)
+
+
+def _caller(tool_context: ToolContext | None) -> Caller:
+    """ToolContext の invocation_state から呼び出し元を取り出す"""
+    state = tool_context.invocation_state if tool_context is not None else {}
+    return Caller(
+        actor_id=state.get("actor_id", ""),
+        tool_map=state.get(SUB_AGENT_TOOLS_STATE_KEY) or {},
+    )
+
+
+def _tool_signature(tools: list) -> tuple:
+    return tuple(t.tool_name for t in tools)
+
+
+@dataclass(frozen=True)
+class SubAgentSpec:
+    """サブエージェントの構成（システムプロンプトとツール）"""
+
+    build_prompt: Callable[[str], str]
+    # split_mcp_tools の結果からこのドメインのツールを選ぶ
+    tools: Callable[[dict[str, list]], list]
+    with_datetime: bool = True
+    per_actor: bool = False
+
+
+@dataclass
+class _IdleAgent:
+    agent: Agent
+    uses: int
+    returned_at: float
+
 
+class SubAgentRegistry:
+    """ドメイン別サブエージェントの使い回しレジストリ
 
-@tool
-def task_agent(request: str) -> str:
+    (ドメイン名, actor_id, ツール構成) ごとにアイドル状態のAgentを保持し、
+    同時呼び出しがあれば追加で構築する（同一Agentは同時に1呼び出しのみ）。
+    返却時に会話履歴とメトリクスをリセットするため、モデル・ツール・システムプロンプトは再構築しない。
+    アイドルTTLを過ぎたAgentと、max_uses 回使ったAgentは破棄する。
+    """
+
+    def __init__(
+        self,
+        specs: dict[str, SubAgentSpec],
+        max_idle_per_key: int = 2,
+        idle_ttl_seconds: float = SUB_AGENT_IDLE_TTL_SECONDS,
+        max_uses: int = SUB_AGENT_MAX_USES,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._specs = specs
+        self._max_idle_per_key = max_idle_per_key
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self.max_uses = max(1, max_uses)
+        self._clock = clock
+        self._idle: dict[tuple, list[_IdleAgent]] = {}
+        self._lock = threading.Lock()
+
+    def spec(self, name: str) -> SubAgentSpec:
+        return self._specs[name]
+
+    @contextmanager
+    def acquire(
+        self, name: str, actor_id: str = "", tool_map: dict[str, list] | None = None
+    ) -> Iterator[Agent]:
+        """サブエージェントを借り出し、終了時に履歴をリセットして返却する"""
+        spec = self._specs[name]
+        tools = spec.tools(tool_map or {})
+        key = (name, actor_id if spec.per_actor else "", _tool_signature(tools))
+        with self._lock:
+            self._evict_expired()
+            idle = self._idle.get(key)
+            entry = idle.pop() if idle else None
+            if idle is not None and not idle:
+                del self._idle[key]
+        if entry is not None:
+            agent, uses = entry.agent, entry.uses
+        else:
+            uses = 0
+            agent = Agent(
+                name=f"{name}_agent",
+                model=_create_sub_agent_model(),
+                system_prompt=spec.build_prompt(actor_id),
+                tools=tools,
+                callback_handler=progress_callback_handler,
+                hooks=[trace_hooks],
+            )
+            logger.info("SubAgentRegistry: built %s agent", name)
+        try:
+            yield agent
+        finally:
+            agent.messages = []
+            # traces や agent_invocations は呼び出しごとに増えるため、履歴と一緒に捨てる
+            agent.event_loop_metrics = EventLoopMetrics()
+            uses += 1
+            if uses >= self.max_uses:
+                logger.info("SubAgentRegistry: dropped %s agent after %d uses", name, uses)
+            else:
+                with self._lock:
+                    idle = self._idle.setdefault(key, [])
+                    if len(idle) < self._max_idle_per_key:
+                        idle.append(_IdleAgent(agent, uses, self._clock()))
+
+    def clear(self) -> None:
+        """構築済みのサブエージェントをすべて破棄する"""
+        with self._lock:
+            self._idle.clear()
+
+    def idle_count(self) -> int:
+        with self._lock:
+            return sum(len(idle) for idle in self._idle.values())
+
+    def _evict_expired(self) -> None:
+        """self._lock 保持中に呼ぶ。アイドルTTLを過ぎたAgentと空になったキーを取り除く"""
+        if self.idle_ttl_seconds <= 0:
+            return
+        now = self._clock()
+        for key in list(self._idle):
+            idle = [e for e in self._idle[key] if now - e.returned_at <= self.idle_ttl_seconds]
+            if idle:
+                self._idle[key] = idle
+            else:
+                del self._idle[key]
+
+
+def _with_datetime_header(request: str) -> str:
+    """現在日時をユーザーメッセージ側に付与する（システムプロンプトはキャッシュ可能なまま保つ）"""
+    return f"現在日時: {_current_datetime_str()}（JST）\n\n{request}"
+
+
+async def _run_sub_agent(name: str, request: str, caller: Caller) -> str:
+    """レジストリからサブエージェントを借りて実行する
+
+    内部のツール呼び出しとトークン使用量は、Agentのcallback_handlerから
+    現在のコンテキストの進捗（track_sub_agent）に送られる。
+    """
+    spec = _registry.spec(name)
+    message = _with_datetime_header(request) if spec.with_datetime else request
+    with _registry.acquire(name, caller.actor_id, caller.tool_map) as agent:
+        result = await agent.invoke_async(message)
+    return str(result)
+
+
+async def _run_briefing(request: str, caller: Caller) -> str:
+    """各ソースを並列取得し、要約だけをサブエージェントに任せる"""
+    now = datetime.now(JST)
+    sources = build_briefing_sources(
+        now, caller.actor_id, caller.tool_map.get("task", []), caller.tool_map.get("main", [])
+    )
+    with child_tool(BRIEFING_SOURCES_TOOL):
+        # ソース取得はスレッドプールで待つため、イベントループは塞がない
+        results = await asyncio.to_thread(gather_sources, sources)
+    return await _run_sub_agent("briefing", format_briefing_message(request, now, results), caller)
+
+
+async def _run_tracked(tool_name: str, error_label: str, run: Callable[[], Awaitable[str]]) -> str:
+    """進捗を追跡しながら実行し、例外はエラーメッセージに変換する"""
+    with track_sub_agent(tool_name):
+        try:
+            return await run()
+        except Exception as e:
+            logger.exception("%s error", tool_name)
+            return f"{error_label}でエラーが発生しました: {e}"
+
+
+@tool(context=True)
+async def task_agent(request: str, tool_context: ToolContext | None = None) -> str:
     """タスク管理のサブエージェント。タスクの一覧取得、追加、完了、更新を行う。
 
     Args:
         request: オーナーのタスクに関するリクエスト（例: 「タスク一覧を見せて」「買い物をタスクに追加して」）
     """
-    try:
-        prompt = f"現在日時: {_current_datetime_str()}（JST）\n\n{TASK_AGENT_PROMPT}\n\n## オーナー情報\nuser_id: {_actor_id}"
-        agent = Agent(
-            model=_create_sub_agent_model(),
-            system_prompt=prompt,
-            tools=_task_tools,
-            callback_handler=None,
-        )
-        result = agent(request)
-        return str(result)
-    except Exception as e:
-        logger.exception("task_agent error")
-        return f"タスク操作でエラーが発生しました: {e}"
+    caller = _caller(tool_context)
+    return await _run_tracked("task_agent", "タスク操作", lambda: _run_sub_agent("task", request, caller))
 
 
-@tool
-def calendar_agent(request: str) -> str:
+@tool(context=True)
+async def calendar_agent(request: str, tool_context: ToolContext | None = None) -> str:
     """Googleカレンダーのサブエージェント。予定の一覧取得、空き確認、作成、更新、削除、候補日検索を行う。
 
     Args:
         request: オーナーのカレンダーに関するリクエスト（例: 「今日の予定は？」「明日14時に会議を入れて」）
     """
-    try:
-        prompt = f"現在日時: {_current_datetime_str()}（JST）\n\n{CALENDAR_AGENT_PROMPT}"
-        agent = Agent(
-            model=_create_sub_agent_model(),
-            system_prompt=prompt,
-            tools=CALENDAR_TOOLS,
-            callback_handler=None,
-        )
-        result = agent(request)
-        return str(result)
-    except Exception as e:
-        logger.exception("calendar_agent error")
-        return f"カレンダー操作でエラーが発生しました: {e}"
+    caller = _caller(tool_context)
+    return await _run_tracked("calendar_agent", "カレンダー操作", lambda: _run_sub_agent("calendar", request, caller))
 
 
-@tool
-def gmail_agent(request: str) -> str:
+@tool(context=True)
+async def gmail_agent(request: str, tool_context: ToolContext | None = None) -> str:
     """Gmailのサブエージェント。メールの検索、取得、下書き作成、アーカイブを行う。
 
     Args:
         request: オーナーのメールに関するリクエスト（例: 「未読メールを確認して」「〇〇さんにメールの下書きを作って」）
     """
-    try:
-        prompt = f"現在日時: {_current_datetime_str()}（JST）\n\n{GMAIL_AGENT_PROMPT}"
-        agent = Agent(
-            model=_create_sub_agent_model(),
-            system_prompt=prompt,
-            tools=GMAIL_TOOLS,
-            callback_handler=None,
-        )
-        result = agent(request)
-        return str(result)
-    except Exception as e:
-        logger.exception("gmail_agent error")
-        return f"メール操作でエラーが発生しました: {e}"
+    caller = _caller(tool_context)
+    return await _run_tracked("gmail_agent", "メール操作", lambda: _run_sub_agent("gmail", request, caller))
 
 
-@tool
-def notion_agent(request: str) -> str:
+@tool(context=True)
+async def notion_agent(request: str, tool_context: ToolContext | None = None) -> str:
     """Notionのサブエージェント。ページの検索、取得、作成、更新、データベース操作を行う。
 
     Args:
         request: オーナーのNotionに関するリクエスト（例: 「メモして」「ブックマークして」「プロダクトアイデアに追加して」）
     """
-    try:
-        agent = Agent(
-            model=_create_sub_agent_model(),
-            system_prompt=NOTION_AGENT_PROMPT,
-            tools=NOTION_TOOLS,
-            callback_handler=None,
-        )
-        result = agent(request)
-        return str(result)
-    except Exception as e:
-        logger.exception("notion_agent error")
-        return f"Notion操作でエラーが発生しました: {e}"
+    caller = _caller(tool_context)
+    return await _run_tracked("notion_agent", "Notion操作", lambda: _run_sub_agent("notion", request, caller))
 
 
-@tool
-def briefing_agent(request: str) -> str:
+@tool(context=True)
+async def briefing_agent(request: str, tool_context: ToolContext | None = None) -> str:
     """ブリーフィングのサブエージェント。予定・メール・タスク・天気・支出をまとめて報告する。
 
     Args:
         request: ブリーフィングのリクエスト（日時情報を含めて渡すこと）
     """
-    try:
-        # ブリーフィングはcalendar/gmail/taskサブエージェント + DateTool + TavilySearchが必要
-        briefing_tools = (
-            CALENDAR_TOOLS + GMAIL_TOOLS + _task_tools
-            + [t for t in _main_tools if t.tool_name.startswith(("DateTool", "TavilySearch"))]
-            + [task_agent, calendar_agent, gmail_agent]
-        )
-        prompt = f"現在日時: {_current_datetime_str()}（JST）\n\n{BRIEFING_AGENT_PROMPT}"
-        agent = Agent(
-            model=_create_sub_agent_model(),
-            system_prompt=prompt,
-            tools=briefing_tools,
-            callback_handler=None,
-        )
-        result = agent(request)
-        return str(result)
-    except Exception as e:
-        logger.exception("briefing_agent error")
-        return f"ブリーフィングでエラーが発生しました: {e}"
+    caller = _caller(tool_context)
+    return await _run_tracked("briefing_agent", "ブリーフィング", lambda: _run_briefing(request, caller))
 
 
-@tool
-def diary_agent(request: str) -> str:
+@tool(context=True)
+async def diary_agent(request: str, tool_context: ToolContext | None = None) -> str:
     """日記のサブエージェント。オーナーの一日をヒアリングして日記を作成・保存する。過去の日記の取得も行う。
 
     Args:
         request: オーナーの日記に関するリクエスト（例: 「日記を書きたい」「最近の日記を見せて」）
     """
-    try:
-        prompt = f"現在日時: {_current_datetime_str()}（JST）\n\n{DIARY_AGENT_PROMPT}"
-        agent = Agent(
-            model=_create_sub_agent_model(),
-            system_prompt=prompt,
-            tools=_diary_tools,
-            callback_handler=None,
-        )
-        result = agent(request)
-        return str(result)
-    except Exception as e:
-        logger.exception("diary_agent error")
-        return f"日記操作でエラーが発生しました: {e}"
+    caller = _caller(tool_context)
+    return await _run_tracked("diary_agent", "日記操作", lambda: _run_sub_agent("diary", request, caller))
 
 
-@tool
-def intro_agent(request: str) -> str:
+@tool(context=True)
+async def intro_agent(request: str, tool_context: ToolContext | None = None) -> str:
     """自己紹介のサブエージェント。TONaRiの自己紹介を生成する。
 
     Args:
         request: 自己紹介のリクエスト（例: 「自己紹介して」「あなたは誰？」）
     """
-    try:
-        agent = Agent(
-            model=_create_sub_agent_model(),
-            system_prompt=INTRO_AGENT_PROMPT,
-            tools=[],
-            callback_handler=None,
-        )
-        result = agent(request)
-        return str(result)
-    except Exception as e:
-        logger.exception("intro_agent error")
-        return f"自己紹介でエラーが発生しました: {e}"
+    caller = _caller(tool_context)
+    return await _run_tracked("intro_agent", "自己紹介", lambda: _run_sub_agent("intro", request, caller))
 
 
-@tool
-def twitter_agent(request: str) -> str:
+@tool(context=True)
+async def twitter_agent(request: str, tool_context: ToolContext | None = None) -> str:
     """Twitterのサブエージェント。ツイートの取得・閲覧・投稿を行う。
 
     Args:
         request: Twitterに関するリクエスト（例: 「最近のツイートを見せて」「ツイートして」）
     """
-    try:
-        prompt = f"現在日時: {_current_datetime_str()}（JST）\n\n{TWITTER_AGENT_PROMPT}"
-        agent = Agent(
-            model=_create_sub_agent_model(),
-            system_prompt=prompt,
-            tools=TWITTER_TOOLS,
-            callback_handler=None,
-        )
-        result = agent(request)
-        return str(result)
-    except Exception as e:
-        logger.exception("twitter_agent error")
-        return f"Twitter操作でエラーが発生しました: {e}"
+    caller = _caller(tool_context)
+    return await _run_tracked("twitter_agent", "Twitter操作", lambda: _run_sub_agent("twitter", request, caller))
+
+
+_registry = SubAgentRegistry({
+    "task": SubAgentSpec(
+        build_prompt=lambda actor_id: f"{TASK_AGENT_PROMPT}\n\n## オーナー情報\nuser_id: {actor_id}",
+        tools=lambda tool_map: tool_map.get("task", []),
+        per_actor=True,
+    ),
+    "calendar": SubAgentSpec(
+        build_prompt=lambda _: CALENDAR_AGENT_PROMPT,
+        tools=lambda _: CALENDAR_TOOLS,
+    ),
+    "gmail": SubAgentSpec(
+        build_prompt=lambda _: GMAIL_AGENT_PROMPT,
+        tools=lambda _: GMAIL_TOOLS,
+    ),
+    "notion": SubAgentSpec(
+        build_prompt=lambda _: NOTION_AGENT_PROMPT,
+        tools=lambda _: NOTION_TOOLS,
+        with_datetime=False,
+    ),
+    "briefing": SubAgentSpec(
+        build_prompt=lambda _: BRIEFING_AGENT_PROMPT,
+        tools=lambda _: [],
+        with_datetime=False,
+    ),
+    "diary": SubAgentSpec(
+        build_prompt=lambda _: DIARY_AGENT_PROMPT,
+        tools=lambda tool_map: tool_map.get("diary", []),
+    ),
+    "intro": SubAgentSpec(
+        build_prompt=lambda _: INTRO_AGENT_PROMPT,
+        tools=lambda _: [],
+        with_datetime=False,
+    ),
+    "twitter": SubAgentSpec(
+        build_prompt=lambda _: TWITTER_AGENT_PROMPT,
+        tools=lambda _: TWITTER_TOOLS,
+    ),
+})
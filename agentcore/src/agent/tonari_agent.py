@@ -18,6 +18,7 @@ from strands.models import BedrockModel, CacheConfig
 from strands.tools.mcp import MCPClient
 
 from .prompts import PIPELINE_SYSTEM_PROMPT, TONARI_SYSTEM_PROMPT
+from .request_trace import trace_hooks
 
 logger = logging.getLogger(__name__)
 
@@ -65,12 +66,10 @@ def _create_bedrock_model(cache_tools: bool = False) -> BedrockModel:
 
 
 def _get_ssm_parameter(name: str) -> str:
-    """SSM Parameter Storeからパラメータを取得（SecureString対応）"""
-    import boto3
+    """SSM Parameter Storeからパラメータを取得（SecureString対応、TTL付きキャッシュ）"""
+    from .secrets_cache import get_parameter
 
-    ssm = boto3.client("ssm", region_name=os.getenv("AWS_REGION", "ap-northeast-1"))
-    response = ssm.get_parameter(Name=name, WithDecryption=True)
-    return response["Parameter"]["Value"]
+    return get_parameter(name)
 
 
 def _create_openrouter_model(reasoning_enabled: bool = False):
@@ -193,11 +192,13 @@ def create_tonari_agent(
 
     has_tools = bool(mcp_tools)
     kwargs = {
+        "name": "tonari",
         "model": _create_model(model_provider, cache_tools=has_tools, reasoning_enabled=reasoning_enabled),
         "system_prompt": TONARI_SYSTEM_PROMPT,
         "conversation_manager": SlidingWindowConversationManager(window_size=10),
         "session_manager": session_manager,
         "tools": mcp_tools or [],
+        "hooks": [trace_hooks],
     }
     if plugins:
         kwargs["plugins"] = plugins
@@ -222,11 +223,13 @@ def create_tonari_agent_light(
     )
 
     agent = Agent(
+        name="tonari",
         model=_create_model(model_provider),
         system_prompt=TONARI_SYSTEM_PROMPT,
         conversation_manager=SlidingWindowConversationManager(window_size=10),
         session_manager=session_manager,
         tools=[],
+        hooks=[trace_hooks],
     )
     return agent
 
@@ -266,11 +269,13 @@ def create_tonari_agent_pipeline(
             tool_info.append(f"unknown:{type(t).__name__}")
     logger.info("Pipeline agent tools (%d): %s", len(all_tools), tool_info)
     agent = Agent(
+        name="tonari_pipeline",
         model=_create_model(cache_tools=has_tools),
         system_prompt=PIPELINE_SYSTEM_PROMPT,
         conversation_manager=SlidingWindowConversationManager(window_size=4),
         session_manager=session_manager,
         tools=all_tools,
+        hooks=[trace_hooks],
     )
     return agent
 
@@ -0,0 +1,137 @@
+"""ツール進捗モジュール
+
+サブエージェント内のツール呼び出しを、親エージェントのストリームに進捗イベントとして流す。
+出力先（reporter）はリクエストごとに ContextVar で設定し、サブエージェントの
+callback_handler は呼び出しごとの SubAgentProgress を ContextVar から引く。
+レジストリで使い回すサブエージェントでも、並行する別リクエスト・別ツールの進捗は混ざらない。
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterator
+
+# 進捗イベントの種類（app._stream_response がそのままSSEで送出する）
+SUB_TOOL_START = "sub_tool_start"
+SUB_TOOL_END = "sub_tool_end"
+SUB_AGENT_END = "sub_agent_end"
+
+Reporter = Callable[[dict], None]
+
+_reporter: ContextVar[Reporter | None] = ContextVar("tool_progress_reporter", default=None)
+_current: ContextVar["SubAgentProgress | None"] = ContextVar("sub_agent_progress", default=None)
+
+
+def _elapsed_ms(since: float) -> int:
+    return int((time.monotonic() - since) * 1000)
+
+
+@contextmanager
+def progress_reporter(report: Reporter) -> Iterator[None]:
+    """このコンテキスト内で発生した進捗イベントの送り先を設定する"""
+    token = _reporter.set(report)
+    try:
+        yield
+    finally:
+        _reporter.reset(token)
+
+
+class SubAgentProgress:
+    """1回のサブエージェントツール呼び出しの進捗
+
+    内部ツールの開始・終了、親ツール開始からの経過時間、
+    サブエージェントのモデル呼び出しで消費したトークン数を追跡する。
+    """
+
+    def __init__(self, parent: str, report: Reporter | None):
+        self.parent = parent
+        self._report = report
+        self._started = time.monotonic()
+        self._active: dict[str, tuple[str, float]] = {}
+        self.usage = {"inputTokens": 0, "outputTokens": 0, "totalTokens": 0}
+
+    def _emit(self, event_type: str, **fields) -> None:
+        if self._report is None:
+            return
+        self._report({
+            "type": event_type,
+            "parent": self.parent,
+            "elapsed_ms": _elapsed_ms(self._started),
+            "usage": dict(self.usage),
+            **fields,
+        })
+
+    def tool_start(self, tool_use_id: str, tool_name: str) -> None:
+        if tool_use_id in self._active:
+            return
+        self._active[tool_use_id] = (tool_name, time.monotonic())
+        self._emit(SUB_TOOL_START, tool=tool_name)
+
+    def tool_end(self, tool_use_id: str) -> None:
+        entry = self._active.pop(tool_use_id, None)
+        if entry is None:
+            return
+        tool_name, started = entry
+        self._emit(SUB_TOOL_END, tool=tool_name, duration_ms=_elapsed_ms(started))
+
+    def add_usage(self, usage: dict) -> None:
+        for key in self.usage:
+            self.usage[key] += usage.get(key, 0)
+
+    def handle(self, **kwargs) -> None:
+        """Strandsのストリームイベントを進捗に反映する"""
+        tool_use = kwargs.get("current_tool_use")
+        if isinstance(tool_use, dict) and tool_use.get("toolUseId"):
+            self.tool_start(tool_use["toolUseId"], tool_use.get("name", "unknown"))
+
+        message = kwargs.get("message")
+        if isinstance(message, dict) and message.get("role") == "user":
+            for block in message.get("content", []):
+                tool_use_id = block.get("toolResult", {}).get("toolUseId")
+                if tool_use_id:
+                    self.tool_end(tool_use_id)
+
+        chunk = kwargs.get("event")
+        if isinstance(chunk, dict) and "usage" in chunk.get("metadata", {}):
+            self.add_usage(chunk["metadata"]["usage"])
+
+    def finish(self) -> None:
+        for tool_use_id in list(self._active):
+            self.tool_end(tool_use_id)
+        self._emit(SUB_AGENT_END)
+
+
+@contextmanager
+def track_sub_agent(parent: str) -> Iterator[SubAgentProgress]:
+    """親ツール（サブエージェントツール）1回分の進捗追跡を開始する
+
+    終了時に未完了の内部ツールを閉じ、トークン使用量の合計を sub_agent_end で送出する。
+    """
+    progress = SubAgentProgress(parent, _reporter.get())
+    token = _current.set(progress)
+    try:
+        yield progress
+    finally:
+        _current.reset(token)
+        progress.finish()
+
+
+@contextmanager
+def child_tool(tool_name: str) -> Iterator[None]:
+    """Agentを介さない内部処理を、内部ツールとして進捗に載せる"""
+    progress = _current.get()
+    if progress is None:
+        yield
+        return
+    progress.tool_start(tool_name, tool_name)
+    try:
+        yield
+    finally:
+        progress.tool_end(tool_name)
+
+
+def callback_handler(**kwargs) -> None:
+    """サブエージェント用のStrands callback_handler（現在のコンテキストの進捗に転送する）"""
+    progress = _current.get()
+    if progress is not None:
+        progress.handle(**kwargs)
@@ -2,47 +2,159 @@
 
 Provides credential retrieval and tweepy client builders
 using credentials stored in AWS SSM Parameter Store.
+
+Clients are built once per process and share one requests Session, so
+connections are reused across tool calls. Rate-limit headers from every
+response are recorded per endpoint, letting tools back off locally
+instead of waiting for X to return a 429.
 """
 
 import logging
-import os
+import re
+import threading
+import time
+import urllib.parse
+from dataclasses import dataclass
 
-import boto3
+import requests
 import tweepy
 
+from . import secrets_cache
+
 logger = logging.getLogger(__name__)
 
-AWS_REGION = os.getenv("AWS_REGION", "ap-northeast-1")
 SSM_PREFIX = "/tonari/twitter"
+WRITE_CREDENTIAL_KEYS = ("api_key", "api_secret", "access_token", "access_token_secret")
+
+# Endpoints used by twitter_tools, as recorded by RateLimitTracker
+USER_TWEETS_ENDPOINT = "GET /2/users/:id/tweets"
+CREATE_TWEET_ENDPOINT = "POST /2/tweets"
+
+# Numeric path segments after the API version (e.g. /2/users/123 -> /2/users/:id)
+_ID_SEGMENT = re.compile(r"(?<=\w)/\d+(?=/|$)")
+
+
+@dataclass
+class RateLimit:
+    """Last seen x-rate-limit-* values for one endpoint."""
+
+    limit: int
+    remaining: int
+    reset_at: float
+
+
+class RateLimitTracker:
+    """Records x-rate-limit-* response headers per endpoint."""
+
+    def __init__(self):
+        self._limits: dict[str, RateLimit] = {}
+        self._lock = threading.Lock()
+
+    def record(self, response: requests.Response, *args, **kwargs) -> None:
+        """requests response hook."""
+        headers = response.headers
+        if "x-rate-limit-remaining" not in headers or "x-rate-limit-reset" not in headers:
+            return
+        try:
+            limit = RateLimit(
+                limit=int(headers.get("x-rate-limit-limit", 0)),
+                remaining=int(headers["x-rate-limit-remaining"]),
+                reset_at=float(headers["x-rate-limit-reset"]),
+            )
+        except ValueError:
+            return
+        key = endpoint_key(response.request.method, response.url)
+        with self._lock:
+            self._limits[key] = limit
+        if limit.remaining == 0:
+            logger.warning(
+                "Twitter rate limit exhausted for %s until %s",
+                key, time.strftime("%H:%M:%S", time.localtime(limit.reset_at)),
+            )
+
+    def get(self, endpoint: str) -> RateLimit | None:
+        with self._lock:
+            return self._limits.get(endpoint)
 
-_ssm_client = None
+    def seconds_until_available(self, endpoint: str) -> float:
+        """Seconds to wait before calling endpoint (0 if it can be called now)."""
+        limit = self.get(endpoint)
+        if limit is None or limit.remaining > 0:
+            return 0.0
+        return max(0.0, limit.reset_at - time.time())
 
+    def clear(self) -> None:
+        with self._lock:
+            self._limits.clear()
 
-def _get_ssm():
-    global _ssm_client
-    if _ssm_client is None:
-        _ssm_client = boto3.client("ssm", region_name=AWS_REGION)
-    return _ssm_client
+
+def endpoint_key(method: str, url: str) -> str:
+    """Normalise a request to "METHOD /path" with numeric IDs replaced by :id."""
+    path = urllib.parse.urlsplit(url).path
+    return f"{method.upper()} {_ID_SEGMENT.sub('/:id', path)}"
+
+
+rate_limits = RateLimitTracker()
+
+_session: requests.Session | None = None
+_read_client: tweepy.Client | None = None
+_write_client: tweepy.Client | None = None
+_client_lock = threading.Lock()
+
+
+def _get_session() -> requests.Session:
+    """Call with _client_lock held."""
+    global _session
+    if _session is None:
+        _session = requests.Session()
+        _session.hooks["response"].append(rate_limits.record)
+    return _session
 
 
 def _get_ssm_param(name: str) -> str:
-    resp = _get_ssm().get_parameter(
-        Name=f"{SSM_PREFIX}/{name}", WithDecryption=True
-    )
-    return resp["Parameter"]["Value"]
+    return secrets_cache.get_parameter(f"{SSM_PREFIX}/{name}")
+
+
+def _get_ssm_params(names: tuple[str, ...]) -> dict[str, str]:
+    values = secrets_cache.get_parameters(f"{SSM_PREFIX}/{name}" for name in names)
+    return {name: values[f"{SSM_PREFIX}/{name}"] for name in names}
+
+
+def _with_shared_session(client: tweepy.Client) -> tweepy.Client:
+    client.session.close()
+    client.session = _get_session()
+    return client
+
+
+def invalidate_credentials() -> None:
+    """Drop cached clients and credentials (e.g. after a 401 from the API)."""
+    global _read_client, _write_client
+    with _client_lock:
+        _read_client = None
+        _write_client = None
+    secrets_cache.invalidate_prefix(f"{SSM_PREFIX}/")
 
 
 def get_read_client() -> tweepy.Client:
-    """Build a tweepy Client for read operations (bearer token)."""
-    bearer_token = _get_ssm_param("bearer_token")
-    return tweepy.Client(bearer_token=bearer_token)
+    """Get the cached tweepy Client for read operations (bearer token)."""
+    global _read_client
+    with _client_lock:
+        if _read_client is None:
+            bearer_token = _get_ssm_param("bearer_token")
+            _read_client = _with_shared_session(tweepy.Client(bearer_token=bearer_token))
+        return _read_client
 
 
 def get_write_client() -> tweepy.Client:
-    """Build a tweepy Client for write operations (OAuth 1.0a)."""
-    return tweepy.Client(
-        consumer_key=_get_ssm_param("api_key"),
-        consumer_secret=_get_ssm_param("api_secret"),
-        access_token=_get_ssm_param("access_token"),
-        access_token_secret=_get_ssm_param("access_token_secret"),
-    )
+    """Get the cached tweepy Client for write operations (OAuth 1.0a)."""
+    global _write_client
+    with _client_lock:
+        if _write_client is None:
+            creds = _get_ssm_params(WRITE_CREDENTIAL_KEYS)
+            _write_client = _with_shared_session(tweepy.Client(
+                consumer_key=creds["api_key"],
+                consumer_secret=creds["api_secret"],
+                access_token=creds["access_token"],
+                access_token_secret=creds["access_token_secret"],
+            ))
+        return _write_client
@@ -7,9 +7,17 @@ import logging
 import os
 from datetime import datetime, timedelta, timezone
 
+import tweepy
 from strands import tool
 
-from .twitter_auth import get_read_client, get_write_client
+from .twitter_auth import (
+    CREATE_TWEET_ENDPOINT,
+    USER_TWEETS_ENDPOINT,
+    get_read_client,
+    get_write_client,
+    invalidate_credentials,
+    rate_limits,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -34,6 +42,15 @@ def twitter_get_todays_tweets(user_id: str = "", max_count: int = 3) -> dict:
             "error": True,
         }
 
+    wait = rate_limits.seconds_until_available(USER_TWEETS_ENDPOINT)
+    if wait > 0:
+        return {
+            "tweets": [],
+            "count": 0,
+            "message": f"Twitter API rate limit reached. Retry in {int(wait) + 1} seconds.",
+            "error": True,
+        }
+
     try:
         client = get_read_client()
         response = client.get_users_tweets(
@@ -78,6 +95,16 @@ def twitter_get_todays_tweets(user_id: str = "", max_count: int = 3) -> dict:
             "message": message,
         }
 
+    except tweepy.Unauthorized as e:
+        # Credentials may have been rotated; re-read them on the next call
+        invalidate_credentials()
+        logger.warning("Twitter API rejected credentials: %s", e)
+        return {
+            "tweets": [],
+            "count": 0,
+            "message": f"Twitter API access failed: {e}",
+            "error": True,
+        }
     except Exception as e:
         logger.exception("Failed to fetch tweets from Twitter API")
         return {
@@ -95,6 +122,14 @@ def twitter_post_tweet(text: str) -> dict:
     Args:
         text: The tweet text to post (max 280 characters).
     """
+    wait = rate_limits.seconds_until_available(CREATE_TWEET_ENDPOINT)
+    if wait > 0:
+        return {
+            "tweet_id": None,
+            "message": f"Twitter API rate limit reached. Retry in {int(wait) + 1} seconds.",
+            "error": True,
+        }
+
     try:
         client = get_write_client()
         result = client.create_tweet(text=text)
@@ -113,6 +148,15 @@ def twitter_post_tweet(text: str) -> dict:
             "message": f"Tweet posted successfully (ID: {tweet_id})",
         }
 
+    except tweepy.Unauthorized as e:
+        # Credentials may have been rotated; re-read them on the next call
+        invalidate_credentials()
+        logger.warning("Twitter API rejected credentials: %s", e)
+        return {
+            "tweet_id": None,
+            "message": f"Failed to post tweet: {e}",
+            "error": True,
+        }
     except Exception as e:
         logger.exception("Failed to post tweet")
         return {
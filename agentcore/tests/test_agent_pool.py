@@ -0,0 +1,158 @@
+"""agent_pool.py のユニットテスト"""
+
+import threading
+import time
+from unittest.mock import MagicMock
+
+from src.agent.agent_pool import AgentPool, PooledAgent
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _factory(name="agent"):
+    return lambda: PooledAgent(agent=name)
+
+
+class TestAgentPool:
+    """AgentPool: LRU + TTL でAgentを再利用する"""
+
+    def test_same_key_reuses_agent(self):
+        """同じキーなら2回目はfactoryを呼ばずに再利用する"""
+        pool = AgentPool(max_size=2)
+        factory = MagicMock(side_effect=_factory())
+
+        first = pool.get_or_create(("s1", "a"), factory)
+        second = pool.get_or_create(("s1", "a"), factory)
+
+        assert first is second
+        assert factory.call_count == 1
+        assert pool.stats() == {"hits": 1, "misses": 1, "evictions": 0, "size": 1}
+
+    def test_interleaved_sessions_do_not_rebuild(self):
+        """2セッションが交互に呼び出しても再構築しない"""
+        pool = AgentPool(max_size=2)
+        factory = MagicMock(side_effect=lambda: PooledAgent(agent=object()))
+
+        for _ in range(3):
+            pool.get_or_create(("s1",), factory)
+            pool.get_or_create(("s2",), factory)
+
+        assert factory.call_count == 2
+        assert pool.stats()["hits"] == 4
+
+    def test_lru_eviction(self):
+        """上限超過時は最も古いエントリを破棄する"""
+        pool = AgentPool(max_size=2)
+        pool.get_or_create("k1", _factory("a1"))
+        pool.get_or_create("k2", _factory("a2"))
+        pool.get_or_create("k1", _factory("unused"))  # k1を最新化
+        pool.get_or_create("k3", _factory("a3"))  # k2が破棄される
+
+        assert len(pool) == 2
+        assert pool.stats()["evictions"] == 1
+        assert pool.get_or_create("k1", _factory("new")).agent == "a1"
+        assert pool.get_or_create("k2", _factory("a2-new")).agent == "a2-new"
+
+    def test_ttl_expiry(self):
+        """アイドルTTLを過ぎたエントリは作り直す"""
+        clock = FakeClock()
+        pool = AgentPool(max_size=4, ttl_seconds=60, clock=clock)
+        pool.get_or_create("k", _factory("old"))
+
+        clock.now = 61
+        e2 = pool.get_or_create("k", _factory("new"))
+
+        assert e2.agent == "new"
+        assert pool.stats()["evictions"] == 1
+
+    def test_concurrent_same_key_builds_once(self):
+        """同一キーの同時要求でもfactoryは1回だけ呼ばれる"""
+        pool = AgentPool(max_size=4)
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def slow_factory():
+            calls.append(1)
+            started.set()
+            release.wait(timeout=5)
+            return PooledAgent(agent="shared")
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(pool.get_or_create("k", slow_factory)))
+            for _ in range(3)
+        ]
+        threads[0].start()
+        started.wait(timeout=5)
+        for t in threads[1:]:
+            t.start()
+        release.set()
+        for t in threads:
+            t.join(timeout=5)
+
+        assert len(calls) == 1
+        assert [r.agent for r in results] == ["shared"] * 3
+
+    def test_key_lock_survives_eviction_while_waiting(self):
+        """構築待ちの間にキーが破棄されても、待っているスレッドは同じロックで再構築しない"""
+        pool = AgentPool(max_size=1)
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def slow_factory():
+            calls.append(1)
+            started.set()
+            release.wait(timeout=5)
+            return PooledAgent(agent="shared")
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(pool.get_or_create("k", slow_factory)))
+            for _ in range(2)
+        ]
+        threads[0].start()
+        started.wait(timeout=5)
+        threads[1].start()
+        deadline = time.monotonic() + 5
+        while pool._key_locks["k"].waiters < 2 and time.monotonic() < deadline:
+            time.sleep(0.001)
+        pool.invalidate("k")
+        pool.get_or_create("other", _factory())
+        release.set()
+        for t in threads:
+            t.join(timeout=5)
+
+        assert len(calls) == 1
+        assert pool._key_locks == {}
+
+    def test_invalidate_and_clear(self):
+        """invalidate/clearでエントリを破棄する"""
+        pool = AgentPool(max_size=4)
+        pool.get_or_create("k1", _factory())
+        pool.get_or_create("k2", _factory())
+
+        pool.invalidate("k1")
+        assert len(pool) == 1
+
+        pool.clear()
+        assert len(pool) == 0
+
+    def test_unpoolable_entry_is_not_reused(self):
+        """poolable=False のエントリはプールに入れず、キーのロックも残さない"""
+        pool = AgentPool(max_size=4)
+        factory = MagicMock(side_effect=lambda: PooledAgent(agent=object(), poolable=False))
+
+        pool.get_or_create("k", factory)
+        pool.get_or_create("k", factory)
+
+        assert factory.call_count == 2
+        assert len(pool) == 0
+        assert pool._key_locks == {}
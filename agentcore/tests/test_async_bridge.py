@@ -0,0 +1,72 @@
+"""async_bridge.py のユニットテスト"""
+
+import asyncio
+import threading
+
+import pytest
+
+from src.agent.async_bridge import BackgroundLoop
+
+
+@pytest.fixture
+def bg():
+    loop = BackgroundLoop(name="test-bridge")
+    yield loop
+    loop.stop()
+
+
+class TestBackgroundLoop:
+    """BackgroundLoop: 常駐ループでコルーチンを実行する"""
+
+    def test_runs_coroutine_and_reuses_thread(self, bg):
+        """複数回呼んでも同じスレッド・同じループで実行する"""
+        async def current():
+            return threading.current_thread().name, id(asyncio.get_running_loop())
+
+        first = bg.run(current())
+        second = bg.run(current())
+
+        assert first == second
+        assert first[0] == "test-bridge"
+
+    def test_works_inside_running_loop(self, bg):
+        """呼び出し元でイベントループが動いていても実行できる"""
+        async def value():
+            return 42
+
+        async def caller():
+            return bg.run(value())
+
+        assert asyncio.run(caller()) == 42
+
+    def test_propagates_exceptions(self, bg):
+        async def boom():
+            raise ValueError("boom")
+
+        with pytest.raises(ValueError, match="boom"):
+            bg.run(boom())
+
+    def test_timeout_cancels_coroutine(self, bg):
+        """タイムアウト時はTimeoutErrorを送出し、コルーチンをキャンセルする"""
+        cancelled = threading.Event()
+
+        async def slow():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        with pytest.raises(TimeoutError):
+            bg.run(slow(), timeout=0.05)
+        assert cancelled.wait(timeout=2)
+
+    def test_rejects_call_from_loop_thread(self, bg):
+        """ループ自身のスレッドからの同期呼び出しはデッドロックせずに失敗する"""
+        async def nested():
+            async def inner():
+                return 1
+            return bg.run(inner())
+
+        with pytest.raises(RuntimeError, match="own loop thread"):
+            bg.run(nested())
@@ -0,0 +1,145 @@
+"""briefing.py の並列データ収集テスト"""
+
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+
+import src.agent.briefing as briefing
+from src.agent.briefing import JST, BriefingSource, gather_sources
+
+
+def _slow(value, seconds):
+    def _fetch():
+        time.sleep(seconds)
+        return value
+    return _fetch
+
+
+def _raise():
+    raise RuntimeError("boom")
+
+
+class TestGatherSources:
+    """gather_sources: ソースを並列取得し、タイムアウト・失敗分を除いた部分結果を返す"""
+
+    def test_sources_run_concurrently(self):
+        """所要時間は合計ではなく最も遅いソースで決まる"""
+        sources = [BriefingSource(f"s{i}", _slow(i, 0.2), timeout=2) for i in range(5)]
+
+        started = time.monotonic()
+        results = gather_sources(sources)
+        elapsed = time.monotonic() - started
+
+        assert elapsed < 0.6
+        assert {name: r["data"] for name, r in results.items()} == {f"s{i}": i for i in range(5)}
+        assert all(r["status"] == "ok" for r in results.values())
+
+    def test_timeout_returns_partial_results(self):
+        """タイムアウトしたソースはtimeoutとして返し、他のソースの結果は残る"""
+        sources = [
+            BriefingSource("fast", _slow("ok", 0), timeout=1),
+            BriefingSource("slow", _slow("late", 2), timeout=0.1),
+        ]
+
+        started = time.monotonic()
+        results = gather_sources(sources)
+
+        assert time.monotonic() - started < 1
+        assert results["fast"] == {"status": "ok", "data": "ok", "elapsed_ms": results["fast"]["elapsed_ms"]}
+        assert results["slow"]["status"] == "timeout"
+
+    def test_error_is_isolated(self):
+        """例外を送出したソースはerrorとして返す"""
+        results = gather_sources([
+            BriefingSource("broken", _raise),
+            BriefingSource("fine", lambda: 1),
+        ])
+
+        assert results["broken"]["status"] == "error"
+        assert "boom" in results["broken"]["error"]
+        assert results["fine"]["data"] == 1
+
+    def test_empty_sources(self):
+        assert gather_sources([]) == {}
+
+    def test_worker_threads_are_reused_across_calls(self):
+        """呼び出しごとにスレッドを作らず、スレッド単位のサービスキャッシュが効くようにする"""
+        gather_sources([BriefingSource("warm", lambda: 1)])
+        threads = set(briefing._executor._threads)
+
+        for _ in range(3):
+            gather_sources([BriefingSource("again", lambda: 1)])
+
+        assert set(briefing._executor._threads) == threads
+
+
+class TestBuildBriefingSources:
+    """build_briefing_sources: 利用可能なツールに応じてソースを構築する"""
+
+    def _mcp_tool(self, name, payload):
+        t = MagicMock()
+        t.tool_name = name
+        t.mcp_tool.name = name
+        t.mcp_client.call_tool_sync.return_value = {
+            "status": "success",
+            "content": [{"text": json.dumps(payload)}],
+        }
+        return t
+
+    def test_all_sources_with_mcp_tools(self):
+        """タスク・天気のMCPツールがあれば5ソースを構築し、MCPは直接呼び出す"""
+        now = datetime(2026, 3, 4, 8, 0, tzinfo=JST)  # 水曜
+        list_tasks = self._mcp_tool("task-tool___list_tasks", {"tasks": []})
+        tavily = self._mcp_tool("TavilySearch___TavilySearchPost", {"results": []})
+
+        with (
+            patch.object(briefing, "calendar_list_events", return_value='{"events": []}') as cal,
+            patch.object(briefing, "gmail_search_emails", return_value='{"emails": []}') as gmail,
+        ):
+            sources = briefing.build_briefing_sources(now, "owner", [list_tasks], [tavily])
+            results = gather_sources(sources)
+
+        assert set(results) == {"calendar", "mail", "spending", "tasks", "weather"}
+        assert results["tasks"]["data"] == {"tasks": []}
+        cal.assert_called_once_with(date_from="2026-03-04", date_to="2026-03-05")
+        queries = [c.kwargs["query"] for c in gmail.call_args_list]
+        assert "from:カード after:2026/03/02" in queries
+        args = list_tasks.mcp_client.call_tool_sync.call_args.kwargs["arguments"]
+        assert args == {"user_id": "owner", "days_until_due": 3}
+
+    def test_hung_mcp_call_frees_its_thread(self):
+        """応答しないMCP呼び出しも read_timeout で終わり、次のブリーフィングはスレッドを使える"""
+        now = datetime(2026, 3, 4, 8, 0, tzinfo=JST)
+        list_tasks = self._mcp_tool("task-tool___list_tasks", {"tasks": []})
+        hung = MagicMock()
+        hung.tool_name = hung.mcp_tool.name = "TavilySearch___TavilySearchPost"
+
+        def _call_tool_sync(read_timeout_seconds, **kwargs):
+            # MCPClient と同じく、read_timeout_seconds を過ぎたら例外で戻る
+            time.sleep(read_timeout_seconds.total_seconds())
+            raise TimeoutError("read timed out")
+
+        hung.mcp_client.call_tool_sync.side_effect = _call_tool_sync
+
+        with (
+            patch.object(briefing, "_executor", ThreadPoolExecutor(max_workers=1)),
+            patch.object(briefing, "calendar_list_events", return_value='{"events": []}'),
+            patch.object(briefing, "gmail_search_emails", return_value='{"emails": []}'),
+        ):
+            first = gather_sources(briefing.build_briefing_sources(now, "owner", [], [hung], timeout=0.2))
+            second = gather_sources(
+                [s for s in briefing.build_briefing_sources(now, "owner", [list_tasks], [], timeout=1)
+                 if s.name == "tasks"]
+            )
+
+        assert first["weather"]["status"] == "timeout"
+        assert second["tasks"] == {"status": "ok", "data": {"tasks": []}, "elapsed_ms": second["tasks"]["elapsed_ms"]}
+        kwargs = list_tasks.mcp_client.call_tool_sync.call_args.kwargs
+        assert kwargs["read_timeout_seconds"].total_seconds() == 1
+
+    def test_sources_without_mcp_tools(self):
+        """Gatewayツールが無い場合はGoogle系ソースのみ"""
+        sources = briefing.build_briefing_sources(datetime.now(JST), "owner", [], [])
+        assert [s.name for s in sources] == ["calendar", "mail", "spending"]
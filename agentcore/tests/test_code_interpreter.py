@@ -0,0 +1,240 @@
+"""code_interpreter.py のグラフ出力のテスト"""
+
+import asyncio
+import json
+from contextlib import contextmanager
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+import src.agent.code_interpreter as code_interpreter
+
+WEBP_BYTES = b"RIFF\x00\x00\x00\x00WEBPVP8 binary"
+PNG_BYTES = b"\x89PNG\r\n\x1a\nbinary"
+
+
+def _execute_result(stdout: str, is_error: bool = False) -> dict:
+    return {"stream": [{"result": {"isError": is_error, "structuredContent": {"stdout": stdout, "stderr": ""}}}]}
+
+
+def _read_result(files: dict[str, bytes]) -> dict:
+    content = [
+        {"type": "resource", "resource": {"uri": f"file:///opt/amazon/genesis1p-tools/var/{path}", "blob": data}}
+        for path, data in files.items()
+    ]
+    return {"stream": [{"result": {"content": content}}]}
+
+
+@pytest.fixture
+def code_client():
+    """code_session をモック化し、invoke の呼び出しを記録するクライアントを返す"""
+    client = MagicMock()
+
+    @contextmanager
+    def _session(region):
+        yield client
+
+    with patch("bedrock_agentcore.tools.code_interpreter_client.code_session", _session):
+        yield client
+
+
+@pytest.fixture
+def s3():
+    with (
+        patch.object(code_interpreter, "OUTPUT_BUCKET", "bucket"),
+        patch.object(code_interpreter, "_s3_client") as client,
+    ):
+        client.generate_presigned_url.side_effect = lambda op, Params, ExpiresIn: f"https://s3/{Params['Key']}"
+        yield client
+
+
+class RecordingQueue:
+    """ImageQueue の代わりに put された画像を記録する"""
+
+    def __init__(self):
+        self.images = []
+
+    def put(self, image):
+        self.images.append(image)
+        return True
+
+
+class TestExecutePythonFigures:
+    """execute_python: グラフをファイル経由のバイナリで取得し、S3に並列アップロードする"""
+
+    def test_figures_are_read_as_binary_and_uploaded(self, code_client, s3):
+        queue = RecordingQueue()
+        marker = json.dumps([
+            {"i": 1, "f": "webp", "p": "_tonari_figures/fig1.webp"},
+            {"i": 2, "f": "png", "p": "_tonari_figures/fig2.png"},
+        ])
+        code_client.invoke.side_effect = [
+            _execute_result(f"total: 42\n_TONARI_FIGURES_{marker}\n"),
+            _read_result({"_tonari_figures/fig1.webp": WEBP_BYTES, "_tonari_figures/fig2.png": PNG_BYTES}),
+        ]
+
+        with code_interpreter.image_queue_scope(queue):
+            result = json.loads(code_interpreter.execute_python._tool_func("plt.plot([1, 2])"))
+
+        assert result["stdout"] == "total: 42"
+        assert len(result["image_urls"]) == 2
+        assert result["image_urls"][0].endswith("_fig1.webp")
+        assert result["image_urls"][1].endswith("_fig2.png")
+
+        method, params = code_client.invoke.call_args_list[1][0]
+        assert method == "readFiles"
+        assert params == {"paths": ["_tonari_figures/fig1.webp", "_tonari_figures/fig2.png"]}
+
+        uploads = {c.args[2]: c for c in s3.upload_fileobj.call_args_list}
+        assert len(uploads) == 2
+        for key, call in uploads.items():
+            expected = WEBP_BYTES if key.endswith(".webp") else PNG_BYTES
+            assert call.args[0].getvalue() == expected
+            assert call.kwargs["ExtraArgs"]["ContentType"] in ("image/webp", "image/png")
+            assert call.kwargs["Config"] is code_interpreter.UPLOAD_CONFIG
+        assert sorted(img["url"] for img in queue.images) == sorted(result["image_urls"])
+
+    def test_no_figures_skips_read_files(self, code_client, s3):
+        code_client.invoke.side_effect = [_execute_result("hello\n")]
+
+        result = json.loads(code_interpreter.execute_python._tool_func("print('hello')"))
+
+        assert result == {"isError": False, "stdout": "hello\n", "stderr": ""}
+        assert code_client.invoke.call_count == 1
+        s3.upload_fileobj.assert_not_called()
+
+    def test_export_code_uses_configured_format_and_dpi(self, code_client, s3):
+        code_client.invoke.side_effect = [_execute_result("")]
+
+        with (
+            patch.object(code_interpreter, "FIGURE_FORMAT", "png"),
+            patch.object(code_interpreter, "FIGURE_DPI", 150),
+        ):
+            code_interpreter.execute_python._tool_func("plt.plot([1, 2])")
+
+        code = code_client.invoke.call_args[0][1]["code"]
+        assert "_fmt = 'png'" in code
+        assert "dpi=150" in code
+        assert "base64" not in code
+
+
+class TestExecutePythonDatasets:
+    """execute_python: 参照ID のデータセットを DataFrame として読み込んでから実行する"""
+
+    def test_referenced_dataset_is_written_and_loaded(self, code_client, s3):
+        dataset = code_interpreter.dataset_store.put("cost", ["start", "cost"], [("2026-10-01", 1.5)], owner=("", ""))
+        code_client.invoke.side_effect = [{"stream": [{"result": {"isError": False}}]}, _execute_result("1.5\n")]
+
+        result = json.loads(
+            code_interpreter.execute_python._tool_func(
+                "print(datasets[...]['cost'].sum())", datasets=[dataset.dataset_id]
+            )
+        )
+
+        assert result["stdout"] == "1.5\n"
+        method, params = code_client.invoke.call_args_list[0][0]
+        assert method == "writeFiles"
+        assert params == {"content": [{"path": dataset.path, "text": "start,cost\n2026-10-01,1.5\n"}]}
+        code = code_client.invoke.call_args_list[1][0][1]["code"]
+        assert f"datasets[{dataset.dataset_id!r}] = _pd.read_csv({dataset.path!r}" in code
+        assert code.index("read_csv") < code.index("print(datasets")
+
+    def test_unknown_dataset_returns_error_without_running(self, code_client, s3):
+        result = json.loads(code_interpreter.execute_python._tool_func("print(1)", datasets=["ds_missing"]))
+
+        assert result["isError"] is True
+        assert "ds_missing" in result["stderr"]
+        code_client.invoke.assert_not_called()
+
+    def test_dataset_of_another_conversation_is_rejected(self, code_client, s3):
+        dataset = code_interpreter.dataset_store.put("cost", ["cost"], [(1.5,)], owner=("owner", "s1"))
+        tool_context = MagicMock(invocation_state={"actor_id": "other", "session_id": "s2"})
+
+        result = json.loads(
+            code_interpreter.execute_python._tool_func(
+                "print(1)", datasets=[dataset.dataset_id], tool_context=tool_context
+            )
+        )
+
+        assert result["isError"] is True
+        code_client.invoke.assert_not_called()
+
+
+class TestExecutePythonSessionPool:
+    """execute_python: 会話が特定できればプールのサンドボックスを使う"""
+
+    def test_uses_pooled_session_for_conversation(self, s3):
+        client = MagicMock()
+        client.invoke.return_value = _execute_result("hello\n")
+        pool = MagicMock()
+
+        @contextmanager
+        def _session(key):
+            pool.keys.append(key)
+            yield client
+
+        pool.keys = []
+        pool.session = _session
+        tool_context = MagicMock(invocation_state={"actor_id": "owner", "session_id": "s1"})
+
+        with patch.object(code_interpreter, "_get_session_pool", return_value=pool):
+            result = json.loads(code_interpreter.execute_python._tool_func("print('hello')", tool_context=tool_context))
+
+        assert result["stdout"] == "hello\n"
+        assert pool.keys == [("owner", "s1")]
+
+
+class TestImageQueue:
+    """ImageQueue: ストリームごとの上限付き画像キュー"""
+
+    def test_put_from_worker_thread_waits_for_space(self):
+        """満杯の間はワーカースレッドの put が待ち、読まれた分だけ進む"""
+
+        async def _main():
+            queue = code_interpreter.ImageQueue(asyncio.get_running_loop(), maxsize=1)
+            put_results = asyncio.create_task(
+                asyncio.to_thread(lambda: [queue.put({"url": f"u{i}"}, timeout=5) for i in range(3)])
+            )
+            received = [await queue.get() for _ in range(3)]
+            return await put_results, received
+
+        results, received = asyncio.run(_main())
+        assert results == [True, True, True]
+        assert [img["url"] for img in received] == ["u0", "u1", "u2"]
+
+    def test_put_times_out_when_stream_does_not_read(self):
+        async def _main():
+            queue = code_interpreter.ImageQueue(asyncio.get_running_loop(), maxsize=1)
+            return await asyncio.to_thread(
+                lambda: [queue.put({"url": "a"}, timeout=0.05), queue.put({"url": "b"}, timeout=0.05)]
+            )
+
+        assert asyncio.run(_main()) == [True, False]
+
+    def test_put_after_close_is_dropped(self):
+        async def _main():
+            queue = code_interpreter.ImageQueue(asyncio.get_running_loop())
+            await queue.close()
+            delivered = await asyncio.to_thread(queue.put, {"url": "late"})
+            return delivered, await queue.get()
+
+        assert asyncio.run(_main()) == (False, None)
+
+    def test_images_go_to_the_stream_that_ran_the_tool(self):
+        """並行する2つのストリームで、画像はそれぞれの呼び出し元にだけ届く"""
+
+        async def _run_stream(name):
+            queue = code_interpreter.ImageQueue(asyncio.get_running_loop())
+            with code_interpreter.image_queue_scope(queue):
+                # Strands の同期ツールと同じく、ワーカースレッドで実行する
+                await asyncio.to_thread(lambda: code_interpreter._image_queue.get().put({"url": name}))
+            await queue.close()
+            images = []
+            while (image := await queue.get()) is not None:
+                images.append(image["url"])
+            return images
+
+        async def _main():
+            return await asyncio.gather(_run_stream("s1"), _run_stream("s2"))
+
+        assert asyncio.run(_main()) == [["s1"], ["s2"]]
@@ -0,0 +1,185 @@
+"""code_interpreter_pool.py のユニットテスト"""
+
+from unittest.mock import MagicMock
+
+import pytest
+
+from src.agent.code_interpreter_pool import WARMUP_CODE, CodeInterpreterPool
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _ok_response():
+    return {"stream": [{"result": {"isError": False, "structuredContent": {"stdout": "ok"}}}]}
+
+
+def _make_client():
+    client = MagicMock()
+    client.invoke.return_value = _ok_response()
+    return client
+
+
+@pytest.fixture
+def clients():
+    return []
+
+
+@pytest.fixture
+def make_pool(clients):
+    def _make(**kwargs):
+        def _factory():
+            client = _make_client()
+            clients.append(client)
+            return client
+
+        kwargs.setdefault("clock", FakeClock())
+        return CodeInterpreterPool(client_factory=_factory, **kwargs)
+
+    return _make
+
+
+def _executed_code(client) -> list[str]:
+    return [c.args[1]["code"] for c in client.invoke.call_args_list]
+
+
+class TestCodeInterpreterPool:
+    """CodeInterpreterPool: 会話ごとにサンドボックスを使い回す"""
+
+    def test_same_key_reuses_started_session(self, make_pool, clients):
+        """同じキーなら起動とウォームアップは1回だけ"""
+        pool = make_pool()
+
+        with pool.session(("actor", "s1")) as first:
+            pass
+        with pool.session(("actor", "s1")) as second:
+            pass
+
+        assert first is second
+        assert len(clients) == 1
+        clients[0].start.assert_called_once()
+        assert _executed_code(clients[0]) == [WARMUP_CODE]
+        assert pool.stats() == {"hits": 1, "misses": 1, "evictions": 0, "size": 1}
+
+    def test_different_keys_get_separate_sessions(self, make_pool, clients):
+        pool = make_pool()
+
+        with pool.session(("actor", "s1")) as first:
+            pass
+        with pool.session(("actor", "s2")) as second:
+            pass
+
+        assert first is not second
+        assert len(pool) == 2
+
+    def test_idle_session_is_replaced(self, make_pool, clients):
+        """アイドルTTLを過ぎたセッションは停止して作り直す"""
+        clock = FakeClock()
+        pool = make_pool(clock=clock, idle_ttl_seconds=100, health_check_after_seconds=1000)
+
+        with pool.session("k"):
+            pass
+        clock.now = 101
+        with pool.session("k") as client:
+            pass
+
+        assert client is clients[1]
+        clients[0].stop.assert_called_once()
+
+    def test_max_lifetime_evicts_busy_session(self, make_pool, clients):
+        """使われ続けていても最大寿命を過ぎたら作り直す"""
+        clock = FakeClock()
+        pool = make_pool(
+            clock=clock, idle_ttl_seconds=100, max_lifetime_seconds=250, health_check_after_seconds=1000
+        )
+
+        for now in (0, 90, 180, 270):
+            clock.now = now
+            with pool.session("k"):
+                pass
+
+        assert len(clients) == 2
+        clients[0].stop.assert_called_once()
+
+    def test_failed_health_check_replaces_session(self, make_pool, clients):
+        """しばらく使われていないセッションはヘルスチェックし、失敗すれば作り直す"""
+        clock = FakeClock()
+        pool = make_pool(clock=clock, idle_ttl_seconds=1000, health_check_after_seconds=60)
+
+        with pool.session("k"):
+            pass
+        clients[0].invoke.side_effect = RuntimeError("session expired")
+        clock.now = 61
+        with pool.session("k") as client:
+            pass
+
+        assert client is clients[1]
+        clients[0].stop.assert_called_once()
+
+    def test_recent_session_skips_health_check(self, make_pool, clients):
+        clock = FakeClock()
+        pool = make_pool(clock=clock, health_check_after_seconds=60)
+
+        with pool.session("k"):
+            pass
+        clock.now = 30
+        with pool.session("k"):
+            pass
+
+        assert _executed_code(clients[0]) == [WARMUP_CODE]
+
+    def test_error_during_use_discards_session(self, make_pool, clients):
+        """借り出し中の例外でセッションを破棄し、例外はそのまま送出する"""
+        pool = make_pool()
+
+        with pytest.raises(RuntimeError):
+            with pool.session("k"):
+                raise RuntimeError("boom")
+
+        clients[0].stop.assert_called_once()
+        assert len(pool) == 0
+
+    def test_overflow_stops_least_recently_used(self, make_pool, clients):
+        pool = make_pool(max_size=2)
+
+        for key in ("a", "b", "a", "c"):
+            with pool.session(key):
+                pass
+
+        clients[1].stop.assert_called_once()  # "b"
+        clients[0].stop.assert_not_called()
+        assert len(pool) == 2
+
+    def test_warmup_failure_keeps_session(self, make_pool, clients):
+        """ウォームアップに失敗してもセッションは使える"""
+        pool = CodeInterpreterPool(client_factory=lambda: _failing_warmup_client(clients), clock=FakeClock())
+
+        with pool.session("k") as client:
+            pass
+
+        assert client is clients[0]
+        client.stop.assert_not_called()
+
+    def test_clear_stops_all_sessions(self, make_pool, clients):
+        pool = make_pool()
+        for key in ("a", "b"):
+            with pool.session(key):
+                pass
+
+        pool.clear()
+
+        assert len(pool) == 0
+        for client in clients:
+            client.stop.assert_called_once()
+
+
+def _failing_warmup_client(clients):
+    client = _make_client()
+    client.invoke.side_effect = RuntimeError("import error")
+    clients.append(client)
+    return client
@@ -0,0 +1,220 @@
+"""cost_cache.py のユニットテスト"""
+
+import threading
+from datetime import date, timedelta
+from unittest.mock import MagicMock
+
+import pytest
+
+from src.agent.cost_cache import CostCache, JsonFileStore
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeCostExplorer:
+    """期間内の日・月ごとに ResultsByTime を返し、page_size 件ずつページ分割する"""
+
+    def __init__(self, page_size: int = 100, estimated_from: str = "9999-12-31"):
+        self.page_size = page_size
+        self.estimated_from = estimated_from
+        self.calls = []
+
+    def get_cost_and_usage(self, **kwargs):
+        self.calls.append(kwargs)
+        period = kwargs["TimePeriod"]
+        current, last = date.fromisoformat(period["Start"]), date.fromisoformat(period["End"])
+        results = []
+        while current < last:
+            if kwargs["Granularity"] == "DAILY":
+                following = current + timedelta(days=1)
+            else:
+                following = (current.replace(day=1) + timedelta(days=32)).replace(day=1)
+            start, end = current.isoformat(), min(following, last).isoformat()
+            results.append({
+                "TimePeriod": {"Start": start, "End": end},
+                "Total": {"UnblendedCost": {"Amount": "1.0", "Unit": "USD"}},
+                "Groups": [],
+                "Estimated": start >= self.estimated_from,
+            })
+            current = following
+
+        offset = int(kwargs.get("NextPageToken", "0"))
+        page = results[offset:offset + self.page_size]
+        response = {"ResultsByTime": page}
+        if offset + self.page_size < len(results):
+            response["NextPageToken"] = str(offset + self.page_size)
+        return response
+
+
+def _starts(results) -> list[str]:
+    return [r["TimePeriod"]["Start"] for r in results]
+
+
+class TestCostCache:
+    """CostCache: 期間単位でキャッシュし、足りない分だけ取得する"""
+
+    def test_repeated_query_is_served_from_cache(self):
+        ce = FakeCostExplorer()
+        cache = CostCache(ce, clock=FakeClock())
+
+        first = cache.results_by_time("DAILY", "2026-10-01", "2026-10-05", "SERVICE")
+        second = cache.results_by_time("DAILY", "2026-10-01", "2026-10-05", "SERVICE")
+
+        assert first == second
+        assert _starts(first) == ["2026-10-01", "2026-10-02", "2026-10-03", "2026-10-04"]
+        assert len(ce.calls) == 1
+        assert ce.calls[0]["GroupBy"] == [{"Type": "DIMENSION", "Key": "SERVICE"}]
+
+    def test_next_day_fetches_only_new_day(self):
+        """end が1日進んだ問い合わせでは新しい日だけを取得する"""
+        ce = FakeCostExplorer()
+        cache = CostCache(ce, clock=FakeClock())
+
+        cache.results_by_time("DAILY", "2026-10-01", "2026-10-05")
+        results = cache.results_by_time("DAILY", "2026-10-01", "2026-10-06")
+
+        assert _starts(results)[-1] == "2026-10-05"
+        assert ce.calls[1]["TimePeriod"] == {"Start": "2026-10-05", "End": "2026-10-06"}
+        assert "GroupBy" not in ce.calls[1]
+
+    def test_estimated_periods_expire_before_settled(self):
+        """見積もりの期間だけが短いTTLで再取得される"""
+        ce = FakeCostExplorer(estimated_from="2026-10-04")
+        clock = FakeClock()
+        cache = CostCache(ce, estimated_ttl_seconds=100, settled_ttl_seconds=1000, clock=clock)
+
+        cache.results_by_time("DAILY", "2026-10-01", "2026-10-05")
+        clock.now = 50
+        cache.results_by_time("DAILY", "2026-10-01", "2026-10-05")
+        clock.now = 150
+        cache.results_by_time("DAILY", "2026-10-01", "2026-10-05")
+
+        assert [c["TimePeriod"] for c in ce.calls] == [
+            {"Start": "2026-10-01", "End": "2026-10-05"},
+            {"Start": "2026-10-04", "End": "2026-10-05"},
+        ]
+
+    def test_partial_month_is_refetched_when_end_moves(self):
+        """月次の最終月は end が変わると取り直す"""
+        ce = FakeCostExplorer()
+        cache = CostCache(ce, clock=FakeClock())
+
+        cache.results_by_time("MONTHLY", "2026-08-01", "2026-10-16")
+        results = cache.results_by_time("MONTHLY", "2026-08-01", "2026-10-17")
+
+        assert ce.calls[1]["TimePeriod"] == {"Start": "2026-10-01", "End": "2026-10-17"}
+        assert results[-1]["TimePeriod"] == {"Start": "2026-10-01", "End": "2026-10-17"}
+        assert len(results) == 3
+
+    def test_follows_next_page_token(self):
+        ce = FakeCostExplorer(page_size=2)
+        cache = CostCache(ce, clock=FakeClock())
+
+        results = cache.results_by_time("DAILY", "2026-10-01", "2026-10-06")
+
+        assert len(results) == 5
+        assert [c.get("NextPageToken") for c in ce.calls] == [None, "2", "4"]
+
+    def test_groups_split_across_pages_are_merged(self):
+        """同じ期間のグループが複数ページに分かれても1件にまとめる"""
+        period = {"Start": "2026-10-01", "End": "2026-10-02"}
+        client = MagicMock()
+        client.get_cost_and_usage.side_effect = [
+            {"ResultsByTime": [{"TimePeriod": period, "Groups": [{"Keys": ["EC2"]}]}], "NextPageToken": "t"},
+            {"ResultsByTime": [{"TimePeriod": period, "Groups": [{"Keys": ["S3"]}]}]},
+        ]
+        cache = CostCache(client, clock=FakeClock())
+
+        results = cache.results_by_time("DAILY", "2026-10-01", "2026-10-02", "SERVICE")
+
+        assert [g["Keys"][0] for g in results[0]["Groups"]] == ["EC2", "S3"]
+
+    def test_file_store_is_shared_across_instances(self, tmp_path):
+        """永続化先があれば別プロセス（別インスタンス）でもキャッシュを使う"""
+        path = str(tmp_path / "cost_cache.json")
+        ce = FakeCostExplorer()
+
+        CostCache(ce, store=JsonFileStore(path), clock=FakeClock()).results_by_time(
+            "DAILY", "2026-10-01", "2026-10-03"
+        )
+        results = CostCache(ce, store=JsonFileStore(path), clock=FakeClock()).results_by_time(
+            "DAILY", "2026-10-01", "2026-10-03"
+        )
+
+        assert len(results) == 2
+        assert len(ce.calls) == 1
+
+    def test_store_failure_falls_back_to_memory(self):
+        store = MagicMock()
+        store.load.side_effect = OSError("unavailable")
+        store.save.side_effect = OSError("unavailable")
+        ce = FakeCostExplorer()
+        cache = CostCache(ce, store=store, clock=FakeClock())
+
+        cache.results_by_time("DAILY", "2026-10-01", "2026-10-03")
+        results = cache.results_by_time("DAILY", "2026-10-01", "2026-10-03")
+
+        assert len(results) == 2
+        assert len(ce.calls) == 1
+
+    def test_client_error_propagates(self):
+        client = MagicMock()
+        client.get_cost_and_usage.side_effect = RuntimeError("AccessDenied")
+        cache = CostCache(client, clock=FakeClock())
+
+        with pytest.raises(RuntimeError):
+            cache.results_by_time("DAILY", "2026-10-01", "2026-10-03")
+
+    def test_store_is_reread_when_memory_is_stale(self, tmp_path):
+        """別インスタンスが取得して保存した期間は、メモリに無くても取得し直さない"""
+        path = str(tmp_path / "cost_cache.json")
+        ce = FakeCostExplorer()
+        first = CostCache(ce, store=JsonFileStore(path), clock=FakeClock())
+        second = CostCache(ce, store=JsonFileStore(path), clock=FakeClock())
+
+        first.results_by_time("DAILY", "2026-10-01", "2026-10-03")
+        second.results_by_time("DAILY", "2026-10-01", "2026-10-04")
+        results = first.results_by_time("DAILY", "2026-10-01", "2026-10-04")
+
+        assert _starts(results) == ["2026-10-01", "2026-10-02", "2026-10-03"]
+        assert [c["TimePeriod"] for c in ce.calls] == [
+            {"Start": "2026-10-01", "End": "2026-10-03"},
+            {"Start": "2026-10-03", "End": "2026-10-04"},
+        ]
+
+    def test_fetch_does_not_block_other_keys(self):
+        """取得中のキーがあっても、キャッシュ済みの別のキーはすぐに返る"""
+        ce = FakeCostExplorer()
+        cache = CostCache(ce, clock=FakeClock())
+        cache.results_by_time("DAILY", "2026-10-01", "2026-10-03")
+
+        entered, release = threading.Event(), threading.Event()
+        slow = MagicMock()
+
+        def _slow_fetch(**kwargs):
+            entered.set()
+            release.wait(5)
+            return ce.get_cost_and_usage(**kwargs)
+
+        slow.get_cost_and_usage.side_effect = _slow_fetch
+        cache._client = slow
+        worker = threading.Thread(
+            target=cache.results_by_time, args=("DAILY", "2026-10-01", "2026-10-03", "SERVICE")
+        )
+        worker.start()
+        try:
+            assert entered.wait(5)
+            done = threading.Event()
+            threading.Thread(
+                target=lambda: (cache.results_by_time("DAILY", "2026-10-01", "2026-10-03"), done.set())
+            ).start()
+            assert done.wait(1)
+        finally:
+            release.set()
+            worker.join(5)
@@ -0,0 +1,130 @@
+"""datasets.py と get_aws_cost のデータハンドルのテスト"""
+
+import json
+from unittest.mock import MagicMock, patch
+
+from src.agent import aws_cost
+from src.agent.datasets import DatasetStore, dataset_load_code
+
+
+OWNER = ("owner", "s1")
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestDatasetStore:
+    """DatasetStore: CSV で保持し、参照ID で取り出す"""
+
+    def test_put_stores_compact_csv(self):
+        store = DatasetStore(clock=FakeClock())
+
+        dataset = store.put("cost", ["start", "cost"], [("2026-10-01", 1.5), ("2026-10-02", 2.0)], owner=OWNER)
+
+        assert dataset.csv_text == "start,cost\n2026-10-01,1.5\n2026-10-02,2.0\n"
+        assert store.get(dataset.dataset_id, owner=OWNER) is dataset
+        assert dataset.handle() == {
+            "dataset_id": dataset.dataset_id,
+            "name": "cost",
+            "columns": ["start", "cost"],
+            "rows": 2,
+        }
+
+    def test_expired_dataset_is_gone(self):
+        clock = FakeClock()
+        store = DatasetStore(ttl_seconds=100, clock=clock)
+        dataset = store.put("cost", ["cost"], [(1,)], owner=OWNER)
+
+        clock.now = 101
+
+        assert store.get(dataset.dataset_id, owner=OWNER) is None
+
+    def test_other_conversation_cannot_get_dataset(self):
+        """参照ID を知っていても、別の会話・別のユーザーからは取り出せない"""
+        store = DatasetStore(clock=FakeClock())
+        dataset = store.put("cost", ["cost"], [(1,)], owner=OWNER)
+
+        assert store.get(dataset.dataset_id, owner=("owner", "s2")) is None
+        assert store.get(dataset.dataset_id, owner=("other", "s1")) is None
+        assert store.get(dataset.dataset_id, owner=OWNER) is dataset
+
+    def test_overflow_drops_least_recently_used(self):
+        store = DatasetStore(max_entries=2, clock=FakeClock())
+        a = store.put("a", ["x"], [], owner=OWNER)
+        b = store.put("b", ["x"], [], owner=OWNER)
+        store.get(a.dataset_id, owner=OWNER)
+        store.put("c", ["x"], [], owner=OWNER)
+
+        assert store.get(b.dataset_id, owner=OWNER) is None
+        assert store.get(a.dataset_id, owner=OWNER) is a
+
+    def test_load_code_reads_each_dataset(self):
+        store = DatasetStore(clock=FakeClock())
+        dataset = store.put("cost", ["start", "cost"], [], parse_dates=["start"], owner=OWNER)
+
+        code = dataset_load_code([dataset])
+
+        assert f"datasets[{dataset.dataset_id!r}] = _pd.read_csv({dataset.path!r}, parse_dates=['start'])" in code
+        compile(code, "<load>", "exec")
+
+
+def _result(start, end, groups):
+    return {
+        "TimePeriod": {"Start": start, "End": end},
+        "Groups": [
+            {"Keys": [name], "Metrics": {"UnblendedCost": {"Amount": str(amount), "Unit": "USD"}}}
+            for name, amount in groups
+        ],
+    }
+
+
+class TestGetAwsCostDataset:
+    """get_aws_cost: データはデータセットに保存し、参照ID と要約だけを返す"""
+
+    def test_returns_dataset_handle_and_summary(self):
+        results = [
+            _result("2026-09-01", "2026-10-01", [("Amazon Bedrock", 10.0), ("AWS Lambda", 0.001)]),
+            _result("2026-10-01", "2026-10-17", [("Amazon Bedrock", 4.5), ("Amazon S3", 1.25)]),
+        ]
+        tool_context = MagicMock(invocation_state={"actor_id": "owner", "session_id": "s1"})
+        with patch.object(aws_cost._cost_cache, "results_by_time", return_value=results):
+            response = json.loads(
+                aws_cost.get_aws_cost._tool_func(period="monthly", months=2, tool_context=tool_context)
+            )
+
+        assert "data" not in response
+        assert response["columns"] == ["start", "end", "service", "cost"]
+        assert response["rows"] == 3
+        assert response["total"] == 15.75
+        assert response["totals"] == [
+            {"start": "2026-09-01", "total": 10.0},
+            {"start": "2026-10-01", "total": 5.75},
+        ]
+        assert list(response["top_services"]) == ["Amazon Bedrock", "Amazon S3"]
+
+        dataset = aws_cost.dataset_store.get(response["dataset_id"], owner=OWNER)
+        assert dataset.csv_text.splitlines() == [
+            "start,end,service,cost",
+            "2026-09-01,2026-10-01,Amazon Bedrock,10.0",
+            "2026-10-01,2026-10-17,Amazon Bedrock,4.5",
+            "2026-10-01,2026-10-17,Amazon S3,1.25",
+        ]
+        assert dataset.parse_dates == ["start", "end"]
+
+    def test_long_daily_range_omits_inline_totals(self):
+        results = [
+            _result(f"2026-{m:02d}-{d:02d}", f"2026-{m:02d}-{d + 1:02d}", [("Amazon S3", 1.0)])
+            for m in (8, 9)
+            for d in range(1, 28)
+        ]
+        with patch.object(aws_cost._cost_cache, "results_by_time", return_value=results):
+            response = json.loads(aws_cost.get_aws_cost._tool_func(period="daily", months=2))
+
+        assert "totals" not in response
+        assert response["rows"] == 54
+        assert response["total"] == 54.0
@@ -0,0 +1,119 @@
+"""gateway_connection.py のユニットテスト"""
+
+from unittest.mock import MagicMock
+
+import pytest
+
+from src.agent.gateway_connection import GatewayConnection
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _tool(name):
+    t = MagicMock()
+    t.tool_name = name
+    return t
+
+
+CATALOG = [
+    _tool("TavilySearch___TavilySearchPost"),
+    _tool("task-tool___list_tasks"),
+    _tool("diary-tool___save_diary"),
+    _tool("perfume-search___search_perfumes"),
+    _tool("DateTool___get_current_datetime"),
+]
+
+
+@pytest.fixture
+def client():
+    c = MagicMock()
+    c.list_tools_sync.return_value = CATALOG
+    return c
+
+
+def _connection(client, clock=None, ttl=60):
+    return GatewayConnection(
+        "https://example.com/mcp",
+        "ap-northeast-1",
+        catalog_ttl_seconds=ttl,
+        client_factory=lambda url, region: client,
+        clock=clock or FakeClock(),
+    )
+
+
+class TestGatewayConnection:
+    """GatewayConnection: 共有MCPClientとツールカタログのキャッシュ"""
+
+    def test_catalog_is_cached_within_ttl(self, client):
+        """TTL内はlist_tools_syncを再実行しない"""
+        conn = _connection(client)
+        conn.list_tools()
+        conn.tools_with_prefixes({"TavilySearch"})
+        conn.tool_map(excluded={"perfume-search___search_perfumes"})
+
+        client.start.assert_called_once()
+        client.list_tools_sync.assert_called_once()
+
+    def test_prefix_view(self, client):
+        """パイプライン用のプレフィックス絞り込み"""
+        conn = _connection(client)
+        names = [t.tool_name for t in conn.tools_with_prefixes({"TavilySearch"})]
+        assert names == ["TavilySearch___TavilySearchPost"]
+
+    def test_tool_map_applies_exclusion_and_buckets(self, client):
+        """除外ツールを除いたうえでsplit_mcp_toolsのバケットに分割する"""
+        conn = _connection(client)
+        tool_map = conn.tool_map(excluded={"perfume-search___search_perfumes"})
+
+        main_names = [t.tool_name for t in tool_map["main"]]
+        assert "perfume-search___search_perfumes" not in main_names
+        assert "TavilySearch___TavilySearchPost" in main_names
+        assert [t.tool_name for t in tool_map["task"]] == ["task-tool___list_tasks"]
+        assert [t.tool_name for t in tool_map["diary"]] == ["diary-tool___save_diary"]
+
+    def test_views_are_copies(self, client):
+        """返却したリストを変更してもキャッシュに影響しない"""
+        conn = _connection(client)
+        conn.tool_map()["main"].clear()
+        assert conn.tool_map()["main"]
+
+    def test_stale_catalog_refreshes_in_background(self, client):
+        """TTL切れ時は古いカタログを返しつつバックグラウンドで再取得する"""
+        clock = FakeClock()
+        conn = _connection(client, clock=clock, ttl=60)
+        conn.list_tools()
+
+        clock.now = 120
+        tools = conn.list_tools()
+        conn._refresh_thread.join(timeout=5)
+
+        assert len(tools) == len(CATALOG)
+        assert client.list_tools_sync.call_count == 2
+        client.start.assert_called_once()
+
+    def test_reconnects_once_on_failure(self, client):
+        """list_tools_sync失敗時は同じMCPClientで再接続して再試行する"""
+        client.list_tools_sync.side_effect = [RuntimeError("session closed"), CATALOG]
+        conn = _connection(client)
+
+        tools = conn.refresh()
+
+        assert len(tools) == len(CATALOG)
+        client.stop.assert_called_once_with(None, None, None)
+        assert client.start.call_count == 2
+
+    def test_close_stops_client(self, client):
+        """closeでMCPClientを停止し、次回は再接続する"""
+        conn = _connection(client)
+        conn.list_tools()
+        conn.close()
+        client.stop.assert_called_once()
+
+        conn.list_tools()
+        assert client.start.call_count == 2
@@ -0,0 +1,140 @@
+"""google_auth.py のユニットテスト"""
+
+import io
+import json
+import urllib.error
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.agent import google_auth, secrets_cache
+
+
+def _ssm_response(keys=google_auth.CREDENTIAL_KEYS):
+    return {
+        "Parameters": [
+            {"Name": f"{google_auth.SSM_PREFIX}/{k}", "Value": f"{k}-value"} for k in keys
+        ],
+        "InvalidParameters": [
+            f"{google_auth.SSM_PREFIX}/{k}"
+            for k in google_auth.CREDENTIAL_KEYS if k not in keys
+        ],
+    }
+
+
+def _token_response(token, expires_in=3600):
+    resp = MagicMock()
+    resp.read.return_value = json.dumps(
+        {"access_token": token, "expires_in": expires_in}
+    ).encode("utf-8")
+    resp.__enter__.return_value = resp
+    return resp
+
+
+@pytest.fixture(autouse=True)
+def reset_cache():
+    google_auth.invalidate_access_token()
+    google_auth._service_cache.__dict__.clear()
+    yield
+    google_auth.invalidate_access_token()
+
+
+@pytest.fixture
+def ssm():
+    client = MagicMock()
+    client.get_parameters.return_value = _ssm_response()
+    cache = secrets_cache.SecretsCache(client_factory=lambda: client)
+    with patch.object(secrets_cache, "_default_cache", cache):
+        yield client
+
+
+class TestGetAccessToken:
+    """get_access_token: expires_in までキャッシュし、期限前に更新する"""
+
+    def test_credentials_fetched_in_one_call(self, ssm):
+        """SSMは get_parameters 1回で3つのパラメータを取得する"""
+        with patch("urllib.request.urlopen", return_value=_token_response("t1")):
+            google_auth.get_access_token()
+
+        ssm.get_parameters.assert_called_once()
+        names = ssm.get_parameters.call_args.kwargs["Names"]
+        assert len(names) == 3
+
+    def test_cached_until_near_expiry(self, ssm):
+        """期限内なら再取得しない。マージン内に入ったら更新する"""
+        with patch("urllib.request.urlopen", side_effect=[
+            _token_response("t1", 3600), _token_response("t2", 3600),
+        ]) as urlopen, patch.object(google_auth.time, "time", return_value=1000.0) as now:
+            assert google_auth.get_access_token() == "t1"
+            now.return_value = 1000.0 + 3600 - google_auth.TOKEN_REFRESH_MARGIN_SECONDS - 1
+            assert google_auth.get_access_token() == "t1"
+            assert urlopen.call_count == 1
+
+            now.return_value = 1000.0 + 3600 - google_auth.TOKEN_REFRESH_MARGIN_SECONDS + 1
+            assert google_auth.get_access_token() == "t2"
+            assert urlopen.call_count == 2
+
+    def test_invalidate_forces_refresh(self, ssm):
+        """invalidate_access_token 後は次回呼び出しで取り直す"""
+        with patch("urllib.request.urlopen", side_effect=[
+            _token_response("t1"), _token_response("t2"),
+        ]):
+            assert google_auth.get_access_token() == "t1"
+            google_auth.invalidate_access_token()
+            assert google_auth.get_access_token() == "t2"
+
+    def test_missing_parameter_raises(self, ssm):
+        """パラメータが欠けていればRuntimeError"""
+        ssm.get_parameters.return_value = _ssm_response(("client_id", "client_secret"))
+        with pytest.raises(RuntimeError, match="SSM"):
+            google_auth.get_access_token()
+
+
+    def test_token_endpoint_error_rereads_credentials(self, ssm):
+        """トークン更新に失敗したらSSMのキャッシュを破棄し、次回は再読込する"""
+        error = urllib.error.HTTPError(
+            google_auth.GOOGLE_TOKEN_ENDPOINT, 400, "Bad Request", {}, io.BytesIO(b"invalid_grant")
+        )
+        with patch("urllib.request.urlopen", side_effect=[error, _token_response("t1")]):
+            with pytest.raises(RuntimeError, match="Google認証エラー"):
+                google_auth.get_access_token()
+            assert google_auth.get_access_token() == "t1"
+
+        assert ssm.get_parameters.call_count == 2
+
+
+class TestServiceCache:
+    """サービスオブジェクトはトークンが変わるまで使い回す"""
+
+    def test_service_reused_until_token_changes(self, ssm):
+        with patch("urllib.request.urlopen", side_effect=[
+            _token_response("t1"), _token_response("t2"),
+        ]), patch.object(google_auth, "build_from_document", side_effect=lambda *a, **k: object()) as build:
+            s1 = google_auth.get_calendar_service()
+            s2 = google_auth.get_calendar_service()
+            assert s1 is s2
+            assert build.call_count == 1
+
+            google_auth.invalidate_access_token()
+            s3 = google_auth.get_calendar_service()
+            assert s3 is not s1
+            assert build.call_count == 2
+
+    def test_vendored_documents_build(self):
+        """同梱のディスカバリドキュメントから使用するメソッドを構築できる"""
+        calendar = google_auth.build_from_document(
+            google_auth._load_discovery_document("calendar", "v3"),
+            credentials=google_auth.Credentials(token="t"),
+        )
+        gmail = google_auth.build_from_document(
+            google_auth._load_discovery_document("gmail", "v1"),
+            credentials=google_auth.Credentials(token="t"),
+        )
+
+        for method in ("list", "get", "insert", "update", "delete"):
+            assert hasattr(calendar.events(), method)
+        assert hasattr(calendar.freebusy(), "query")
+        messages = gmail.users().messages()
+        for method in ("list", "get", "send", "modify"):
+            assert hasattr(messages, method)
+        assert hasattr(gmail.users().drafts(), "create")
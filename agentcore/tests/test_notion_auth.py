@@ -0,0 +1,74 @@
+"""notion_auth.py のユニットテスト"""
+
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from src.agent import notion_auth
+
+
+@pytest.fixture(autouse=True)
+def reset_cache():
+    notion_auth.invalidate_api_key()
+    yield
+    notion_auth.invalidate_api_key()
+
+
+@pytest.fixture
+def identity():
+    client = MagicMock()
+    client.get_api_key = AsyncMock(side_effect=lambda **kw: f"key-for-{kw['agent_identity_token']}")
+    with patch.object(notion_auth, "_get_identity_client", return_value=client), \
+            patch.object(notion_auth, "_get_workload_token", return_value="wt-1") as token:
+        yield client, token
+
+
+class TestApiKeyCache:
+    """APIキーはワークロードトークン単位でTTLキャッシュする"""
+
+    def test_cached_per_workload_token(self, identity):
+        client, token = identity
+        assert notion_auth.get_api_key() == "key-for-wt-1"
+        assert notion_auth.get_api_key() == "key-for-wt-1"
+        assert client.get_api_key.await_count == 1
+
+        token.return_value = "wt-2"
+        assert notion_auth.get_api_key() == "key-for-wt-2"
+        assert client.get_api_key.await_count == 2
+
+    def test_expires_after_ttl(self, identity):
+        client, _ = identity
+        with patch.object(notion_auth.time, "monotonic", return_value=0.0) as now:
+            notion_auth.get_api_key()
+            now.return_value = notion_auth.API_KEY_CACHE_TTL_SECONDS + 1
+            notion_auth.get_api_key()
+        assert client.get_api_key.await_count == 2
+
+    def test_fetch_error_is_wrapped(self, identity):
+        client, _ = identity
+        client.get_api_key.side_effect = ValueError("denied")
+        with pytest.raises(RuntimeError, match="Notion認証エラー"):
+            notion_auth.get_api_key()
+
+
+class TestClientReuse:
+    """Notionクライアントは同じAPIキーの間は使い回す"""
+
+    def test_client_reused_until_invalidated(self, identity):
+        first = notion_auth.get_notion_client()
+        assert notion_auth.get_notion_client() is first
+
+        notion_auth.invalidate_api_key()
+        assert notion_auth.get_notion_client() is not first
+
+    def test_replaced_client_is_not_closed(self, identity):
+        """キーが変わっても古いクライアントは閉じない（他スレッドが使用中の可能性がある）"""
+        _, token = identity
+        first = notion_auth.get_notion_client()
+        with patch.object(first, "close") as close:
+            token.return_value = "wt-2"
+            second = notion_auth.get_notion_client()
+            notion_auth.invalidate_api_key()
+
+        assert second is not first
+        close.assert_not_called()
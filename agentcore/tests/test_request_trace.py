@@ -0,0 +1,153 @@
+"""request_trace.py のリクエストトレースのテスト"""
+
+import json
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+import app
+from src.agent import request_trace
+from src.agent.agent_pool import PooledAgent
+
+
+@pytest.fixture
+def jsonl_trace(tmp_path):
+    """JSON Linesエクスポーターだけを持つトレースと出力ファイルのパス"""
+    path = tmp_path / "trace.jsonl"
+    trace = request_trace.RequestTrace(
+        exporters=[request_trace.JsonLinesExporter(str(path))],
+        session_id="s1",
+        mode="chat",
+    )
+    return trace, path
+
+
+def _read_records(path) -> list[dict]:
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+def _fake_agent(name: str):
+    usage = {"inputTokens": 0, "outputTokens": 0, "totalTokens": 0, "cacheReadInputTokens": 0}
+    return SimpleNamespace(name=name, event_loop_metrics=SimpleNamespace(accumulated_usage=usage))
+
+
+class TestRequestTrace:
+    """RequestTrace: 区間を記録し、終了時にサマリーを1件出力する"""
+
+    def test_finish_exports_one_summary_line(self, jsonl_trace):
+        """finishごとにサマリーが1行追記される"""
+        trace, path = jsonl_trace
+        with trace.activate():
+            with request_trace.span("agent.get_or_create") as span:
+                span.set_attribute("pool_hit", True)
+        trace.mark_first_token()
+        trace.finish()
+
+        records = _read_records(path)
+        assert len(records) == 1
+        record = records[0]
+        assert record["request_id"] == trace.request_id
+        assert record["session_id"] == "s1"
+        assert record["mode"] == "chat"
+        assert record["first_token_ms"] is not None
+        assert [s["name"] for s in record["spans"]] == ["agent.get_or_create"]
+        assert record["spans"][0]["pool_hit"] is True
+
+    def test_span_records_error(self, jsonl_trace):
+        """区間内の例外はエラーとして記録され、そのまま送出される"""
+        trace, _ = jsonl_trace
+        with trace.activate(), pytest.raises(RuntimeError):
+            with request_trace.span("gateway.tool_map"):
+                raise RuntimeError("boom")
+        assert trace.spans[0]["error"] == "boom"
+
+    def test_span_outside_request_is_not_recorded(self, jsonl_trace):
+        """トレースが有効でない場所の区間はサマリーに入らない"""
+        trace, _ = jsonl_trace
+        with request_trace.span("agent.build") as span:
+            span.set_attribute("pool_hit", False)
+        assert trace.spans == []
+
+    def test_exporter_failure_does_not_raise(self):
+        """エクスポーターの失敗はリクエストに影響しない"""
+        exporter = MagicMock()
+        exporter.export.side_effect = OSError("disk full")
+        trace = request_trace.RequestTrace(exporters=[exporter])
+        record = trace.finish()
+        assert record["error"] is None
+
+
+class TestTraceHooks:
+    """TraceHooks: Agent・モデル・ツール呼び出しを現在のトレースに記録する"""
+
+    def test_records_invocation_model_and_tool_calls(self, jsonl_trace):
+        """呼び出しごとの区間と、Agent呼び出し分のトークン差分を記録する"""
+        trace, path = jsonl_trace
+        hooks = request_trace.TraceHooks()
+        agent = _fake_agent("tonari")
+        # プールで使い回したAgentは前のリクエスト分の使用量を持っている
+        agent.event_loop_metrics.accumulated_usage.update(inputTokens=100, totalTokens=100)
+        tool_use = {"toolUseId": "t1", "name": "calendar_agent", "input": {}}
+
+        with trace.activate():
+            hooks._before_invocation(SimpleNamespace(agent=agent))
+            hooks._before_model_call(SimpleNamespace(agent=agent))
+            hooks._after_model_call(SimpleNamespace(agent=agent, exception=None))
+            hooks._before_tool_call(SimpleNamespace(agent=agent, tool_use=tool_use))
+            hooks._after_tool_call(
+                SimpleNamespace(agent=agent, tool_use=tool_use, result={"status": "success"})
+            )
+            hooks._before_model_call(SimpleNamespace(agent=agent))
+            hooks._after_model_call(SimpleNamespace(agent=agent, exception=None))
+            agent.event_loop_metrics.accumulated_usage.update(
+                inputTokens=130, outputTokens=20, totalTokens=150, cacheReadInputTokens=80
+            )
+            hooks._after_invocation(SimpleNamespace(agent=agent))
+        trace.finish()
+
+        record = _read_records(path)[0]
+        assert [s["name"] for s in record["spans"]] == [
+            "agent.prepare",
+            "model.call",
+            "tool.calendar_agent",
+            "model.call",
+            "agent.invoke",
+        ]
+        assert record["model_calls"] == 2
+        assert record["tool_calls"] == 1
+        assert record["usage"] == {
+            "inputTokens": 30,
+            "outputTokens": 20,
+            "totalTokens": 50,
+            "cacheReadInputTokens": 80,
+            "cacheWriteInputTokens": 0,
+        }
+
+    def test_hooks_without_request_are_noop(self):
+        """トレース外（単体実行など）では何も記録しない"""
+        hooks = request_trace.TraceHooks()
+        agent = _fake_agent("calendar_agent")
+        hooks._before_invocation(SimpleNamespace(agent=agent))
+        hooks._after_invocation(SimpleNamespace(agent=agent))
+        assert request_trace.current() is None
+
+
+class TestGetOrCreateAgentTrace:
+    """_get_or_create_agent: 構築とプールヒットを区間として記録する"""
+
+    def test_pool_hit_is_recorded(self, jsonl_trace):
+        trace, _ = jsonl_trace
+        with patch.object(app, "_build_agent", return_value=PooledAgent(agent=MagicMock())):
+            app._agent_pool.clear()
+            with trace.activate():
+                app._get_or_create_agent("trace-session", "actor")
+                app._get_or_create_agent("trace-session", "actor")
+            app._agent_pool.clear()
+
+        spans = [(s["name"], s.get("pool_hit")) for s in trace.spans]
+        assert spans == [
+            ("agent.build", None),
+            ("agent.get_or_create", False),
+            ("agent.get_or_create", True),
+        ]
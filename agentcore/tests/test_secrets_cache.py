@@ -0,0 +1,131 @@
+"""secrets_cache.py のユニットテスト"""
+
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+
+from src.agent.secrets_cache import ParameterNotFoundError, SecretsCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _response(values: dict, invalid=()):
+    return {
+        "Parameters": [{"Name": k, "Value": v} for k, v in values.items()],
+        "InvalidParameters": list(invalid),
+    }
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def ssm():
+    return MagicMock()
+
+
+@pytest.fixture
+def cache(ssm, clock):
+    return SecretsCache(
+        ttl_seconds=300, negative_ttl_seconds=30, client_factory=lambda: ssm, clock=clock
+    )
+
+
+class TestSecretsCache:
+    """SecretsCache: GetParametersのバッチ取得とTTLキャッシュ"""
+
+    def test_get_many_batches_into_one_call(self, cache, ssm):
+        """複数パラメータを1回のGetParametersで取得する"""
+        ssm.get_parameters.return_value = _response({"/a": "1", "/b": "2", "/c": "3"})
+
+        assert cache.get_many(["/a", "/b", "/c"]) == {"/a": "1", "/b": "2", "/c": "3"}
+        ssm.get_parameters.assert_called_once_with(Names=["/a", "/b", "/c"], WithDecryption=True)
+
+    def test_chunks_of_ten(self, cache, ssm):
+        """11件以上は10件ずつに分割して取得する"""
+        names = [f"/p{i}" for i in range(12)]
+        ssm.get_parameters.side_effect = lambda Names, WithDecryption: _response(
+            {n: n.upper() for n in Names}
+        )
+
+        assert len(cache.get_many(names)) == 12
+        assert [len(c.kwargs["Names"]) for c in ssm.get_parameters.call_args_list] == [10, 2]
+
+    def test_cached_within_ttl(self, cache, ssm, clock):
+        """TTL内はSSMを呼ばず、TTL後は取り直す"""
+        ssm.get_parameters.return_value = _response({"/a": "1"})
+        cache.get("/a")
+        clock.now = 299
+        cache.get("/a")
+        assert ssm.get_parameters.call_count == 1
+
+        clock.now = 301
+        cache.get("/a")
+        assert ssm.get_parameters.call_count == 2
+
+    def test_only_uncached_names_are_fetched(self, cache, ssm):
+        """キャッシュ済みの名前は再取得しない"""
+        ssm.get_parameters.side_effect = lambda Names, WithDecryption: _response(
+            {n: "v" for n in Names}
+        )
+        cache.get("/a")
+        cache.get_many(["/a", "/b"])
+
+        assert ssm.get_parameters.call_args.kwargs["Names"] == ["/b"]
+
+    def test_missing_parameter_is_negatively_cached(self, cache, ssm, clock):
+        """存在しないパラメータは負のTTLの間SSMを呼ばずに失敗する"""
+        ssm.get_parameters.return_value = _response({}, invalid=["/missing"])
+
+        for _ in range(2):
+            with pytest.raises(ParameterNotFoundError):
+                cache.get("/missing")
+        assert ssm.get_parameters.call_count == 1
+
+        clock.now = 31
+        ssm.get_parameters.return_value = _response({"/missing": "now-here"})
+        assert cache.get("/missing") == "now-here"
+
+    def test_ssm_error_is_negatively_cached(self, cache, ssm, clock):
+        """SSMの例外も負のTTLの間は再送せずに同じ例外を返す"""
+        ssm.get_parameters.side_effect = RuntimeError("throttled")
+
+        for _ in range(2):
+            with pytest.raises(RuntimeError, match="throttled"):
+                cache.get("/a")
+        assert ssm.get_parameters.call_count == 1
+
+    def test_invalidate(self, cache, ssm):
+        """invalidate / invalidate_prefix で次回は取り直す"""
+        ssm.get_parameters.side_effect = lambda Names, WithDecryption: _response(
+            {n: "v" for n in Names}
+        )
+        cache.get_many(["/x/a", "/x/b", "/y/c"])
+
+        cache.invalidate("/x/a")
+        cache.get_many(["/x/a", "/x/b", "/y/c"])
+        assert ssm.get_parameters.call_args.kwargs["Names"] == ["/x/a"]
+
+        cache.invalidate_prefix("/x/")
+        cache.get_many(["/x/a", "/x/b", "/y/c"])
+        assert ssm.get_parameters.call_args.kwargs["Names"] == ["/x/a", "/x/b"]
+
+
+class TestLambdaLayerCopy:
+    """agentcore のコピーと Lambda レイヤーの secrets_cache.py を揃える"""
+
+    def test_copies_are_identical(self):
+        repo = Path(__file__).resolve().parents[2]
+        agentcore_copy = repo / "agentcore" / "src" / "agent" / "secrets_cache.py"
+        layer_copy = repo / "infra" / "lambda" / "shared" / "secrets_cache.py"
+
+        assert agentcore_copy.read_text(encoding="utf-8") == layer_copy.read_text(encoding="utf-8")
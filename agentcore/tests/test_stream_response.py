@@ -0,0 +1,63 @@
+"""app._stream_response の画像送出のテスト"""
+
+import asyncio
+from unittest.mock import MagicMock
+
+import app
+import src.agent.code_interpreter as code_interpreter
+
+
+def _image_agent(count: int, delivered: list):
+    """ワーカースレッドから画像を count 枚送ってからテキストを返すAgent"""
+    agent = MagicMock()
+
+    async def _stream_async(content, invocation_state=None):
+        queue = code_interpreter._image_queue.get()
+
+        def _upload():
+            for i in range(count):
+                delivered.append(queue.put({"url": f"https://s3/fig{i}.png"}, timeout=5))
+
+        await asyncio.to_thread(_upload)
+        yield {"data": "done"}
+
+    agent.stream_async = _stream_async
+    return agent
+
+
+class TestStreamResponseImages:
+    """_stream_response: 上限付きの画像キューから直接レスポンスに送る"""
+
+    def test_uploads_wait_for_the_client(self, monkeypatch):
+        """クライアントが読まない間、上限を超えた画像の put は待たされる"""
+        monkeypatch.setattr(app, "ImageQueue", lambda loop: code_interpreter.ImageQueue(loop, maxsize=1))
+        delivered = []
+
+        async def _main():
+            stream = app._stream_response(_image_agent(4, delivered), "hi")
+            first = await stream.__anext__()
+            await asyncio.sleep(0.2)
+            # 1枚は送出済み、1枚は次の送出待ち、1枚はキュー内で、4枚目の put は待っている
+            pending = len(delivered)
+            rest = [item async for item in stream]
+            return first, pending, rest
+
+        first, pending, rest = asyncio.run(_main())
+
+        assert first == {"type": "image", "url": "https://s3/fig0.png"}
+        assert pending == 3
+        assert [i["url"] for i in rest if isinstance(i, dict)] == [f"https://s3/fig{i}.png" for i in range(1, 4)]
+        assert rest[-1] == "done"
+        assert delivered == [True] * 4
+
+    def test_client_leaving_early_does_not_block_the_run(self):
+        delivered = []
+
+        async def _main():
+            stream = app._stream_response(_image_agent(20, delivered), "hi")
+            await stream.__anext__()
+            await asyncio.wait_for(stream.aclose(), timeout=5)
+
+        asyncio.run(_main())
+
+        assert len(delivered) == 20
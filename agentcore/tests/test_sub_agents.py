@@ -0,0 +1,272 @@
+"""sub_agents.py のサブエージェントレジストリのテスト"""
+
+import asyncio
+from unittest.mock import MagicMock, patch
+
+import pytest
+from strands.telemetry.metrics import EventLoopMetrics
+
+import src.agent.sub_agents as sub_agents
+import src.agent.tool_progress as tool_progress
+
+
+@pytest.fixture
+def mock_agent_cls():
+    """Agent生成をモック化し、生成されたインスタンスを記録する"""
+    created = []
+
+    def _make(**kwargs):
+        agent = MagicMock()
+        agent.kwargs = kwargs
+        agent.messages = []
+        agent.calls = []
+        agent.event_loop_metrics = EventLoopMetrics()
+        agent.trace_counts = []
+
+        async def _invoke_async(message):
+            agent.calls.append(message)
+            # 実際のAgentと同じく、呼び出しごとにトレースと呼び出し記録が増える
+            metrics = agent.event_loop_metrics
+            metrics.traces.append(MagicMock())
+            metrics.agent_invocations.append(MagicMock())
+            agent.trace_counts.append((len(metrics.traces), len(metrics.agent_invocations)))
+            return "ok"
+
+        agent.invoke_async = _invoke_async
+        created.append(agent)
+        return agent
+
+    with (
+        patch.object(sub_agents, "Agent", side_effect=_make),
+        patch.object(sub_agents, "_create_sub_agent_model", return_value=MagicMock()),
+    ):
+        sub_agents._registry.clear()
+        yield created
+        sub_agents._registry.clear()
+
+
+def _run_tool(agent_tool, request: str, **invocation_state) -> str:
+    """サブエージェントツール（非同期関数）を実行して結果を返す"""
+    tool_context = MagicMock(invocation_state=invocation_state)
+    return asyncio.run(agent_tool._tool_func(request, tool_context=tool_context))
+
+
+def _mcp_tool(name: str):
+    t = MagicMock()
+    t.tool_name = name
+    return t
+
+
+class TestSubAgentRegistry:
+    """SubAgentRegistry: サブエージェントを使い回し、呼び出しごとに履歴をリセットする"""
+
+    def test_agent_is_built_once_and_reused(self, mock_agent_cls):
+        """同じドメインの2回目以降の呼び出しはAgentを再構築しない"""
+        _run_tool(sub_agents.calendar_agent, "今日の予定は？")
+        _run_tool(sub_agents.calendar_agent, "明日の予定は？")
+
+        assert len(mock_agent_cls) == 1
+        assert len(mock_agent_cls[0].calls) == 2
+
+    def test_messages_are_reset_between_calls(self, mock_agent_cls):
+        """呼び出し後に会話履歴がリセットされる"""
+        _run_tool(sub_agents.gmail_agent, "未読メールを確認して")
+        agent = mock_agent_cls[0]
+        agent.messages = [{"role": "user", "content": [{"text": "leftover"}]}]
+
+        with sub_agents._registry.acquire("gmail") as reused:
+            assert reused is agent
+            reused.messages.append({"role": "user", "content": []})
+        assert agent.messages == []
+
+    def test_metrics_do_not_grow_across_reuse(self, mock_agent_cls):
+        """同じAgentを何度使い回しても、トレースと呼び出し記録は1回分を超えない"""
+        for i in range(10):
+            _run_tool(sub_agents.calendar_agent, f"予定{i}")
+
+        agent = mock_agent_cls[0]
+        assert len(mock_agent_cls) == 1
+        assert agent.trace_counts == [(1, 1)] * 10
+        assert agent.event_loop_metrics.traces == []
+        assert agent.event_loop_metrics.agent_invocations == []
+
+    def test_idle_agent_expires_after_ttl(self, mock_agent_cls):
+        now = [0.0]
+        registry = sub_agents.SubAgentRegistry(sub_agents._registry._specs, idle_ttl_seconds=100, clock=lambda: now[0])
+        with registry.acquire("gmail") as first:
+            pass
+        now[0] = 50
+        with registry.acquire("gmail") as second:
+            pass
+        now[0] = 200
+        with registry.acquire("gmail") as third:
+            pass
+
+        assert second is first
+        assert third is not first
+        assert registry.idle_count() == 1
+
+    def test_agent_is_dropped_after_max_uses(self, mock_agent_cls):
+        registry = sub_agents.SubAgentRegistry(sub_agents._registry._specs, max_uses=2)
+        agents = []
+        for _ in range(3):
+            with registry.acquire("gmail") as agent:
+                agents.append(agent)
+
+        assert agents[1] is agents[0]
+        assert agents[2] is not agents[0]
+
+    def test_datetime_header_is_in_message_not_system_prompt(self, mock_agent_cls):
+        """現在日時はシステムプロンプトではなくユーザーメッセージに付与される"""
+        _run_tool(sub_agents.calendar_agent, "今日の予定は？")
+        agent = mock_agent_cls[0]
+
+        assert "現在日時" not in agent.kwargs["system_prompt"]
+        message = agent.calls[0]
+        assert message.startswith("現在日時: ")
+        assert message.endswith("今日の予定は？")
+
+    def test_task_agent_is_built_per_actor(self, mock_agent_cls):
+        """タスクエージェントはactor_idごとに別インスタンスを構築する"""
+        with sub_agents._registry.acquire("task", "owner-a") as a:
+            assert "user_id: owner-a" in a.kwargs["system_prompt"]
+        with sub_agents._registry.acquire("task", "owner-b") as b:
+            assert "user_id: owner-b" in b.kwargs["system_prompt"]
+        with sub_agents._registry.acquire("task", "owner-a") as a2:
+            pass
+
+        assert a is not b
+        assert a is a2
+
+    def test_concurrent_acquire_builds_separate_instances(self, mock_agent_cls):
+        """借り出し中に同じドメインを要求した場合は別インスタンスを構築する"""
+        with sub_agents._registry.acquire("intro") as first:
+            with sub_agents._registry.acquire("intro") as second:
+                assert first is not second
+        assert len(mock_agent_cls) == 2
+
+    def test_different_tools_get_separate_agents(self, mock_agent_cls):
+        """ツール構成が異なる呼び出し元には別のサブエージェントを使う"""
+        diary_tool = _mcp_tool("diary-tool___save_diary")
+        _run_tool(sub_agents.diary_agent, "日記を書きたい", sub_agent_tools={"diary": []})
+        _run_tool(sub_agents.diary_agent, "日記を書きたい", sub_agent_tools={"diary": [diary_tool]})
+        _run_tool(sub_agents.diary_agent, "日記を書きたい", sub_agent_tools={"diary": [diary_tool]})
+
+        assert len(mock_agent_cls) == 2
+        assert mock_agent_cls[1].kwargs["tools"] == [diary_tool]
+
+    def test_actor_and_tools_come_from_each_request(self, mock_agent_cls):
+        """同時に走る別ユーザーのリクエストは、それぞれ自分のactor_idとツールでタスクエージェントを使う"""
+        tools_a = [_mcp_tool("task-tool___list_tasks_a")]
+        tools_b = [_mcp_tool("task-tool___list_tasks_b")]
+
+        async def _main():
+            return await asyncio.gather(
+                sub_agents.task_agent._tool_func(
+                    "タスク一覧",
+                    tool_context=MagicMock(invocation_state={"actor_id": "owner-a", "sub_agent_tools": {"task": tools_a}}),
+                ),
+                sub_agents.task_agent._tool_func(
+                    "タスク一覧",
+                    tool_context=MagicMock(invocation_state={"actor_id": "owner-b", "sub_agent_tools": {"task": tools_b}}),
+                ),
+            )
+
+        asyncio.run(_main())
+
+        built = {a.kwargs["system_prompt"].rsplit("user_id: ", 1)[1]: a.kwargs["tools"] for a in mock_agent_cls}
+        assert built == {"owner-a": tools_a, "owner-b": tools_b}
+
+
+class TestSubAgentProgress:
+    """サブエージェントツール: 内部ツールの進捗をリクエストの進捗出力先に送る"""
+
+    def test_nested_tool_progress_and_result(self, mock_agent_cls):
+        """内部ツールの開始・終了と完了時のトークン使用量を送出し、応答を返す"""
+        with sub_agents._registry.acquire("calendar") as agent:
+            pass
+        assert mock_agent_cls[0].kwargs["callback_handler"] is tool_progress.callback_handler
+
+        async def _invoke_async(message):
+            handler = tool_progress.callback_handler
+            handler(current_tool_use={"toolUseId": "t1", "name": "calendar_list_events"})
+            handler(current_tool_use={"toolUseId": "t1", "name": "calendar_list_events"})
+            handler(event={"metadata": {"usage": {"inputTokens": 10, "outputTokens": 2, "totalTokens": 12}}})
+            handler(message={"role": "user", "content": [{"toolResult": {"toolUseId": "t1"}}]})
+            return "今日は会議があります"
+
+        agent.invoke_async = _invoke_async
+
+        events = []
+        with tool_progress.progress_reporter(events.append):
+            result = _run_tool(sub_agents.calendar_agent, "今日の予定は？")
+
+        assert result == "今日は会議があります"
+        assert [(e["type"], e.get("tool")) for e in events] == [
+            (tool_progress.SUB_TOOL_START, "calendar_list_events"),
+            (tool_progress.SUB_TOOL_END, "calendar_list_events"),
+            (tool_progress.SUB_AGENT_END, None),
+        ]
+        assert all(e["parent"] == "calendar_agent" for e in events)
+        assert "duration_ms" in events[1]
+        assert events[2]["usage"] == {"inputTokens": 10, "outputTokens": 2, "totalTokens": 12}
+
+    def test_error_becomes_result_message(self, mock_agent_cls):
+        """サブエージェントの例外はエラーメッセージの結果になり、完了イベントは送られる"""
+        with sub_agents._registry.acquire("gmail") as agent:
+            pass
+
+        async def _invoke_async(message):
+            raise RuntimeError("boom")
+
+        agent.invoke_async = _invoke_async
+
+        events = []
+        with tool_progress.progress_reporter(events.append):
+            result = _run_tool(sub_agents.gmail_agent, "未読メールを確認して")
+
+        assert result == "メール操作でエラーが発生しました: boom"
+        assert [e["type"] for e in events] == [tool_progress.SUB_AGENT_END]
+
+    def test_concurrent_calls_run_in_parallel(self, mock_agent_cls):
+        """同じターンの複数のサブエージェント呼び出しが並行に走り、進捗は呼び出しごとに分かれる"""
+        running = 0
+        peak = 0
+
+        def _make(**kwargs):
+            agent = MagicMock()
+            agent.messages = []
+
+            async def _invoke_async(message):
+                nonlocal running, peak
+                running += 1
+                peak = max(peak, running)
+                kwargs["callback_handler"](current_tool_use={"toolUseId": message, "name": "inner"})
+                await asyncio.sleep(0.05)
+                running -= 1
+                return "ok"
+
+            agent.invoke_async = _invoke_async
+            return agent
+
+        events = []
+
+        async def _main():
+            with tool_progress.progress_reporter(events.append):
+                return await asyncio.gather(
+                    sub_agents.notion_agent._tool_func("メモして"),
+                    sub_agents.intro_agent._tool_func("自己紹介して"),
+                )
+
+        with patch.object(sub_agents, "Agent", side_effect=_make):
+            results = asyncio.run(_main())
+
+        assert results == ["ok", "ok"]
+        assert peak == 2
+        parents = sorted((e["parent"], e["type"]) for e in events if e["type"] != tool_progress.SUB_AGENT_END)
+        assert parents == [
+            ("intro_agent", tool_progress.SUB_TOOL_END),
+            ("intro_agent", tool_progress.SUB_TOOL_START),
+            ("notion_agent", tool_progress.SUB_TOOL_END),
+            ("notion_agent", tool_progress.SUB_TOOL_START),
+        ]
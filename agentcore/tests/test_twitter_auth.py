@@ -0,0 +1,98 @@
+"""twitter_auth.py のユニットテスト"""
+
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+import requests
+import tweepy
+
+from src.agent import twitter_auth, twitter_tools
+
+
+def _response(method, url, headers, status=200):
+    resp = requests.Response()
+    resp.status_code = status
+    resp.url = url
+    resp.headers.update(headers)
+    resp.request = requests.Request(method, url).prepare()
+    return resp
+
+
+@pytest.fixture(autouse=True)
+def reset_state():
+    twitter_auth.invalidate_credentials()
+    twitter_auth.rate_limits.clear()
+    yield
+    twitter_auth.invalidate_credentials()
+    twitter_auth.rate_limits.clear()
+
+
+@pytest.fixture
+def ssm():
+    with patch.object(twitter_auth.secrets_cache, "get_parameter", return_value="bearer") as one, \
+            patch.object(twitter_auth.secrets_cache, "get_parameters",
+                         side_effect=lambda names: {n: "v" for n in names}) as many:
+        yield one, many
+
+
+class TestCachedClients:
+    """tweepy.Client はプロセス内で使い回し、セッションを共有する"""
+
+    def test_clients_are_cached(self, ssm):
+        one, many = ssm
+        assert twitter_auth.get_read_client() is twitter_auth.get_read_client()
+        assert twitter_auth.get_write_client() is twitter_auth.get_write_client()
+        assert one.call_count == 1
+        assert many.call_count == 1
+
+    def test_clients_share_session(self, ssm):
+        read = twitter_auth.get_read_client()
+        write = twitter_auth.get_write_client()
+        assert read.session is write.session
+        assert twitter_auth.rate_limits.record in read.session.hooks["response"]
+
+    def test_unauthorized_invalidates_client(self, ssm):
+        """401ならキャッシュしたクライアントを破棄し、次回は作り直す"""
+        first = twitter_auth.get_read_client()
+        with patch.object(first, "get_users_tweets",
+                          side_effect=tweepy.Unauthorized(_response("GET", "https://x", {}, 401))):
+            result = twitter_tools.twitter_get_todays_tweets(user_id="1")
+
+        assert result["error"] is True
+        assert twitter_auth.get_read_client() is not first
+
+
+class TestRateLimitTracker:
+    """レート制限ヘッダーをエンドポイント単位で記録する"""
+
+    def test_endpoint_key_normalizes_ids(self):
+        assert twitter_auth.endpoint_key(
+            "get", "https://api.twitter.com/2/users/12345/tweets?max_results=5"
+        ) == twitter_auth.USER_TWEETS_ENDPOINT
+
+    def test_records_headers(self):
+        tracker = twitter_auth.RateLimitTracker()
+        reset = time.time() + 60
+        tracker.record(_response("GET", "https://api.twitter.com/2/users/1/tweets", {
+            "x-rate-limit-limit": "5", "x-rate-limit-remaining": "0",
+            "x-rate-limit-reset": str(int(reset)),
+        }))
+
+        limit = tracker.get(twitter_auth.USER_TWEETS_ENDPOINT)
+        assert (limit.limit, limit.remaining) == (5, 0)
+        assert 0 < tracker.seconds_until_available(twitter_auth.USER_TWEETS_ENDPOINT) <= 60
+        assert tracker.seconds_until_available(twitter_auth.CREATE_TWEET_ENDPOINT) == 0
+
+    def test_tool_backs_off_locally(self, ssm):
+        """残り0回ならAPIを呼ばずにエラーを返す"""
+        twitter_auth.rate_limits.record(_response("POST", "https://api.twitter.com/2/tweets", {
+            "x-rate-limit-remaining": "0", "x-rate-limit-reset": str(int(time.time()) + 120),
+        }))
+        client = MagicMock()
+        with patch.object(twitter_tools, "get_write_client", return_value=client):
+            result = twitter_tools.twitter_post_tweet(text="hello")
+
+        assert result["error"] is True
+        assert "rate limit" in result["message"]
+        client.create_tweet.assert_not_called()
@@ -11,17 +11,20 @@ Tools:
 """
 
 import logging
+import os
 from datetime import datetime, timedelta, timezone
 
 import boto3
+from google.auth.exceptions import RefreshError
 from google.oauth2.credentials import Credentials
-from googleapiclient.discovery import build
+from googleapiclient.discovery import build_from_document
 from googleapiclient.errors import HttpError
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
 SSM_PREFIX = "/tonari/google"
+DISCOVERY_DOCUMENT = os.path.join(os.path.dirname(__file__), "calendar.v3.json")
 AWS_REGION = "ap-northeast-1"
 CALENDAR_ID = "primary"
 JST = timezone(timedelta(hours=9))
@@ -50,10 +53,18 @@ def get_calendar_service():
         client_secret=params["client_secret"],
     )
 
-    _calendar_service = build("calendar", "v3", credentials=credentials)
+    # Build from the vendored, trimmed discovery document (see scripts/vendor-google-discovery.py)
+    with open(DISCOVERY_DOCUMENT, encoding="utf-8") as f:
+        _calendar_service = build_from_document(f.read(), credentials=credentials)
     return _calendar_service
 
 
+def _reset_service():
+    """Drop the cached service so credentials are re-read (called on auth errors)."""
+    global _calendar_service
+    _calendar_service = None
+
+
 def handler(event, context):
     """Dispatch to appropriate tool function based on event fields."""
     try:
@@ -71,6 +82,14 @@ def handler(event, context):
         return list_events(event)
     except HttpError as e:
         return _handle_google_error(e)
+    except RefreshError as e:
+        # Refresh token was revoked or rotated; re-read credentials next time
+        _reset_service()
+        logger.warning("Google token refresh failed: %s", e)
+        return {
+            "success": False,
+            "message": "Google認証が無効です。設定画面から「Google認証を更新」を実行してください。",
+        }
     except Exception as e:
         logger.exception("Unexpected error")
         return {"success": False, "message": f"エラーが発生しました: {str(e)}"}
@@ -80,8 +99,7 @@ def _handle_google_error(e):
     """Convert Google API errors to user-friendly messages."""
     status = e.resp.status if hasattr(e, "resp") else 0
     if status == 401:
-        global _calendar_service
-        _calendar_service = None
+        _reset_service()
         return {
             "success": False,
             "message": "カレンダーにアクセスできません。認証情報を確認してください。",
@@ -10,6 +10,7 @@ Tools:
 
 import base64
 import logging
+import os
 import re
 import time
 from datetime import datetime, timezone, timedelta
@@ -17,14 +18,16 @@ from email.message import EmailMessage
 from html.parser import HTMLParser
 
 import boto3
+from google.auth.exceptions import RefreshError
 from google.oauth2.credentials import Credentials
-from googleapiclient.discovery import build
+from googleapiclient.discovery import build_from_document
 from googleapiclient.errors import HttpError
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
 SSM_PREFIX = "/tonari/google"
+DISCOVERY_DOCUMENT = os.path.join(os.path.dirname(__file__), "gmail.v1.json")
 AWS_REGION = "ap-northeast-1"
 JST = timezone(timedelta(hours=9))
 _gmail_service = None
@@ -128,10 +131,18 @@ def get_gmail_service():
         client_secret=params["client_secret"],
     )
 
-    _gmail_service = build("gmail", "v1", credentials=credentials)
+    # Build from the vendored, trimmed discovery document (see scripts/vendor-google-discovery.py)
+    with open(DISCOVERY_DOCUMENT, encoding="utf-8") as f:
+        _gmail_service = build_from_document(f.read(), credentials=credentials)
     return _gmail_service
 
 
+def _reset_service():
+    """Drop the cached service so credentials are re-read (called on auth errors)."""
+    global _gmail_service
+    _gmail_service = None
+
+
 # ---------------------------------------------------------------------------
 # HTML helpers
 # ---------------------------------------------------------------------------
@@ -246,6 +257,14 @@ def handler(event, context):
         return {"success": False, "message": "不明なツール呼び出しです。action フィールドが必要です。"}
     except HttpError as e:
         return _handle_gmail_error(e)
+    except RefreshError as e:
+        # Refresh token was revoked or rotated; re-read credentials next time
+        _reset_service()
+        logger.warning("Google token refresh failed: %s", e)
+        return {
+            "success": False,
+            "message": "Google認証が無効です。設定画面から「Google認証を更新」を実行してください。",
+        }
     except Exception as e:
         logger.exception("Unexpected error")
         return {"success": False, "message": f"エラーが発生しました: {str(e)}"}
@@ -255,8 +274,7 @@ def _handle_gmail_error(e):
     """Convert Gmail API errors to user-friendly messages."""
     status = e.resp.status if hasattr(e, "resp") else 0
     if status == 401:
-        global _gmail_service
-        _gmail_service = None
+        _reset_service()
         return {
             "success": False,
             "message": "Gmail認証が期限切れです。再認証が必要です。",
@@ -3,19 +3,26 @@
 import json
 import logging
 import os
+import time
 import urllib.error
 import urllib.parse
 import urllib.request
 import uuid
-from base64 import b64encode
 from datetime import datetime, timedelta, timezone
+from typing import Iterator
 
 import boto3
 
+import cognito_token
+from agentcore_stream import AgentCoreStreamError, iter_text_deltas
+from dynamo_scan import query_items
+
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
 JST = timezone(timedelta(hours=9))
+# Sparse GSI on the tasks table holding only incomplete tasks
+ACTIVE_TASKS_INDEX = "taskStatus-sortOrder-index"
 
 
 def _get_urgent_tasks(table_name: str, days: int = 3) -> list[dict]:
@@ -35,14 +42,19 @@ def _get_urgent_tasks(table_name: str, days: int = 3) -> list[dict]:
     today = now.strftime("%Y-%m-%d")
 
     try:
-        response = table.scan(
-            FilterExpression="attribute_exists(dueDate) AND completed = :false AND dueDate <= :threshold",
-            ExpressionAttributeValues={
-                ":false": False,
-                ":threshold": threshold,
-            },
+        tasks = list(
+            query_items(
+                table,
+                attributes=["title", "dueDate"],
+                IndexName=ACTIVE_TASKS_INDEX,
+                KeyConditionExpression="taskStatus = :active",
+                FilterExpression="dueDate <= :threshold",
+                ExpressionAttributeValues={
+                    ":active": "active",
+                    ":threshold": threshold,
+                },
+            )
         )
-        tasks = response.get("Items", [])
         # Sort by due date
         tasks.sort(key=lambda t: t.get("dueDate", ""))
         result = []
@@ -158,44 +170,19 @@ def _build_news_prompt(now_str: str, urgent_tasks: list[dict] | None = None) ->
     )
 
 
-def _get_cognito_token(
-    client_id: str,
-    client_secret: str,
-    token_endpoint: str,
-    scope: str,
-) -> str:
-    """Get Cognito M2M access token via client_credentials grant."""
-    credentials = b64encode(f"{client_id}:{client_secret}".encode()).decode()
-
-    data = urllib.parse.urlencode(
-        {
-            "grant_type": "client_credentials",
-            "scope": scope,
-        }
-    ).encode()
-
-    req = urllib.request.Request(
-        token_endpoint,
-        data=data,
-        headers={
-            "Content-Type": "application/x-www-form-urlencoded",
-            "Authorization": f"Basic {credentials}",
-        },
-    )
-
-    with urllib.request.urlopen(req, timeout=30) as response:
-        body = json.loads(response.read())
-        return body["access_token"]
-
-
 def _call_agentcore(
     prompt: str,
     access_token: str,
     runtime_arn: str,
     session_id: str,
     region: str = "ap-northeast-1",
-) -> str:
-    """Call AgentCore Runtime and return response text."""
+) -> Iterator[str]:
+    """Call AgentCore Runtime and yield response text as it streams in.
+
+    Raises:
+        AgentCoreStreamError: The agent reported an error; the connection
+            is closed without reading the rest of the stream.
+    """
     encoded_arn = urllib.parse.quote(runtime_arn, safe="")
     endpoint = (
         f"https://bedrock-agentcore.{region}.amazonaws.com"
@@ -223,36 +210,7 @@ def _call_agentcore(
     )
 
     with urllib.request.urlopen(req, timeout=240) as response:
-        return response.read().decode()
-
-
-def _parse_agentcore_response(response_body: str) -> str:
-    """Extract text content from SSE stream response.
-
-    Args:
-        response_body: Raw SSE response from AgentCore Runtime.
-
-    Returns:
-        Concatenated text content.
-    """
-    texts = []
-    for line in response_body.split("\n"):
-        if not line.startswith("data:"):
-            continue
-        data_str = line[len("data:") :].strip()
-        if not data_str:
-            continue
-        try:
-            data = json.loads(data_str)
-            if isinstance(data, str):
-                texts.append(data)
-            elif isinstance(data, dict) and "data" in data:
-                inner = data["data"]
-                if isinstance(inner, str):
-                    texts.append(inner)
-        except (json.JSONDecodeError, TypeError):
-            pass
-    return "".join(texts)
+        yield from iter_text_deltas(response)
 
 
 def _publish_to_sns(topic_arn: str, summary: str, now_str: str) -> None:
@@ -319,15 +277,16 @@ def handler(event, context):
     news_table = os.environ["NEWS_TABLE"]
     tasks_table = os.environ.get("TASKS_TABLE", "")
 
-    # Get secrets from SSM
+    # Get a Cognito M2M token (cached across warm invocations)
+    cognito_args = (cognito_client_id, ssm_cognito_secret, cognito_endpoint, cognito_scope)
     try:
-        ssm = boto3.client("ssm")
-        cognito_client_secret = ssm.get_parameter(
-            Name=ssm_cognito_secret, WithDecryption=True
-        )["Parameter"]["Value"]
-    except Exception:
+        access_token = cognito_token.get_access_token(*cognito_args)
+    except cognito_token.ClientSecretError:
         logger.exception("Failed to get Cognito client secret from SSM")
         return {"statusCode": 500, "body": "SSM access failed (Cognito)"}
+    except Exception:
+        logger.exception("Failed to get Cognito access token")
+        return {"statusCode": 500, "body": "Cognito token request failed"}
 
     # Build prompt and session ID
     now_jst = datetime.now(JST)
@@ -344,26 +303,19 @@ def handler(event, context):
         f"-{now_jst.strftime('%H%M')}-{uuid.uuid4().hex[:8]}"
     )
 
-    # Get Cognito token and invoke AgentCore
+    # Invoke AgentCore
+    # SNS and DynamoDB each take one finished message, so deltas are collected
+    # as they arrive and published once the stream ends
+    parts: list[str] = []
+    started = time.monotonic()
     try:
-        access_token = _get_cognito_token(
-            cognito_client_id,
-            cognito_client_secret,
-            cognito_endpoint,
-            cognito_scope,
-        )
-
-        response_body = _call_agentcore(
-            prompt, access_token, runtime_arn, session_id, region
-        )
-
-        # Debug: log raw SSE response (truncated)
-        logger.info(
-            "Raw AgentCore response (first 3000 chars): %s",
-            response_body[:3000],
-        )
-
-        news_summary = _parse_agentcore_response(response_body)
+        for text in _call_agentcore(prompt, access_token, runtime_arn, session_id, region):
+            if not parts:
+                logger.info(
+                    "First news text received after %.1fs", time.monotonic() - started
+                )
+            parts.append(text)
+        news_summary = "".join(parts)
 
         if not news_summary.strip():
             logger.error("Empty news summary from AgentCore")
@@ -373,9 +325,17 @@ def handler(event, context):
             "News summary collected: %d chars", len(news_summary)
         )
 
+    except AgentCoreStreamError as e:
+        logger.error(
+            "AgentCore stream error after %d chars: %s", sum(map(len, parts)), e
+        )
+        return {"statusCode": 500, "body": f"AgentCore stream error: {e}"}
     except urllib.error.HTTPError as e:
         error_body = e.read().decode() if e.fp else "No response body"
         logger.error("AgentCore HTTP %d: %s", e.code, error_body)
+        if e.code in (400, 401):
+            # Token may have been revoked or the secret rotated; fetch both again next time
+            cognito_token.invalidate(*cognito_args)
         return {
             "statusCode": 500,
             "body": f"AgentCore HTTP {e.code}: {error_body}",
@@ -10,15 +10,25 @@
 """
 import json
 import os
-from datetime import datetime
+from datetime import datetime, timezone
 from decimal import Decimal
 from urllib.parse import unquote
 
 import boto3
+from botocore.exceptions import ClientError
+
+from dynamo_scan import scan_items
 
 dynamodb = boto3.resource('dynamodb')
 table = dynamodb.Table(os.environ['TABLE_NAME'])
 
+# perfume-search の検索インデックスに変更を伝えるメタアイテム
+SEARCH_INDEX_META_BRAND = '__meta__'
+SEARCH_INDEX_META_KEY = {'brand': SEARCH_INDEX_META_BRAND, 'name': 'search-index'}
+# 変更ログに残す件数（古い version のエントリは書き込み時に消す）
+SEARCH_INDEX_LOG_SIZE = 100
+SEARCH_INDEX_MAX_RETRIES = 5
+
 
 class DecimalEncoder(json.JSONEncoder):
     """DynamoDBのDecimal型をJSON変換"""
@@ -42,10 +52,61 @@ def response(status_code: int, body: dict) -> dict:
     }
 
 
+def record_search_index_change(brand: str, name: str) -> None:
+    """メタアイテムのversionを上げ、変更ログに変更キーを記録する
+
+    変更ログは version -> キー のマップで、直近 SEARCH_INDEX_LOG_SIZE 件だけを残す。
+    perfume-search は自分の version 以降のエントリだけを取り直し、
+    ログから消えた範囲まで遅れていれば全件再構築する。
+    同時書き込みで version が飛ばないよう、読んだ version を条件に更新する。
+    """
+    change_key = json.dumps([brand, name], ensure_ascii=False)
+    for _ in range(SEARCH_INDEX_MAX_RETRIES):
+        meta = table.get_item(Key=SEARCH_INDEX_META_KEY, ConsistentRead=True).get('Item') or {}
+        version = int(meta.get('version', 0))
+        new_version = version + 1
+        names = {'#v': 'version', '#log': 'log', '#changes': 'changes'}
+        values = {':new': new_version}
+        if 'log' in meta:
+            names['#new'] = str(new_version)
+            names['#old'] = str(new_version - SEARCH_INDEX_LOG_SIZE)
+            values[':key'] = change_key
+            # 旧形式の changes マップが残っていれば一緒に消す
+            update = 'SET #v = :new, #log.#new = :key REMOVE #log.#old, #changes'
+        else:
+            values[':log'] = {str(new_version): change_key}
+            update = 'SET #v = :new, #log = :log REMOVE #changes'
+        if 'version' in meta:
+            condition = '#v = :old'
+            values[':old'] = version
+        else:
+            condition = 'attribute_not_exists(#v)'
+        try:
+            table.update_item(
+                Key=SEARCH_INDEX_META_KEY,
+                UpdateExpression=update,
+                ConditionExpression=condition,
+                ExpressionAttributeNames=names,
+                ExpressionAttributeValues=values,
+            )
+            return
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                raise
+    raise RuntimeError('search index meta update conflicted too many times')
+
+
+def is_search_index_meta(brand: str | None) -> bool:
+    """perfume-search 用のメタアイテムかどうか（APIからは見せない・触らせない）"""
+    return brand == SEARCH_INDEX_META_BRAND
+
+
 def list_perfumes() -> dict:
     """香水一覧を取得"""
-    result = table.scan()
-    items = result.get('Items', [])
+    items = [
+        item for item in scan_items(table)
+        if not is_search_index_meta(item.get('brand'))
+    ]
 
     # updatedAtの降順でソート
     items.sort(key=lambda x: x.get('updatedAt', ''), reverse=True)
@@ -73,6 +134,9 @@ def list_perfumes() -> dict:
 
 def get_perfume(brand: str, name: str) -> dict:
     """単一の香水を取得"""
+    if is_search_index_meta(brand):
+        return response(404, {'error': 'データが見つかりません'})
+
     result = table.get_item(Key={'brand': brand, 'name': name})
     item = result.get('Item')
 
@@ -104,8 +168,10 @@ def create_perfume(body: dict) -> dict:
 
     if not brand or not name:
         return response(400, {'error': 'ブランド名と商品名は必須です'})
+    if is_search_index_meta(brand):
+        return response(400, {'error': 'このブランド名は使用できません'})
 
-    now = datetime.utcnow().isoformat() + 'Z'
+    now = datetime.now(timezone.utc).isoformat().replace('+00:00', 'Z')
 
     item = {
         'brand': brand,
@@ -123,12 +189,16 @@ def create_perfume(body: dict) -> dict:
     }
 
     table.put_item(Item=item)
+    record_search_index_change(brand, name)
 
     return response(201, {'perfume': item})
 
 
 def update_perfume(brand: str, name: str, body: dict) -> dict:
     """香水を更新"""
+    if is_search_index_meta(brand):
+        return response(404, {'error': 'データが見つかりません'})
+
     # 既存データの確認
     result = table.get_item(Key={'brand': brand, 'name': name})
     existing = result.get('Item')
@@ -136,7 +206,7 @@ def update_perfume(brand: str, name: str, body: dict) -> dict:
     if not existing:
         return response(404, {'error': 'データが見つかりません'})
 
-    now = datetime.utcnow().isoformat() + 'Z'
+    now = datetime.now(timezone.utc).isoformat().replace('+00:00', 'Z')
 
     item = {
         'brand': brand,
@@ -154,13 +224,18 @@ def update_perfume(brand: str, name: str, body: dict) -> dict:
     }
 
     table.put_item(Item=item)
+    record_search_index_change(brand, name)
 
     return response(200, {'perfume': item})
 
 
 def delete_perfume(brand: str, name: str) -> dict:
     """香水を削除"""
+    if is_search_index_meta(brand):
+        return response(404, {'error': 'データが見つかりません'})
+
     table.delete_item(Key={'brand': brand, 'name': name})
+    record_search_index_change(brand, name)
     return response(200, {'success': True})
 
 
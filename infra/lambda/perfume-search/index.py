@@ -4,44 +4,134 @@ AgentCore Gateway から呼び出される香水検索Lambda
 Parameters:
 - query: 検索キーワード（すべてのフィールドを横断検索）
 - limit: 取得件数（デフォルト5）
+
+検索はLambdaのメモリ上に保持した転置インデックス（search_index.py）で行う。
+perfume-crud は書き込みのたびにメタアイテム（brand=__meta__）の version を上げ、
+log マップ（version -> 変更キー、直近の一定件数のみ）に記録する。呼び出しごとに
+メタアイテムの version だけを読み、進んでいればその間のログエントリだけを読んで、
+変更キーのみ BatchGetItem で取り直す。ログから消えた範囲まで遅れていれば全件再構築する。
 """
+import json
+import logging
 import os
+import time
+
 import boto3
 
+from dynamo_scan import scan_items
+from search_index import PerfumeIndex
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
 dynamodb = boto3.resource('dynamodb')
 table = dynamodb.Table(os.environ['TABLE_NAME'])
 
+# perfume-crud と共有するメタアイテムのキー
+META_BRAND = '__meta__'
+META_KEY = {'brand': META_BRAND, 'name': 'search-index'}
+# 差分がこの件数を超えたら全件再構築する
+INCREMENTAL_LIMIT = 100
+# 書き込み側の失敗で差分を取りこぼしても、この秒数で全件再構築する
+INDEX_MAX_AGE_SECONDS = int(os.environ.get('INDEX_MAX_AGE_SECONDS', '3600'))
+BATCH_GET_LIMIT = 100
+
+_index: PerfumeIndex | None = None
+_version = 0
+_built_at = 0.0
+
+
+def _read_version() -> int:
+    result = table.get_item(
+        Key=META_KEY,
+        ConsistentRead=True,
+        ProjectionExpression='#v',
+        ExpressionAttributeNames={'#v': 'version'},
+    )
+    return int((result.get('Item') or {}).get('version', 0))
+
+
+def _read_log(versions: range) -> dict[str, str]:
+    """指定した version のログエントリだけを読む（ログから消えたものは含まれない）"""
+    names = {'#log': 'log'}
+    paths = []
+    for i, v in enumerate(versions):
+        names[f'#e{i}'] = str(v)
+        paths.append(f'#log.#e{i}')
+    result = table.get_item(
+        Key=META_KEY,
+        ConsistentRead=True,
+        ProjectionExpression=', '.join(paths),
+        ExpressionAttributeNames=names,
+    )
+    return (result.get('Item') or {}).get('log', {})
+
+
+def _batch_get(keys: list[tuple[str, str]]) -> list[dict]:
+    items = []
+    for i in range(0, len(keys), BATCH_GET_LIMIT):
+        request = {
+            table.name: {
+                'Keys': [{'brand': b, 'name': n} for b, n in keys[i:i + BATCH_GET_LIMIT]],
+                'ConsistentRead': True,
+            }
+        }
+        while request:
+            result = dynamodb.batch_get_item(RequestItems=request)
+            items.extend(result.get('Responses', {}).get(table.name, []))
+            request = result.get('UnprocessedKeys') or None
+    return items
+
+
+def _rebuild(version: int) -> None:
+    global _index, _version, _built_at
+    # version を先に読んでから走査するので、走査中の変更は次回の差分で拾える
+    _index = PerfumeIndex(i for i in scan_items(table) if i.get('brand') != META_BRAND)
+    _version = version
+    _built_at = time.monotonic()
+    logger.info('Search index rebuilt: %d items (version=%s)', len(_index), _version)
+
+
+def _apply_changes(version: int) -> None:
+    global _version
+    versions = range(_version + 1, version + 1)
+    if version < _version or len(versions) > INCREMENTAL_LIMIT:
+        _rebuild(version)
+        return
+    log = _read_log(versions)
+    if any(str(v) not in log for v in versions):
+        # 遅れている間にログから消えた変更がある
+        _rebuild(version)
+        return
+
+    keys = list(dict.fromkeys(tuple(json.loads(log[str(v)])) for v in versions))
+    fetched = {(i['brand'], i['name']): i for i in _batch_get(keys)}
+    for key in keys:
+        if key in fetched:
+            _index.upsert(fetched[key])
+        else:
+            _index.remove(key)
+    _version = version
+    logger.info('Search index updated: %d changes (version=%s)', len(keys), _version)
+
+
+def get_index() -> PerfumeIndex:
+    """最新化したインデックスを返す"""
+    version = _read_version()
+    if _index is None or time.monotonic() - _built_at > INDEX_MAX_AGE_SECONDS:
+        _rebuild(version)
+    elif version != _version:
+        _apply_changes(version)
+    return _index
+
 
 def handler(event, context):
     """香水を検索する（全フィールド横断検索）"""
     query = event.get('query', '')
     limit = int(event.get('limit', 5))
 
-    # フルスキャン（小規模データ想定）
-    response = table.scan()
-    items = response.get('Items', [])
-
-    # キーワード検索（全フィールド横断）
-    if query:
-        query_lower = query.lower()
-        items = [
-            i for i in items
-            if query_lower in i.get('name', '').lower()
-            or query_lower in i.get('brand', '').lower()
-            or query_lower in i.get('country', '').lower()
-            or query_lower in i.get('impression', '').lower()
-            or any(query_lower in note.lower() for note in i.get('topNotes', []))
-            or any(query_lower in note.lower() for note in i.get('middleNotes', []))
-            or any(query_lower in note.lower() for note in i.get('baseNotes', []))
-            or any(query_lower in s.lower() for s in i.get('scenes', []))
-            or any(query_lower in s.lower() for s in i.get('seasons', []))
-        ]
-
-    # ratingの降順でソート
-    items.sort(key=lambda x: x.get('rating', 0), reverse=True)
-
-    # 上位N件を返却
-    results = items[:limit]
+    # 上位N件をratingの降順で取得
+    results = get_index().search(query, limit)
 
     return {
         'perfumes': [
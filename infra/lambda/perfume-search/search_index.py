@@ -0,0 +1,126 @@
+"""
+香水検索用のインメモリ転置インデックス
+
+NFKC正規化・小文字化したテキストを文字unigram + bigramに分割して索引する。
+日本語は分かち書きせずにn-gramで扱うため、部分一致の検索語でも候補を引ける。
+候補はbigramのポスティングリストの積集合で絞り込んだあと、部分一致で確認するため、
+検索結果は同じ正規化で全件走査した場合と同じになる。
+（以前の .lower() だけの走査とは異なり、全角・半角の揺れも一致する）
+"""
+import heapq
+import unicodedata
+from typing import Iterable
+
+# 検索対象フィールド（文字列 or 文字列リスト）
+SEARCH_FIELDS = (
+    'brand', 'name', 'country', 'impression',
+    'topNotes', 'middleNotes', 'baseNotes', 'scenes', 'seasons',
+)
+
+Key = tuple[str, str]
+
+
+def normalize(text: str) -> str:
+    """全角半角・大文字小文字の揺れを吸収する"""
+    return unicodedata.normalize('NFKC', text).lower()
+
+
+def ngrams(text: str) -> set[str]:
+    """文字unigramとbigramを返す"""
+    grams = set(text)
+    grams.update(text[i:i + 2] for i in range(len(text) - 1))
+    return grams
+
+
+def item_key(item: dict) -> Key:
+    return (item['brand'], item['name'])
+
+
+def _field_texts(item: dict) -> list[str]:
+    texts = []
+    for field in SEARCH_FIELDS:
+        value = item.get(field)
+        if isinstance(value, str):
+            texts.append(normalize(value))
+        elif isinstance(value, (list, tuple, set)):
+            texts.extend(normalize(v) for v in value if isinstance(v, str))
+    return [t for t in texts if t]
+
+
+def _grams(texts: list[str]) -> set[str]:
+    grams: set[str] = set()
+    for text in texts:
+        grams |= ngrams(text)
+    return grams
+
+
+def _rating(item: dict) -> float:
+    try:
+        return float(item.get('rating') or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class PerfumeIndex:
+    """香水アイテムの転置インデックス（追加・更新・削除に対応）"""
+
+    def __init__(self, items: Iterable[dict] = ()):
+        self._items: dict[Key, dict] = {}
+        self._texts: dict[Key, list[str]] = {}
+        self._postings: dict[str, set[Key]] = {}
+        for item in items:
+            self.upsert(item)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __contains__(self, key: Key) -> bool:
+        return key in self._items
+
+    def upsert(self, item: dict) -> None:
+        """アイテムを追加（既存なら置き換え）"""
+        key = item_key(item)
+        self.remove(key)
+        texts = _field_texts(item)
+        self._items[key] = item
+        self._texts[key] = texts
+        for gram in _grams(texts):
+            self._postings.setdefault(gram, set()).add(key)
+
+    def remove(self, key: Key) -> None:
+        """アイテムを削除（存在しなければ何もしない）"""
+        if key not in self._items:
+            return
+        del self._items[key]
+        for gram in _grams(self._texts.pop(key)):
+            keys = self._postings.get(gram)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._postings[gram]
+
+    def search(self, query: str, limit: int) -> list[dict]:
+        """部分一致するアイテムをratingの降順で最大limit件返す"""
+        query = normalize(query.strip()) if query else ''
+        if not query:
+            candidates: Iterable[Key] = self._items.keys()
+        else:
+            grams = [query[i:i + 2] for i in range(len(query) - 1)] or [query]
+            postings = []
+            for gram in grams:
+                keys = self._postings.get(gram)
+                if not keys:
+                    return []
+                postings.append(keys)
+            postings.sort(key=len)
+            candidates = set(postings[0]).intersection(*postings[1:])
+            # bigramが別フィールドにまたがる誤検出を除く
+            candidates = [
+                k for k in candidates
+                if any(query in text for text in self._texts[k])
+            ]
+        return heapq.nlargest(
+            max(0, limit),
+            (self._items[k] for k in candidates),
+            key=_rating,
+        )
@@ -0,0 +1,9 @@
+import os
+import sys
+from pathlib import Path
+
+# dynamo_scan is deployed as a Lambda layer from infra/lambda/shared
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "shared"))
+
+os.environ.setdefault("TABLE_NAME", "perfumes-test")
+os.environ.setdefault("AWS_DEFAULT_REGION", "ap-northeast-1")
@@ -0,0 +1,82 @@
+"""Perfume search handler: incremental index refresh tests."""
+
+import json
+import unittest
+from unittest.mock import patch
+
+import index
+
+
+def _key(brand, name):
+    return json.dumps([brand, name], ensure_ascii=False)
+
+
+class GetIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.items = {("A", "x"): {"brand": "A", "name": "x", "rating": 3}}
+        patcher = patch.object(index, "scan_items", side_effect=lambda table: list(self.items.values()))
+        self.scan = patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = patch.object(
+            index, "_batch_get", side_effect=lambda keys: [self.items[k] for k in keys if k in self.items]
+        )
+        self.batch_get = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.log_reads = []
+        index._index = None
+        index._version = 0
+
+    def _read_log(self, meta, versions):
+        self.log_reads.append(list(versions))
+        return {str(v): meta["log"][str(v)] for v in versions if str(v) in meta["log"]}
+
+    def _get_index(self, meta):
+        with (
+            patch.object(index, "_read_version", return_value=meta["version"]),
+            patch.object(index, "_read_log", side_effect=lambda versions: self._read_log(meta, versions)),
+        ):
+            return index.get_index()
+
+    def test_fetches_only_keys_logged_since_own_version(self):
+        self._get_index({"version": 1, "log": {"1": _key("A", "x")}})
+        self.items[("B", "y")] = {"brand": "B", "name": "y", "rating": 5}
+        del self.items[("A", "x")]
+
+        found = self._get_index({"version": 3, "log": {"1": _key("A", "x"), "2": _key("B", "y"), "3": _key("A", "x")}})
+
+        self.assertEqual(self.scan.call_count, 1)
+        self.assertEqual(self.log_reads, [[2, 3]])
+        self.batch_get.assert_called_once_with([("B", "y"), ("A", "x")])
+        self.assertEqual([i["name"] for i in found.search("", 10)], ["y"])
+        self.assertEqual(index._version, 3)
+
+    def test_rebuilds_when_log_no_longer_covers_own_version(self):
+        self._get_index({"version": 1, "log": {"1": _key("A", "x")}})
+
+        self._get_index({"version": 150, "log": {str(v): _key("A", "x") for v in range(51, 151)}})
+
+        self.assertEqual(self.scan.call_count, 2)
+        self.batch_get.assert_not_called()
+        self.assertEqual(index._version, 150)
+
+
+    def test_rebuilds_when_logged_changes_were_pruned(self):
+        self._get_index({"version": 1, "log": {"1": _key("A", "x")}})
+
+        self._get_index({"version": 5, "log": {"4": _key("A", "x"), "5": _key("A", "x")}})
+
+        self.assertEqual(self.log_reads, [[2, 3, 4, 5]])
+        self.assertEqual(self.scan.call_count, 2)
+        self.batch_get.assert_not_called()
+        self.assertEqual(index._version, 5)
+
+    def test_unchanged_version_reads_no_log(self):
+        self._get_index({"version": 1, "log": {"1": _key("A", "x")}})
+        self._get_index({"version": 1, "log": {"1": _key("A", "x")}})
+
+        self.assertEqual(self.log_reads, [])
+        self.assertEqual(self.scan.call_count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
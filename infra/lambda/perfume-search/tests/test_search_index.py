@@ -0,0 +1,85 @@
+"""Perfume search index unit tests."""
+
+import unittest
+
+from search_index import PerfumeIndex, normalize
+
+
+def _perfume(brand, name, rating=None, **fields):
+    item = {"brand": brand, "name": name, **fields}
+    if rating is not None:
+        item["rating"] = rating
+    return item
+
+
+def _scan_search(items, query, limit):
+    """同じ正規化で全件走査した場合の判定"""
+    query = normalize(query)
+    matched = []
+    for item in items:
+        texts = []
+        for value in item.values():
+            if isinstance(value, str):
+                texts.append(normalize(value))
+            elif isinstance(value, list):
+                texts.extend(normalize(v) for v in value)
+        if any(query in t for t in texts):
+            matched.append(item)
+    matched.sort(key=lambda i: i.get("rating") or 0, reverse=True)
+    return matched[:limit]
+
+
+class TestPerfumeIndex(unittest.TestCase):
+    """Tests for PerfumeIndex."""
+
+    def setUp(self):
+        self.items = [
+            _perfume("Chanel", "No.5", 5, country="France", topNotes=["アルデヒド", "ネロリ"]),
+            _perfume("Diptyque", "Philosykos", 4, topNotes=["イチジクの葉"], scenes=["休日"]),
+            _perfume("Le Labo", "Santal 33", 3, baseNotes=["サンダルウッド", "シダー"]),
+            _perfume("Jo Malone", "Wood Sage & Sea Salt", None, impression="海辺の木の香り"),
+        ]
+        self.index = PerfumeIndex(self.items)
+
+    def test_matches_full_scan(self):
+        """全件走査と同じ結果を返す。"""
+        for query in ["chanel", "ウッド", "の", "a", "33", "sea salt", "イチジク", "存在しない"]:
+            with self.subTest(query=query):
+                expected = [(i["brand"], i["name"]) for i in _scan_search(self.items, query, 10)]
+                actual = [(i["brand"], i["name"]) for i in self.index.search(query, 10)]
+                self.assertEqual(sorted(actual), sorted(expected))
+
+    def test_normalizes_width_and_case(self):
+        """全角英数字・大文字でも一致する。"""
+        results = self.index.search("ＣＨＡＮＥＬ", 5)
+        self.assertEqual([r["name"] for r in results], ["No.5"])
+
+    def test_orders_by_rating_and_limits(self):
+        """ratingの降順で上位limit件を返す。"""
+        results = self.index.search("", 2)
+        self.assertEqual([r["name"] for r in results], ["No.5", "Philosykos"])
+
+    def test_ignores_matches_across_fields(self):
+        """別フィールドにまたがる文字列には一致しない。"""
+        # "シダー" と "サンダルウッド" は別要素なので "ドシ" は存在しない
+        self.assertEqual(self.index.search("ドシ", 5), [])
+
+    def test_upsert_replaces_item(self):
+        """更新後は古いテキストで一致しない。"""
+        self.index.upsert(_perfume("Le Labo", "Santal 33", 3, baseNotes=["ムスク"]))
+        self.assertEqual(self.index.search("サンダル", 5), [])
+        self.assertEqual([r["name"] for r in self.index.search("ムスク", 5)], ["Santal 33"])
+        self.assertEqual(len(self.index), 4)
+
+    def test_remove_item(self):
+        """削除したアイテムは返さない。"""
+        self.index.remove(("Chanel", "No.5"))
+        self.assertEqual(self.index.search("chanel", 5), [])
+        self.assertNotIn(("Chanel", "No.5"), self.index)
+        # 存在しないキーの削除は何もしない
+        self.index.remove(("Chanel", "No.5"))
+        self.assertEqual(len(self.index), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+"""Incremental parsing of AgentCore Runtime SSE responses.
+
+iter_sse_data() turns an iterable of raw lines (e.g. an open HTTPResponse)
+into SSE event payloads as each event completes, joining multi-line data:
+fields. iter_text_deltas() decodes those payloads into the text chunks the
+agent streams and raises AgentCoreStreamError as soon as an error event
+arrives, so callers can stop reading instead of waiting for the run to end.
+"""
+
+import json
+import logging
+from typing import Iterable, Iterator
+
+logger = logging.getLogger(__name__)
+
+
+class AgentCoreStreamError(RuntimeError):
+    """The agent reported an error event in its stream."""
+
+
+def iter_sse_data(lines: Iterable[bytes | str]) -> Iterator[str]:
+    """Yield the data payload of each SSE event.
+
+    Events are dispatched on a blank line; several data: lines in one event
+    are joined with "\\n". Comments and other fields (event:, id:, retry:)
+    are ignored. A final event without a trailing blank line is still
+    dispatched.
+    """
+    data_lines: list[str] = []
+    for raw in lines:
+        line = raw.decode("utf-8") if isinstance(raw, bytes) else raw
+        line = line.rstrip("\r\n")
+        if not line:
+            if data_lines:
+                yield "\n".join(data_lines)
+                data_lines = []
+            continue
+        if line.startswith(":"):
+            continue
+        field, _, value = line.partition(":")
+        if field != "data":
+            continue
+        data_lines.append(value[1:] if value.startswith(" ") else value)
+    if data_lines:
+        yield "\n".join(data_lines)
+
+
+def iter_text_deltas(lines: Iterable[bytes | str]) -> Iterator[str]:
+    """Yield text chunks from an AgentCore Runtime SSE stream.
+
+    Text arrives as JSON strings (or {"data": "..."} objects); tool and image
+    events are skipped.
+
+    Raises:
+        AgentCoreStreamError: On a {"type": "error"} event.
+    """
+    for payload in iter_sse_data(lines):
+        if not payload.strip():
+            continue
+        try:
+            data = json.loads(payload)
+        except json.JSONDecodeError:
+            logger.debug("Skipping non-JSON SSE payload: %s", payload[:200])
+            continue
+        if isinstance(data, str):
+            yield data
+        elif isinstance(data, dict):
+            if data.get("type") == "error":
+                raise AgentCoreStreamError(data.get("message") or "Unknown agent error")
+            inner = data.get("data")
+            if isinstance(inner, str):
+                yield inner
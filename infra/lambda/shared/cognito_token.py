@@ -0,0 +1,196 @@
+"""Cached Cognito M2M access tokens for Lambdas that call AgentCore Runtime.
+
+get_access_token() performs the client_credentials grant only when no
+usable token is cached. Tokens are kept in memory until
+TOKEN_REFRESH_MARGIN_SECONDS before expires_in, so warm invocations skip
+both the SSM read of the client secret and the OAuth round-trip.
+
+Set COGNITO_TOKEN_CACHE_TABLE to a DynamoDB table (partition key
+"cacheKey", TTL attribute "ttl") to also share tokens between functions
+and cold starts. Only the access token is stored there, never the client
+secret.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from base64 import b64encode
+
+import boto3
+
+import secrets_cache
+
+logger = logging.getLogger(__name__)
+
+# Refresh this long before expiry so a token never expires mid-invocation
+TOKEN_REFRESH_MARGIN_SECONDS = float(os.getenv("COGNITO_TOKEN_REFRESH_MARGIN_SECONDS", "300"))
+SHARED_CACHE_TABLE = os.getenv("COGNITO_TOKEN_CACHE_TABLE", "")
+REQUEST_TIMEOUT_SECONDS = 30
+
+
+class ClientSecretError(RuntimeError):
+    """The Cognito client secret could not be read from SSM."""
+
+
+_lock = threading.Lock()
+# cache key -> (expires_at epoch seconds, access token)
+_tokens: dict[str, tuple[float, str]] = {}
+_shared_table = None
+
+
+def _cache_key(client_id: str, token_endpoint: str, scope: str) -> str:
+    return hashlib.sha256(f"{token_endpoint}|{client_id}|{scope}".encode()).hexdigest()
+
+
+def _is_fresh(expires_at: float) -> bool:
+    return time.time() < expires_at - TOKEN_REFRESH_MARGIN_SECONDS
+
+
+def _get_shared_table():
+    global _shared_table
+    if _shared_table is None:
+        _shared_table = boto3.resource("dynamodb").Table(SHARED_CACHE_TABLE)
+    return _shared_table
+
+
+def _load_shared(key: str) -> tuple[float, str] | None:
+    try:
+        item = _get_shared_table().get_item(Key={"cacheKey": key}).get("Item")
+    except Exception:
+        logger.warning("Failed to read shared Cognito token cache", exc_info=True)
+        return None
+    if not item:
+        return None
+    return float(item["expiresAt"]), item["accessToken"]
+
+
+def _store_shared(key: str, expires_at: float, token: str) -> None:
+    try:
+        _get_shared_table().put_item(
+            Item={
+                "cacheKey": key,
+                "accessToken": token,
+                "expiresAt": int(expires_at),
+                "ttl": int(expires_at),
+            }
+        )
+    except Exception:
+        logger.warning("Failed to write shared Cognito token cache", exc_info=True)
+
+
+def _delete_shared(key: str) -> None:
+    try:
+        _get_shared_table().delete_item(Key={"cacheKey": key})
+    except Exception:
+        logger.warning("Failed to delete shared Cognito token cache entry", exc_info=True)
+
+
+def _request_token(
+    client_id: str,
+    client_secret: str,
+    token_endpoint: str,
+    scope: str,
+) -> tuple[str, float]:
+    """Run the client_credentials grant and return (access_token, expires_in)."""
+    credentials = b64encode(f"{client_id}:{client_secret}".encode()).decode()
+
+    data = urllib.parse.urlencode(
+        {
+            "grant_type": "client_credentials",
+            "scope": scope,
+        }
+    ).encode()
+
+    req = urllib.request.Request(
+        token_endpoint,
+        data=data,
+        headers={
+            "Content-Type": "application/x-www-form-urlencoded",
+            "Authorization": f"Basic {credentials}",
+        },
+    )
+
+    with urllib.request.urlopen(req, timeout=REQUEST_TIMEOUT_SECONDS) as response:
+        body = json.loads(response.read())
+        return body["access_token"], float(body.get("expires_in", 3600))
+
+
+def get_access_token(
+    client_id: str,
+    client_secret_parameter: str,
+    token_endpoint: str,
+    scope: str,
+) -> str:
+    """Return a Cognito access token for the client_credentials grant.
+
+    Args:
+        client_id: Cognito app client ID.
+        client_secret_parameter: SSM parameter name holding the client secret.
+        token_endpoint: Cognito /oauth2/token URL.
+        scope: OAuth scope to request.
+
+    Raises:
+        ClientSecretError: The client secret could not be read from SSM.
+        urllib.error.HTTPError: The token endpoint rejected the request.
+    """
+    key = _cache_key(client_id, token_endpoint, scope)
+    with _lock:
+        cached = _tokens.get(key)
+    if cached is not None and _is_fresh(cached[0]):
+        return cached[1]
+
+    if SHARED_CACHE_TABLE:
+        shared = _load_shared(key)
+        if shared is not None and _is_fresh(shared[0]):
+            with _lock:
+                _tokens[key] = shared
+            logger.info("Using Cognito access token from shared cache")
+            return shared[1]
+
+    try:
+        client_secret = secrets_cache.get_parameter(client_secret_parameter)
+    except Exception as e:
+        raise ClientSecretError(f"Failed to read {client_secret_parameter}: {e}") from e
+
+    try:
+        token, expires_in = _request_token(client_id, client_secret, token_endpoint, scope)
+    except urllib.error.HTTPError as e:
+        if e.code in (400, 401):
+            # invalid_client: the secret may have been rotated
+            secrets_cache.invalidate(client_secret_parameter)
+        raise
+
+    expires_at = time.time() + expires_in
+    with _lock:
+        _tokens[key] = (expires_at, token)
+    if SHARED_CACHE_TABLE:
+        _store_shared(key, expires_at, token)
+    logger.info("Fetched new Cognito access token (expires in %ds)", expires_in)
+    return token
+
+
+def invalidate(
+    client_id: str,
+    client_secret_parameter: str,
+    token_endpoint: str,
+    scope: str,
+) -> None:
+    """Drop the cached token and client secret (e.g. after a 401 from AgentCore)."""
+    key = _cache_key(client_id, token_endpoint, scope)
+    with _lock:
+        _tokens.pop(key, None)
+    if SHARED_CACHE_TABLE:
+        _delete_shared(key)
+    secrets_cache.invalidate(client_secret_parameter)
+
+
+def clear() -> None:
+    """Drop every in-memory token (the shared cache is left untouched)."""
+    with _lock:
+        _tokens.clear()
@@ -0,0 +1,60 @@
+"""Atomic counters stored as DynamoDB items.
+
+increment() is a single UpdateItem with ADD, so concurrent callers always
+get distinct values. A missing counter is created on first use from an
+optional seed (e.g. the current maximum of the values it replaces), so an
+existing table can switch to a counter without a migration step.
+"""
+
+from typing import Callable
+
+from botocore.exceptions import ClientError
+
+
+def _is_conditional_check_failure(e: ClientError) -> bool:
+    return e.response["Error"]["Code"] == "ConditionalCheckFailedException"
+
+
+def increment(
+    table,
+    key: dict,
+    attribute: str = "value",
+    seed: Callable[[], int] | None = None,
+) -> int:
+    """Atomically add 1 to the counter and return the new value.
+
+    Args:
+        table: boto3 DynamoDB Table resource.
+        key: Primary key of the counter item.
+        attribute: Attribute holding the counter.
+        seed: Returns the starting value when the counter does not exist yet
+            (0 if None). The first increment then returns seed() + 1.
+    """
+    update = {
+        "Key": key,
+        "UpdateExpression": "ADD #counter :one",
+        "ConditionExpression": "attribute_exists(#counter)",
+        "ExpressionAttributeNames": {"#counter": attribute},
+        "ExpressionAttributeValues": {":one": 1},
+        "ReturnValues": "UPDATED_NEW",
+    }
+    try:
+        result = table.update_item(**update)
+    except ClientError as e:
+        if not _is_conditional_check_failure(e):
+            raise
+        start = seed() if seed is not None else 0
+        try:
+            # Another caller may create the counter first; its seed wins
+            table.update_item(
+                Key=key,
+                UpdateExpression="SET #counter = :start",
+                ConditionExpression="attribute_not_exists(#counter)",
+                ExpressionAttributeNames={"#counter": attribute},
+                ExpressionAttributeValues={":start": start},
+            )
+        except ClientError as e:
+            if not _is_conditional_check_failure(e):
+                raise
+        result = table.update_item(**update)
+    return int(result["Attributes"][attribute])
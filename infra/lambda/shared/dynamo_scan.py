@@ -0,0 +1,115 @@
+"""Paginated, projected and parallel DynamoDB scans and queries.
+
+scan_items() and query_items() follow LastEvaluatedKey until every page has
+been read, so results are not truncated at the 1 MB page limit. Items are
+yielded as each page arrives. Pass `attributes` to read only the listed
+attributes (reserved words such as "name" are aliased automatically) and
+`total_segments` > 1 to scan segments in parallel threads.
+"""
+
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Iterable, Iterator
+
+_SEGMENT_DONE = object()
+
+
+def _with_projection(kwargs: dict, attributes: Iterable[str] | None) -> dict:
+    if attributes is None:
+        return kwargs
+    names = dict(kwargs.get("ExpressionAttributeNames", {}))
+    placeholders = []
+    for i, attribute in enumerate(attributes):
+        placeholder = f"#proj{i}"
+        names[placeholder] = attribute
+        placeholders.append(placeholder)
+    return {
+        **kwargs,
+        "ProjectionExpression": ", ".join(placeholders),
+        "ExpressionAttributeNames": names,
+    }
+
+
+def _pages(operation, kwargs: dict, stop: threading.Event | None = None) -> Iterator[list[dict]]:
+    while True:
+        result = operation(**kwargs)
+        yield result.get("Items", [])
+        last_key = result.get("LastEvaluatedKey")
+        if not last_key or (stop is not None and stop.is_set()):
+            return
+        kwargs = {**kwargs, "ExclusiveStartKey": last_key}
+
+
+def scan_items(
+    table,
+    *,
+    attributes: Iterable[str] | None = None,
+    total_segments: int = 1,
+    **scan_kwargs: Any,
+) -> Iterator[dict]:
+    """Yield every item in the table, following pagination.
+
+    Args:
+        table: boto3 DynamoDB Table resource.
+        attributes: Attribute names to project (all attributes if None).
+        total_segments: Number of parallel scan segments (1 = sequential).
+        **scan_kwargs: Passed through to Table.scan
+            (FilterExpression, ExpressionAttributeValues, ...).
+
+    With total_segments > 1 items arrive in no particular order.
+    Stopping iteration early stops the remaining segments after their
+    current page.
+    """
+    kwargs = _with_projection(scan_kwargs, attributes)
+    if total_segments <= 1:
+        for items in _pages(table.scan, kwargs):
+            yield from items
+        return
+
+    pages: queue.Queue = queue.Queue()
+    stop = threading.Event()
+
+    def _scan_segment(segment: int) -> None:
+        try:
+            segment_kwargs = {**kwargs, "Segment": segment, "TotalSegments": total_segments}
+            for items in _pages(table.scan, segment_kwargs, stop):
+                pages.put(items)
+        except Exception as e:
+            pages.put(e)
+        finally:
+            pages.put(_SEGMENT_DONE)
+
+    with ThreadPoolExecutor(max_workers=total_segments) as executor:
+        for segment in range(total_segments):
+            executor.submit(_scan_segment, segment)
+        try:
+            remaining = total_segments
+            while remaining:
+                page = pages.get()
+                if page is _SEGMENT_DONE:
+                    remaining -= 1
+                elif isinstance(page, Exception):
+                    raise page
+                else:
+                    yield from page
+        finally:
+            stop.set()
+
+
+def query_items(
+    table,
+    *,
+    attributes: Iterable[str] | None = None,
+    **query_kwargs: Any,
+) -> Iterator[dict]:
+    """Yield every item matching a query, following pagination.
+
+    Args:
+        table: boto3 DynamoDB Table resource.
+        attributes: Attribute names to project (all attributes if None).
+        **query_kwargs: Passed through to Table.query
+            (IndexName, KeyConditionExpression, ScanIndexForward, ...).
+    """
+    for items in _pages(table.query, _with_projection(query_kwargs, attributes)):
+        yield from items
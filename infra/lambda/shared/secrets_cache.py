@@ -0,0 +1,199 @@
+"""In-memory cache for SSM Parameter Store secrets.
+
+Parameters are fetched with batched GetParameters calls (up to 10 names per
+call) and kept for a TTL, so repeated lookups within a warm process do not
+hit SSM. Missing parameters and SSM failures are cached for a shorter
+negative TTL to avoid hammering SSM while it is misconfigured or throttling.
+Callers invalidate entries when a downstream API rejects the credential, so
+a rotated secret is picked up on the next lookup.
+
+The same module is shipped to Lambda as a layer from
+infra/lambda/shared/secrets_cache.py. The agentcore image is built from
+agentcore/ only, so it carries a copy; agentcore/tests/test_secrets_cache.py
+fails if the two files differ.
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Callable, Iterable
+
+import boto3
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL_SECONDS = float(os.getenv("SECRETS_CACHE_TTL_SECONDS", "300"))
+DEFAULT_NEGATIVE_TTL_SECONDS = float(os.getenv("SECRETS_CACHE_NEGATIVE_TTL_SECONDS", "30"))
+# GetParameters accepts at most 10 names per call
+MAX_NAMES_PER_CALL = 10
+
+
+class ParameterNotFoundError(LookupError):
+    """Raised when one or more parameters do not exist in SSM."""
+
+    def __init__(self, names: Iterable[str]):
+        self.names = sorted(names)
+        super().__init__(f"SSM parameters not found: {', '.join(self.names)}")
+
+
+class SecretsCache:
+    """TTL cache in front of SSM GetParameters (WithDecryption=True)."""
+
+    def __init__(
+        self,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        negative_ttl_seconds: float = DEFAULT_NEGATIVE_TTL_SECONDS,
+        client_factory: Callable[[], object] | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self._client_factory = client_factory or _default_client
+        self._client = None
+        self._clock = clock
+        # name -> (expires_at, value)
+        self._values: dict[str, tuple[float, str]] = {}
+        # name -> (expires_at, exception)
+        self._failures: dict[str, tuple[float, Exception]] = {}
+        self._lock = threading.Lock()
+        # Serialises SSM calls so concurrent cold lookups share one fetch
+        self._fetch_lock = threading.Lock()
+
+    def get(self, name: str) -> str:
+        """Return a single parameter value."""
+        return self.get_many([name])[name]
+
+    def get_many(self, names: Iterable[str]) -> dict[str, str]:
+        """Return values for all names, fetching uncached ones in batches.
+
+        Raises:
+            ParameterNotFoundError: if any name does not exist.
+            Exception: the SSM error, if fetching failed (also cached briefly).
+        """
+        names = list(dict.fromkeys(names))
+        result, pending = self._lookup(names)
+        if pending:
+            with self._fetch_lock:
+                # Another thread may have fetched them while we waited
+                fetched, pending = self._lookup(pending)
+                result.update(fetched)
+                if pending:
+                    self._fetch(pending)
+                    fetched, pending = self._lookup(pending)
+                    result.update(fetched)
+                    if pending:
+                        # Neither returned nor reported invalid by SSM
+                        raise ParameterNotFoundError(pending)
+        return {name: result[name] for name in names}
+
+    def invalidate(self, *names: str) -> None:
+        """Drop cached values and failures (all entries when no names are given)."""
+        with self._lock:
+            if not names:
+                self._values.clear()
+                self._failures.clear()
+                return
+            for name in names:
+                self._values.pop(name, None)
+                self._failures.pop(name, None)
+
+    def invalidate_prefix(self, prefix: str) -> None:
+        """Drop cached entries whose name starts with prefix."""
+        with self._lock:
+            for cache in (self._values, self._failures):
+                for name in [n for n in cache if n.startswith(prefix)]:
+                    del cache[name]
+
+    def _lookup(self, names: list[str]) -> tuple[dict[str, str], list[str]]:
+        """Return (cached values, names still to fetch); raise cached failures."""
+        now = self._clock()
+        found: dict[str, str] = {}
+        pending: list[str] = []
+        missing: list[str] = []
+        with self._lock:
+            for name in names:
+                failure = self._failures.get(name)
+                if failure is not None:
+                    if now < failure[0]:
+                        if isinstance(failure[1], ParameterNotFoundError):
+                            missing.append(name)
+                            continue
+                        raise failure[1]
+                    del self._failures[name]
+                cached = self._values.get(name)
+                if cached is not None and now < cached[0]:
+                    found[name] = cached[1]
+                else:
+                    pending.append(name)
+        if missing:
+            raise ParameterNotFoundError(missing)
+        return found, pending
+
+    def _fetch(self, names: list[str]) -> None:
+        for i in range(0, len(names), MAX_NAMES_PER_CALL):
+            chunk = names[i:i + MAX_NAMES_PER_CALL]
+            try:
+                resp = self._get_client().get_parameters(Names=chunk, WithDecryption=True)
+            except Exception as e:
+                logger.warning("SSM GetParameters failed for %s: %s", chunk, e)
+                self._store_failure(chunk, e)
+                raise
+            now = self._clock()
+            with self._lock:
+                for param in resp.get("Parameters", []):
+                    self._values[param["Name"]] = (now + self.ttl_seconds, param["Value"])
+            invalid = resp.get("InvalidParameters", [])
+            if invalid:
+                self._store_failure(invalid, ParameterNotFoundError(invalid))
+
+    def _store_failure(self, names: list[str], error: Exception) -> None:
+        if self.negative_ttl_seconds <= 0:
+            return
+        expires_at = self._clock() + self.negative_ttl_seconds
+        with self._lock:
+            for name in names:
+                self._failures[name] = (expires_at, error)
+
+    def _get_client(self):
+        if self._client is None:
+            self._client = self._client_factory()
+        return self._client
+
+
+def _default_client():
+    region = os.getenv("AWS_REGION", "ap-northeast-1")
+    return boto3.client("ssm", region_name=region)
+
+
+_default_cache: SecretsCache | None = None
+_default_cache_lock = threading.Lock()
+
+
+def get_secrets_cache() -> SecretsCache:
+    """Return the process-wide SecretsCache."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = SecretsCache()
+        return _default_cache
+
+
+def get_parameter(name: str) -> str:
+    """Get one SSM parameter through the process-wide cache."""
+    return get_secrets_cache().get(name)
+
+
+def get_parameters(names: Iterable[str]) -> dict[str, str]:
+    """Get several SSM parameters through the process-wide cache."""
+    return get_secrets_cache().get_many(names)
+
+
+def invalidate(*names: str) -> None:
+    """Invalidate entries in the process-wide cache (all when no names given)."""
+    get_secrets_cache().invalidate(*names)
+
+
+def invalidate_prefix(prefix: str) -> None:
+    """Invalidate entries under a path prefix in the process-wide cache."""
+    get_secrets_cache().invalidate_prefix(prefix)
@@ -0,0 +1,67 @@
+"""agentcore_stream unit tests."""
+
+import unittest
+
+from agentcore_stream import AgentCoreStreamError, iter_sse_data, iter_text_deltas
+
+
+class TestIterSseData(unittest.TestCase):
+    """Tests for iter_sse_data."""
+
+    def test_dispatches_on_blank_line(self):
+        """空行ごとにイベントを返す。"""
+        lines = [b"data: one\n", b"\n", b"data: two\r\n", b"\r\n"]
+        self.assertEqual(list(iter_sse_data(lines)), ["one", "two"])
+
+    def test_joins_multi_line_data(self):
+        """複数の data: 行を改行で連結する。"""
+        lines = [b"data: first\n", b"data:second\n", b"data: \n", b"\n"]
+        self.assertEqual(list(iter_sse_data(lines)), ["first\nsecond\n"])
+
+    def test_ignores_comments_and_other_fields(self):
+        """コメントと data 以外のフィールドは無視する。"""
+        lines = [": keep-alive\n", "event: message\n", "id: 1\n", "data: x\n", "\n"]
+        self.assertEqual(list(iter_sse_data(lines)), ["x"])
+
+    def test_dispatches_trailing_event(self):
+        """末尾の空行がなくても最後のイベントを返す。"""
+        self.assertEqual(list(iter_sse_data([b"data: last"])), ["last"])
+
+    def test_is_incremental(self):
+        """イベントが完成した時点で返し、残りの行は読まない。"""
+        lines = iter([b"data: a\n", b"\n", b"data: b\n", b"\n"])
+        events = iter_sse_data(lines)
+        self.assertEqual(next(events), "a")
+        self.assertEqual(next(lines), b"data: b\n")
+
+
+class TestIterTextDeltas(unittest.TestCase):
+    """Tests for iter_text_deltas."""
+
+    def test_yields_text_and_skips_other_events(self):
+        """テキストだけを返し、ツール・画像イベントや不正なJSONは読み飛ばす。"""
+        lines = [
+            'data: "こんにちは"\n', "\n",
+            'data: {"type": "tool_start", "tool": "search"}\n', "\n",
+            'data: {"data": "、世界"}\n', "\n",
+            "data: not json\n", "\n",
+            'data: {"type": "image", "url": "https://example.com/a.png"}\n', "\n",
+        ]
+        self.assertEqual("".join(iter_text_deltas(lines)), "こんにちは、世界")
+
+    def test_raises_on_error_event(self):
+        """エラーイベントで AgentCoreStreamError を送出する。"""
+        lines = ['data: "partial"\n', "\n", 'data: {"type": "error", "message": "boom"}\n', "\n"]
+        deltas = iter_text_deltas(lines)
+        self.assertEqual(next(deltas), "partial")
+        with self.assertRaisesRegex(AgentCoreStreamError, "boom"):
+            next(deltas)
+
+    def test_multi_line_json_payload(self):
+        """複数行にまたがるJSONも1イベントとして解釈する。"""
+        lines = ['data: {"data":\n', 'data: "text"}\n', "\n"]
+        self.assertEqual(list(iter_text_deltas(lines)), ["text"])
+
+
+if __name__ == "__main__":
+    unittest.main()
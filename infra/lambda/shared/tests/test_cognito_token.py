@@ -0,0 +1,107 @@
+"""cognito_token unit tests."""
+
+import io
+import json
+import unittest
+import urllib.error
+from unittest.mock import MagicMock, patch
+
+import cognito_token
+
+ARGS = ("client-id", "/tonari/cognito/client_secret", "https://auth.example.com/oauth2/token", "agentcore/invoke")
+
+
+def _token_response(token, expires_in=3600):
+    response = MagicMock()
+    response.read.return_value = json.dumps({"access_token": token, "expires_in": expires_in}).encode()
+    response.__enter__ = MagicMock(return_value=response)
+    response.__exit__ = MagicMock(return_value=False)
+    return response
+
+
+class TestGetAccessToken(unittest.TestCase):
+    """Tests for get_access_token."""
+
+    def setUp(self):
+        cognito_token.clear()
+        self.addCleanup(cognito_token.clear)
+        patcher = patch("cognito_token.secrets_cache")
+        self.secrets = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.secrets.get_parameter.return_value = "secret"
+
+    @patch("cognito_token.urllib.request.urlopen")
+    def test_reuses_cached_token(self, mock_urlopen):
+        """有効期限内はSSMもトークンエンドポイントも呼ばない。"""
+        mock_urlopen.return_value = _token_response("token-1")
+
+        self.assertEqual(cognito_token.get_access_token(*ARGS), "token-1")
+        self.assertEqual(cognito_token.get_access_token(*ARGS), "token-1")
+
+        self.assertEqual(mock_urlopen.call_count, 1)
+        self.secrets.get_parameter.assert_called_once_with(ARGS[1])
+
+    @patch("cognito_token.time.time")
+    @patch("cognito_token.urllib.request.urlopen")
+    def test_refreshes_before_expiry(self, mock_urlopen, mock_time):
+        """期限のマージン内に入ったら取り直す。"""
+        mock_urlopen.side_effect = [_token_response("token-1", 600), _token_response("token-2", 600)]
+        mock_time.return_value = 1000.0
+        cognito_token.get_access_token(*ARGS)
+
+        mock_time.return_value = 1000.0 + 600 - cognito_token.TOKEN_REFRESH_MARGIN_SECONDS + 1
+        self.assertEqual(cognito_token.get_access_token(*ARGS), "token-2")
+
+    @patch("cognito_token.urllib.request.urlopen")
+    def test_invalidate_forces_new_token(self, mock_urlopen):
+        """invalidate後は新しいトークンを取得し、シークレットも読み直す。"""
+        mock_urlopen.side_effect = [_token_response("token-1"), _token_response("token-2")]
+        cognito_token.get_access_token(*ARGS)
+
+        cognito_token.invalidate(*ARGS)
+
+        self.assertEqual(cognito_token.get_access_token(*ARGS), "token-2")
+        self.secrets.invalidate.assert_called_once_with(ARGS[1])
+
+    @patch("cognito_token.urllib.request.urlopen")
+    def test_invalid_client_invalidates_secret(self, mock_urlopen):
+        """トークンエンドポイントの400/401ではシークレットのキャッシュを捨てる。"""
+        mock_urlopen.side_effect = urllib.error.HTTPError(ARGS[2], 400, "Bad Request", {}, io.BytesIO(b"{}"))
+
+        with self.assertRaises(urllib.error.HTTPError):
+            cognito_token.get_access_token(*ARGS)
+
+        self.secrets.invalidate.assert_called_once_with(ARGS[1])
+
+    def test_secret_failure_raises_client_secret_error(self):
+        """SSMの読み込み失敗は ClientSecretError になる。"""
+        self.secrets.get_parameter.side_effect = Exception("SSM error")
+
+        with self.assertRaises(cognito_token.ClientSecretError):
+            cognito_token.get_access_token(*ARGS)
+
+    @patch("cognito_token.urllib.request.urlopen")
+    def test_shared_cache_table(self, mock_urlopen):
+        """共有テーブルに有効なトークンがあればそれを使い、なければ書き込む。"""
+        table = MagicMock()
+        table.get_item.return_value = {}
+        mock_urlopen.return_value = _token_response("token-1")
+
+        with patch.object(cognito_token, "SHARED_CACHE_TABLE", "token-cache"), \
+                patch.object(cognito_token, "_get_shared_table", return_value=table):
+            self.assertEqual(cognito_token.get_access_token(*ARGS), "token-1")
+            item = table.put_item.call_args.kwargs["Item"]
+            self.assertEqual(item["accessToken"], "token-1")
+            self.assertNotIn("secret", json.dumps(item))
+
+            # Another (cold) process picks the token up from the table
+            cognito_token.clear()
+            table.get_item.return_value = {"Item": item}
+            self.assertEqual(cognito_token.get_access_token(*ARGS), "token-1")
+
+        self.assertEqual(mock_urlopen.call_count, 1)
+        self.secrets.get_parameter.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
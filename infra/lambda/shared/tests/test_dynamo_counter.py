@@ -0,0 +1,94 @@
+"""dynamo_counter unit tests."""
+
+import threading
+import unittest
+
+from botocore.exceptions import ClientError
+
+import dynamo_counter
+
+
+def _conditional_check_failed():
+    return ClientError(
+        {"Error": {"Code": "ConditionalCheckFailedException", "Message": "failed"}},
+        "UpdateItem",
+    )
+
+
+class FakeCounterTable:
+    """In-memory stand-in supporting the two update shapes used by increment()."""
+
+    def __init__(self, values=None):
+        self.values = dict(values or {})
+        self.lock = threading.Lock()
+
+    def update_item(self, Key, UpdateExpression, ConditionExpression,
+                    ExpressionAttributeNames, ExpressionAttributeValues, **kwargs):
+        key = Key["id"]
+        attribute = ExpressionAttributeNames["#counter"]
+        with self.lock:
+            exists = (key, attribute) in self.values
+            if UpdateExpression.startswith("ADD"):
+                if not exists:
+                    raise _conditional_check_failed()
+                self.values[(key, attribute)] += ExpressionAttributeValues[":one"]
+                return {"Attributes": {attribute: self.values[(key, attribute)]}}
+            if exists:
+                raise _conditional_check_failed()
+            self.values[(key, attribute)] = ExpressionAttributeValues[":start"]
+            return {}
+
+
+class TestIncrement(unittest.TestCase):
+    """Tests for increment."""
+
+    def test_increments_existing_counter(self):
+        """既存のカウンターを1ずつ増やす。"""
+        table = FakeCounterTable({("c", "value"): 5})
+        self.assertEqual(dynamo_counter.increment(table, {"id": "c"}), 6)
+        self.assertEqual(dynamo_counter.increment(table, {"id": "c"}), 7)
+
+    def test_seeds_missing_counter(self):
+        """カウンターがなければseedの値から始める。"""
+        table = FakeCounterTable()
+        calls = []
+        seed = lambda: calls.append(1) or 41  # noqa: E731
+        self.assertEqual(dynamo_counter.increment(table, {"id": "c"}, seed=seed), 42)
+        self.assertEqual(dynamo_counter.increment(table, {"id": "c"}, seed=seed), 43)
+        self.assertEqual(len(calls), 1)
+
+    def test_defaults_to_zero_seed(self):
+        """seedがなければ1から始める。"""
+        table = FakeCounterTable()
+        self.assertEqual(dynamo_counter.increment(table, {"id": "c"}, attribute="n"), 1)
+
+    def test_concurrent_increments_are_distinct(self):
+        """同時に呼んでも値が重複しない。"""
+        table = FakeCounterTable()
+        results = []
+        lock = threading.Lock()
+
+        def worker():
+            for _ in range(20):
+                value = dynamo_counter.increment(table, {"id": "c"}, seed=lambda: -1)
+                with lock:
+                    results.append(value)
+
+        threads = [threading.Thread(target=worker) for _ in range(5)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(sorted(results), list(range(100)))
+
+    def test_other_errors_propagate(self):
+        """条件チェック以外のエラーはそのまま送出する。"""
+        table = FakeCounterTable()
+        error = ClientError({"Error": {"Code": "ProvisionedThroughputExceededException"}}, "UpdateItem")
+        table.update_item = lambda **kwargs: (_ for _ in ()).throw(error)
+        with self.assertRaises(ClientError):
+            dynamo_counter.increment(table, {"id": "c"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+"""dynamo_scan unit tests."""
+
+import threading
+import unittest
+
+from dynamo_scan import query_items, scan_items
+
+
+class FakeTable:
+    """In-memory stand-in for a boto3 Table that pages every `page_size` items."""
+
+    def __init__(self, items, page_size=3, fail_segment=None):
+        self.items = items
+        self.page_size = page_size
+        self.fail_segment = fail_segment
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def scan(self, **kwargs):
+        with self._lock:
+            self.calls.append(kwargs)
+        segment = kwargs.get("Segment", 0)
+        total = kwargs.get("TotalSegments", 1)
+        if segment == self.fail_segment:
+            raise RuntimeError("scan failed")
+        keys = [i for i in range(len(self.items)) if i % total == segment]
+        start = kwargs.get("ExclusiveStartKey", {}).get("pos", 0)
+        page = keys[start:start + self.page_size]
+        items = [self.items[i] for i in page]
+        if "ProjectionExpression" in kwargs:
+            names = kwargs["ExpressionAttributeNames"]
+            attrs = [names[p.strip()] for p in kwargs["ProjectionExpression"].split(",")]
+            items = [{a: item[a] for a in attrs if a in item} for item in items]
+        result = {"Items": items}
+        if start + self.page_size < len(keys):
+            result["LastEvaluatedKey"] = {"pos": start + self.page_size}
+        return result
+
+    query = scan
+
+
+def _items(n):
+    return [{"id": str(i), "name": f"item-{i}", "body": "x" * 10} for i in range(n)]
+
+
+class TestScanItems(unittest.TestCase):
+    """Tests for scan_items."""
+
+    def test_follows_pagination(self):
+        """LastEvaluatedKey を辿って全件返す。"""
+        table = FakeTable(_items(10))
+        result = list(scan_items(table))
+        self.assertEqual([i["id"] for i in result], [str(i) for i in range(10)])
+        self.assertEqual(len(table.calls), 4)
+        self.assertEqual(table.calls[1]["ExclusiveStartKey"], {"pos": 3})
+
+    def test_projection_aliases_attribute_names(self):
+        """予約語を含む属性名をプレースホルダーで射影し、既存の名前を保持する。"""
+        table = FakeTable(_items(2))
+        result = list(
+            scan_items(
+                table,
+                attributes=["id", "name"],
+                FilterExpression="#b <> :empty",
+                ExpressionAttributeNames={"#b": "body"},
+                ExpressionAttributeValues={":empty": ""},
+            )
+        )
+        self.assertEqual(result, [{"id": "0", "name": "item-0"}, {"id": "1", "name": "item-1"}])
+        call = table.calls[0]
+        self.assertEqual(call["ProjectionExpression"], "#proj0, #proj1")
+        self.assertEqual(
+            call["ExpressionAttributeNames"],
+            {"#b": "body", "#proj0": "id", "#proj1": "name"},
+        )
+        self.assertEqual(call["FilterExpression"], "#b <> :empty")
+
+    def test_parallel_segments_return_all_items(self):
+        """並列スキャンでも全件を1回ずつ返す。"""
+        table = FakeTable(_items(25))
+        result = list(scan_items(table, total_segments=4))
+        self.assertEqual(sorted(int(i["id"]) for i in result), list(range(25)))
+        self.assertEqual({c["TotalSegments"] for c in table.calls}, {4})
+        self.assertEqual({c["Segment"] for c in table.calls}, {0, 1, 2, 3})
+
+    def test_parallel_segment_error_is_raised(self):
+        """セグメントの例外は呼び出し元に伝わる。"""
+        table = FakeTable(_items(10), fail_segment=1)
+        with self.assertRaises(RuntimeError):
+            list(scan_items(table, total_segments=2))
+
+    def test_is_lazy(self):
+        """ページが必要になるまで次のページを読まない。"""
+        table = FakeTable(_items(10))
+        items = scan_items(table)
+        next(items)
+        self.assertEqual(len(table.calls), 1)
+
+
+
+class TestQueryItems(unittest.TestCase):
+    """Tests for query_items."""
+
+    def test_follows_pagination_with_projection(self):
+        """クエリもページングを辿り、射影と条件をそのまま渡す。"""
+        table = FakeTable(_items(7))
+        result = list(
+            query_items(
+                table,
+                attributes=["id"],
+                IndexName="some-index",
+                KeyConditionExpression="#k = :v",
+                ExpressionAttributeNames={"#k": "key"},
+                ExpressionAttributeValues={":v": "x"},
+            )
+        )
+        self.assertEqual(result, [{"id": str(i)} for i in range(7)])
+        self.assertEqual(len(table.calls), 3)
+        self.assertEqual({c["IndexName"] for c in table.calls}, {"some-index"})
+        self.assertEqual(table.calls[0]["ExpressionAttributeNames"], {"#k": "key", "#proj0": "id"})
+
+
+if __name__ == "__main__":
+    unittest.main()
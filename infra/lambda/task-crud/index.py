@@ -7,7 +7,8 @@ Endpoints:
 - GET /tasks/{taskId} - Get a single task
 - PUT /tasks/{taskId} - Update a task
 - DELETE /tasks/{taskId} - Delete a task
-- PUT /tasks/reorder - Reorder tasks
+- PUT /tasks/reorder - Reorder tasks ({"taskIds": [...]} for the full order,
+  or {"taskId", "prevTaskId", "nextTaskId"} to move one task between neighbours)
 """
 import json
 import os
@@ -16,12 +17,27 @@ from datetime import datetime, timedelta, timezone
 from decimal import Decimal
 
 import boto3
+from botocore.exceptions import ClientError
+
+import dynamo_counter
+from dynamo_scan import query_items, scan_items
 
 dynamodb = boto3.resource("dynamodb")
 table = dynamodb.Table(os.environ["TABLE_NAME"])
 
 JST = timezone(timedelta(hours=9))
 TTL_DAYS = 30
+# Sparse GSI: only incomplete tasks have taskStatus (removed on completion)
+ACTIVE_INDEX = "taskStatus-sortOrder-index"
+ACTIVE_STATUS = "active"
+# Counter item holding the last assigned sortOrder (not a task)
+SORT_ORDER_COUNTER_KEY = {"taskId": "__counter__#sortOrder"}
+# Attributes returned by _format_task
+TASK_ATTRIBUTES = ("taskId", "title", "dueDate", "sortOrder", "completed", "createdAt", "completedAt")
+BATCH_GET_LIMIT = 100
+TRANSACT_WRITE_LIMIT = 100
+# Renumber the active list once neighbouring ranks get closer than this
+MIN_RANK_GAP = Decimal("1e-9")
 
 
 class DecimalEncoder(json.JSONEncoder):
@@ -44,17 +60,33 @@ def response(status_code: int, body: dict) -> dict:
     }
 
 
+def _is_reserved_task_id(task_id: str) -> bool:
+    """Internal items such as the sortOrder counter share the table; never expose them as tasks."""
+    return task_id.startswith("__")
+
+
 def list_tasks(event) -> dict:
     query_params = event.get("queryStringParameters") or {}
     include_completed = query_params.get("includeCompleted") == "true"
 
-    result = table.scan()
-    items = result.get("Items", [])
-
-    if not include_completed:
-        items = [item for item in items if not item.get("completed", False)]
-
-    items.sort(key=lambda x: x.get("sortOrder", 0))
+    if include_completed:
+        items = [
+            item
+            for item in scan_items(table, attributes=TASK_ATTRIBUTES)
+            if not _is_reserved_task_id(item["taskId"])
+        ]
+        items.sort(key=lambda x: x.get("sortOrder", 0))
+    else:
+        # Returned in sortOrder order by the index
+        items = list(
+            query_items(
+                table,
+                attributes=TASK_ATTRIBUTES,
+                IndexName=ACTIVE_INDEX,
+                KeyConditionExpression="taskStatus = :active",
+                ExpressionAttributeValues={":active": ACTIVE_STATUS},
+            )
+        )
 
     tasks = [_format_task(item) for item in items]
     return response(200, {"tasks": tasks})
@@ -77,14 +109,7 @@ def create_task(event) -> dict:
     if not title:
         return response(400, {"error": "title is required"})
 
-    # Get max sortOrder
-    result = table.scan(
-        ProjectionExpression="sortOrder",
-        FilterExpression="completed = :false",
-        ExpressionAttributeValues={":false": False},
-    )
-    items = result.get("Items", [])
-    max_order = max((item.get("sortOrder", 0) for item in items), default=-1)
+    sort_order = _next_sort_order()
 
     now = datetime.now(JST).isoformat()
     task_id = str(uuid.uuid4())
@@ -92,8 +117,9 @@ def create_task(event) -> dict:
     item = {
         "taskId": task_id,
         "title": title,
-        "sortOrder": max_order + 1,
+        "sortOrder": sort_order,
         "completed": False,
+        "taskStatus": ACTIVE_STATUS,
         "createdAt": now,
     }
 
@@ -142,6 +168,10 @@ def update_task(task_id: str, event) -> dict:
             expr_values[":completedAt"] = now.isoformat()
             expr_values[":ttl"] = ttl_timestamp
             expr_names["#ttl"] = "ttl"
+            update_expr_parts.append("REMOVE taskStatus")
+        else:
+            update_expr_parts.append("taskStatus = :active")
+            expr_values[":active"] = ACTIVE_STATUS
 
     if "sortOrder" in body:
         update_expr_parts.append("sortOrder = :sortOrder")
@@ -185,21 +215,127 @@ def delete_task(task_id: str) -> dict:
 
 def reorder_tasks(event) -> dict:
     body = json.loads(event.get("body", "{}"))
+    if body.get("taskId"):
+        return move_task(body)
+
     task_ids = body.get("taskIds", [])
 
     if not task_ids:
         return response(400, {"error": "taskIds is required"})
 
-    with table.batch_writer() as batch:
-        for index, task_id in enumerate(task_ids):
-            batch.put_item(
-                Item={
-                    **table.get_item(Key={"taskId": task_id}).get("Item", {}),
-                    "sortOrder": index,
-                }
-            )
+    # Only rewrite tasks whose position actually changed; unknown IDs are ignored
+    current = _get_sort_orders(task_ids)
+    changes = {
+        task_id: index
+        for index, task_id in enumerate(task_ids)
+        if task_id in current and current[task_id] != index
+    }
+    if not _write_sort_orders(changes):
+        return response(409, {"error": "Tasks changed during reorder"})
+
+    return response(200, {"success": True, "sortOrders": changes})
 
-    return response(200, {"success": True})
+
+def move_task(body: dict) -> dict:
+    """Move one task between prevTaskId and nextTaskId with a fractional rank.
+
+    prevTaskId=None moves the task to the top, nextTaskId=None to the bottom.
+    """
+    task_id = body["taskId"]
+    prev_id = body.get("prevTaskId")
+    next_id = body.get("nextTaskId")
+
+    if not prev_id and not next_id:
+        return response(400, {"error": "prevTaskId or nextTaskId is required"})
+
+    orders = _get_sort_orders([i for i in (task_id, prev_id, next_id) if i])
+    if task_id not in orders:
+        return response(404, {"error": "Task not found"})
+    if (prev_id and prev_id not in orders) or (next_id and next_id not in orders):
+        return response(409, {"error": "Neighbour task not found"})
+
+    if prev_id and next_id:
+        low, high = orders[prev_id], orders[next_id]
+        if high - low < MIN_RANK_GAP * 2:
+            return _renumber_with_move(task_id, prev_id)
+        rank = (low + high) / 2
+    elif prev_id:
+        # Bottom of the list: take a fresh value above every existing rank
+        rank = Decimal(_next_sort_order())
+    else:
+        rank = orders[next_id] - 1
+
+    changes = {task_id: rank}
+    if not _write_sort_orders(changes):
+        return response(409, {"error": "Tasks changed during reorder"})
+    return response(200, {"success": True, "sortOrders": changes})
+
+
+def _renumber_with_move(task_id: str, prev_id: str) -> dict:
+    """Give every active task an integer rank again, placing task_id after prev_id."""
+    current = {
+        item["taskId"]: item.get("sortOrder")
+        for item in query_items(
+            table,
+            attributes=["taskId", "sortOrder"],
+            IndexName=ACTIVE_INDEX,
+            KeyConditionExpression="taskStatus = :active",
+            ExpressionAttributeValues={":active": ACTIVE_STATUS},
+        )
+    }
+    ordered = [tid for tid in current if tid != task_id]
+    ordered.insert(ordered.index(prev_id) + 1 if prev_id in ordered else len(ordered), task_id)
+    changes = {tid: index for index, tid in enumerate(ordered) if current.get(tid) != index}
+    if not _write_sort_orders(changes):
+        return response(409, {"error": "Tasks changed during reorder"})
+    return response(200, {"success": True, "sortOrders": changes})
+
+
+def _get_sort_orders(task_ids: list[str]) -> dict[str, Decimal]:
+    """Fetch sortOrder for existing tasks with BatchGetItem."""
+    unique_ids = [task_id for task_id in dict.fromkeys(task_ids) if not _is_reserved_task_id(task_id)]
+    orders = {}
+    for i in range(0, len(unique_ids), BATCH_GET_LIMIT):
+        request = {
+            table.name: {
+                "Keys": [{"taskId": task_id} for task_id in unique_ids[i:i + BATCH_GET_LIMIT]],
+                "ProjectionExpression": "taskId, sortOrder",
+            }
+        }
+        while request:
+            result = dynamodb.batch_get_item(RequestItems=request)
+            for item in result.get("Responses", {}).get(table.name, []):
+                orders[item["taskId"]] = item.get("sortOrder", Decimal(0))
+            request = result.get("UnprocessedKeys") or None
+    return orders
+
+
+def _write_sort_orders(changes: dict) -> bool:
+    """Update only sortOrder, up to 100 tasks per transaction.
+
+    Returns False if a task was deleted concurrently.
+    """
+    updates = [
+        {
+            "Update": {
+                "TableName": table.name,
+                "Key": {"taskId": {"S": task_id}},
+                "UpdateExpression": "SET sortOrder = :sortOrder",
+                "ConditionExpression": "attribute_exists(taskId)",
+                "ExpressionAttributeValues": {":sortOrder": {"N": str(order)}},
+            }
+        }
+        for task_id, order in changes.items()
+    ]
+    client = dynamodb.meta.client
+    for i in range(0, len(updates), TRANSACT_WRITE_LIMIT):
+        try:
+            client.transact_write_items(TransactItems=updates[i:i + TRANSACT_WRITE_LIMIT])
+        except ClientError as e:
+            if e.response["Error"]["Code"] != "TransactionCanceledException":
+                raise
+            return False
+    return True
 
 
 def _format_task(item: dict) -> dict:
@@ -214,6 +350,29 @@ def _format_task(item: dict) -> dict:
     }
 
 
+def _max_active_sort_order() -> int:
+    """Highest sortOrder among active tasks (-1 if there are none)."""
+    result = table.query(
+        IndexName=ACTIVE_INDEX,
+        KeyConditionExpression="taskStatus = :active",
+        ExpressionAttributeValues={":active": ACTIVE_STATUS},
+        ProjectionExpression="sortOrder",
+        ScanIndexForward=False,
+        Limit=1,
+    )
+    items = result.get("Items", [])
+    return int(items[0]["sortOrder"]) if items else -1
+
+
+def _next_sort_order() -> int:
+    """Allocate the sortOrder for a new task with a single atomic write."""
+    return dynamo_counter.increment(
+        table,
+        SORT_ORDER_COUNTER_KEY,
+        seed=_max_active_sort_order,
+    )
+
+
 def handler(event, context):
     http_method = event.get(
         "httpMethod",
@@ -226,6 +385,8 @@ def handler(event, context):
         return response(200, {})
 
     task_id = path_parameters.get("taskId")
+    if task_id and _is_reserved_task_id(task_id):
+        return response(404, {"error": "Task not found"})
 
     if http_method == "GET" and task_id:
         return get_task(task_id)
@@ -0,0 +1,130 @@
+"""Task CRUD reorder unit tests."""
+
+import json
+import unittest
+from decimal import Decimal
+from unittest.mock import MagicMock, patch
+
+import index
+
+
+def _event(body):
+    return {"httpMethod": "PUT", "resource": "/tasks/reorder", "body": json.dumps(body)}
+
+
+def _batch_get_result(orders):
+    return {
+        "Responses": {
+            index.table.name: [
+                {"taskId": task_id, "sortOrder": Decimal(str(order))}
+                for task_id, order in orders.items()
+            ]
+        }
+    }
+
+
+def _written(mock_client):
+    """taskId -> sortOrder string from transact_write_items calls."""
+    written = {}
+    for call in mock_client.transact_write_items.call_args_list:
+        for item in call.kwargs["TransactItems"]:
+            update = item["Update"]
+            written[update["Key"]["taskId"]["S"]] = update["ExpressionAttributeValues"][":sortOrder"]["N"]
+    return written
+
+
+class TestReorder(unittest.TestCase):
+    """Tests for reorder_tasks and move_task."""
+
+    def setUp(self):
+        patcher = patch.object(index, "dynamodb")
+        self.dynamodb = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = MagicMock()
+        self.dynamodb.meta.client = self.client
+
+    def test_full_order_writes_only_changed_tasks(self):
+        """位置が変わったタスクの sortOrder だけを書き込む。"""
+        self.dynamodb.batch_get_item.return_value = _batch_get_result({"a": 0, "b": 1, "c": 2})
+
+        result = index.handler(_event({"taskIds": ["a", "c", "b", "missing"]}), None)
+
+        self.assertEqual(result["statusCode"], 200)
+        self.assertEqual(_written(self.client), {"c": "1", "b": "2"})
+        self.dynamodb.batch_get_item.assert_called_once()
+
+    def test_batch_get_is_chunked_and_retries_unprocessed_keys(self):
+        """BatchGetItem は100件ずつ呼び、UnprocessedKeys を再送する。"""
+        task_ids = [f"t{i}" for i in range(150)]
+        unprocessed = {index.table.name: {"Keys": [{"taskId": "t0"}]}}
+        self.dynamodb.batch_get_item.side_effect = [
+            {"Responses": {index.table.name: []}, "UnprocessedKeys": unprocessed},
+            _batch_get_result({"t0": 0}),
+            _batch_get_result({}),
+        ]
+
+        index.handler(_event({"taskIds": task_ids}), None)
+
+        calls = self.dynamodb.batch_get_item.call_args_list
+        self.assertEqual(len(calls), 3)
+        self.assertEqual(len(calls[0].kwargs["RequestItems"][index.table.name]["Keys"]), 100)
+        self.assertEqual(calls[1].kwargs["RequestItems"], unprocessed)
+        self.assertEqual(len(calls[2].kwargs["RequestItems"][index.table.name]["Keys"]), 50)
+
+    def test_move_between_neighbours_updates_one_task(self):
+        """隣接タスクの中間の値を1件だけ書き込む。"""
+        self.dynamodb.batch_get_item.return_value = _batch_get_result({"x": 5, "a": 1, "b": 2})
+
+        result = index.handler(_event({"taskId": "x", "prevTaskId": "a", "nextTaskId": "b"}), None)
+
+        self.assertEqual(result["statusCode"], 200)
+        self.assertEqual(_written(self.client), {"x": "1.5"})
+        self.assertEqual(json.loads(result["body"])["sortOrders"], {"x": 1.5})
+
+    def test_move_to_top(self):
+        """先頭へ移動すると次のタスクより小さい値になる。"""
+        self.dynamodb.batch_get_item.return_value = _batch_get_result({"x": 5, "a": 0})
+
+        index.handler(_event({"taskId": "x", "nextTaskId": "a"}), None)
+
+        self.assertEqual(_written(self.client), {"x": "-1"})
+
+    def test_move_to_bottom_uses_counter(self):
+        """末尾へ移動するとカウンターから新しい値を採番する。"""
+        self.dynamodb.batch_get_item.return_value = _batch_get_result({"x": 0, "a": 3})
+
+        with patch.object(index, "_next_sort_order", return_value=7):
+            index.handler(_event({"taskId": "x", "prevTaskId": "a"}), None)
+
+        self.assertEqual(_written(self.client), {"x": "7"})
+
+    def test_move_renumbers_when_gap_is_exhausted(self):
+        """隣接する値の差が小さすぎる場合は全件を振り直す。"""
+        self.dynamodb.batch_get_item.return_value = _batch_get_result(
+            {"x": 9, "a": Decimal("0"), "b": Decimal("0.0000000001")}
+        )
+
+        with patch.object(index, "query_items", return_value=iter(
+            [
+                {"taskId": "a", "sortOrder": Decimal("0")},
+                {"taskId": "b", "sortOrder": Decimal("0.0000000001")},
+                {"taskId": "x", "sortOrder": Decimal("9")},
+            ]
+        )):
+            result = index.handler(_event({"taskId": "x", "prevTaskId": "a", "nextTaskId": "b"}), None)
+
+        self.assertEqual(result["statusCode"], 200)
+        self.assertEqual(_written(self.client), {"x": "1", "b": "2"})
+
+    def test_move_missing_task_returns_404(self):
+        """移動対象が存在しなければ404を返す。"""
+        self.dynamodb.batch_get_item.return_value = _batch_get_result({"a": 0})
+
+        result = index.handler(_event({"taskId": "x", "nextTaskId": "a"}), None)
+
+        self.assertEqual(result["statusCode"], 404)
+        self.client.transact_write_items.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
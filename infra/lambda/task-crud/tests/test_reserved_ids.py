@@ -0,0 +1,46 @@
+"""Task CRUD tests for internal items stored in the tasks table."""
+
+import json
+import unittest
+from unittest.mock import patch
+
+import index
+
+COUNTER_ID = index.SORT_ORDER_COUNTER_KEY["taskId"]
+
+
+class TestReservedIds(unittest.TestCase):
+    """The sortOrder counter must never be read, changed or deleted as a task."""
+
+    def setUp(self):
+        patcher = patch.object(index, "table")
+        self.table = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.table.get_item.return_value = {"Item": {**index.SORT_ORDER_COUNTER_KEY, "value": 7}}
+
+    def _call(self, method, task_id, body=None):
+        event = {"httpMethod": method, "pathParameters": {"taskId": task_id}, "body": json.dumps(body or {})}
+        return index.handler(event, None)
+
+    def test_counter_is_not_found(self):
+        for method, body in (("GET", None), ("PUT", {"title": "x"}), ("DELETE", None)):
+            with self.subTest(method=method):
+                self.assertEqual(self._call(method, COUNTER_ID, body)["statusCode"], 404)
+        self.table.get_item.assert_not_called()
+        self.table.update_item.assert_not_called()
+        self.table.delete_item.assert_not_called()
+
+    def test_reorder_skips_reserved_ids(self):
+        with patch.object(index, "dynamodb") as dynamodb:
+            dynamodb.batch_get_item.return_value = {"Responses": {index.table.name: []}}
+            index.handler(
+                {"httpMethod": "PUT", "resource": "/tasks/reorder", "body": json.dumps({"taskIds": ["a", COUNTER_ID]})},
+                None,
+            )
+
+        keys = dynamodb.batch_get_item.call_args.kwargs["RequestItems"][index.table.name]["Keys"]
+        self.assertEqual(keys, [{"taskId": "a"}])
+
+
+if __name__ == "__main__":
+    unittest.main()
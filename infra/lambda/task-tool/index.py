@@ -14,11 +14,21 @@ from decimal import Decimal
 
 import boto3
 
+import dynamo_counter
+from dynamo_scan import query_items, scan_items
+
 dynamodb = boto3.resource("dynamodb")
 table = dynamodb.Table(os.environ["TABLE_NAME"])
 
 JST = timezone(timedelta(hours=9))
 TTL_DAYS = 30
+# Sparse GSI: only incomplete tasks have taskStatus (removed on completion)
+ACTIVE_INDEX = "taskStatus-sortOrder-index"
+ACTIVE_STATUS = "active"
+# Counter item holding the last assigned sortOrder (not a task)
+SORT_ORDER_COUNTER_KEY = {"taskId": "__counter__#sortOrder"}
+# Attributes returned by list_tasks
+TASK_ATTRIBUTES = ("taskId", "title", "dueDate", "sortOrder", "completed", "createdAt")
 
 
 def handler(event, context):
@@ -32,16 +42,34 @@ def handler(event, context):
     return list_tasks(event)
 
 
+def _is_reserved_task_id(task_id: str) -> bool:
+    """Internal items such as the sortOrder counter share the table; never expose them as tasks."""
+    return task_id.startswith("__")
+
+
 def list_tasks(event):
     """List active tasks with optional deadline filter."""
     include_completed = event.get("include_completed", False)
     days_until_due = event.get("days_until_due")
 
-    result = table.scan()
-    items = result.get("Items", [])
-
-    if not include_completed:
-        items = [item for item in items if not item.get("completed", False)]
+    if include_completed:
+        items = [
+            item
+            for item in scan_items(table, attributes=TASK_ATTRIBUTES)
+            if not _is_reserved_task_id(item["taskId"])
+        ]
+        items.sort(key=lambda x: x.get("sortOrder", 0))
+    else:
+        # Returned in sortOrder order by the index
+        items = list(
+            query_items(
+                table,
+                attributes=TASK_ATTRIBUTES,
+                IndexName=ACTIVE_INDEX,
+                KeyConditionExpression="taskStatus = :active",
+                ExpressionAttributeValues={":active": ACTIVE_STATUS},
+            )
+        )
 
     if days_until_due is not None:
         now = datetime.now(JST).date()
@@ -53,14 +81,12 @@ def list_tasks(event):
             and datetime.strptime(item["dueDate"], "%Y-%m-%d").date() <= cutoff
         ]
 
-    items.sort(key=lambda x: x.get("sortOrder", 0))
-
     tasks = [
         {
             "taskId": item.get("taskId"),
             "title": item.get("title"),
             "dueDate": item.get("dueDate"),
-            "sortOrder": int(item.get("sortOrder", 0)),
+            "sortOrder": _to_number(item.get("sortOrder", 0)),
             "completed": item.get("completed", False),
             "createdAt": item.get("createdAt"),
         }
@@ -76,20 +102,41 @@ def list_tasks(event):
     }
 
 
+def _to_number(value):
+    """Convert a DynamoDB Decimal to int, or float for fractional ranks."""
+    return int(value) if value % 1 == 0 else float(value)
+
+
+def _max_active_sort_order() -> int:
+    """Highest sortOrder among active tasks (-1 if there are none)."""
+    result = table.query(
+        IndexName=ACTIVE_INDEX,
+        KeyConditionExpression="taskStatus = :active",
+        ExpressionAttributeValues={":active": ACTIVE_STATUS},
+        ProjectionExpression="sortOrder",
+        ScanIndexForward=False,
+        Limit=1,
+    )
+    items = result.get("Items", [])
+    return int(items[0]["sortOrder"]) if items else -1
+
+
+def _next_sort_order() -> int:
+    """Allocate the sortOrder for a new task with a single atomic write."""
+    return dynamo_counter.increment(
+        table,
+        SORT_ORDER_COUNTER_KEY,
+        seed=_max_active_sort_order,
+    )
+
+
 def add_task(event):
     """Add a new task."""
     title = event.get("title", "").strip()
     if not title:
         return {"success": False, "message": "title は必須です。"}
 
-    # Get max sortOrder
-    result = table.scan(
-        ProjectionExpression="sortOrder",
-        FilterExpression="completed = :false",
-        ExpressionAttributeValues={":false": False},
-    )
-    items = result.get("Items", [])
-    max_order = max((int(item.get("sortOrder", 0)) for item in items), default=-1)
+    sort_order = _next_sort_order()
 
     now = datetime.now(JST).isoformat()
     task_id = str(uuid.uuid4())
@@ -97,8 +144,9 @@ def add_task(event):
     item = {
         "taskId": task_id,
         "title": title,
-        "sortOrder": max_order + 1,
+        "sortOrder": sort_order,
         "completed": False,
+        "taskStatus": ACTIVE_STATUS,
         "createdAt": now,
     }
 
@@ -126,6 +174,9 @@ def complete_task(event):
     if not task_id:
         return {"success": False, "message": "task_id は必須です。"}
 
+    if _is_reserved_task_id(task_id):
+        return {"success": False, "message": "タスクが見つかりません。"}
+
     result = table.get_item(Key={"taskId": task_id})
     item = result.get("Item")
 
@@ -137,7 +188,7 @@ def complete_task(event):
 
     table.update_item(
         Key={"taskId": task_id},
-        UpdateExpression="SET completed = :c, completedAt = :ca, #ttl = :ttl",
+        UpdateExpression="SET completed = :c, completedAt = :ca, #ttl = :ttl REMOVE taskStatus",
         ExpressionAttributeNames={"#ttl": "ttl"},
         ExpressionAttributeValues={
             ":c": True,
@@ -158,6 +209,9 @@ def update_task(event):
     if not task_id:
         return {"success": False, "message": "task_id は必須です。"}
 
+    if _is_reserved_task_id(task_id):
+        return {"success": False, "message": "タスクが見つかりません。"}
+
     result = table.get_item(Key={"taskId": task_id})
     item = result.get("Item")
 
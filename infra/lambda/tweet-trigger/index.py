@@ -6,15 +6,17 @@ import os
 import urllib.error
 import urllib.request
 import urllib.parse
-from base64 import b64encode
 from datetime import datetime, timezone, timedelta
+from typing import Iterator
 
-import boto3
+import cognito_token
+from agentcore_stream import AgentCoreStreamError, iter_text_deltas
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
 JST = timezone(timedelta(hours=9))
+LOG_PREVIEW_CHARS = 2000
 
 
 TONARI_TWITTER_USER_ID = "2024900577411694599"
@@ -101,42 +103,19 @@ def _build_prompt(owner_user_id: str, now_str: str) -> str:
     )
 
 
-def _get_cognito_token(
-    client_id: str,
-    client_secret: str,
-    token_endpoint: str,
-    scope: str,
-) -> str:
-    """Get Cognito M2M access token via client_credentials grant."""
-    credentials = b64encode(f"{client_id}:{client_secret}".encode()).decode()
-
-    data = urllib.parse.urlencode({
-        "grant_type": "client_credentials",
-        "scope": scope,
-    }).encode()
-
-    req = urllib.request.Request(
-        token_endpoint,
-        data=data,
-        headers={
-            "Content-Type": "application/x-www-form-urlencoded",
-            "Authorization": f"Basic {credentials}",
-        },
-    )
-
-    with urllib.request.urlopen(req, timeout=30) as response:
-        body = json.loads(response.read())
-        return body["access_token"]
-
-
 def _call_agentcore(
     prompt: str,
     access_token: str,
     runtime_arn: str,
     session_id: str,
     region: str = "ap-northeast-1",
-) -> str:
-    """Call AgentCore Runtime and return response text."""
+) -> Iterator[str]:
+    """Call AgentCore Runtime and yield response text as it streams in.
+
+    Raises:
+        AgentCoreStreamError: The agent reported an error; the connection
+            is closed without reading the rest of the stream.
+    """
     encoded_arn = urllib.parse.quote(runtime_arn, safe="")
     endpoint = (
         f"https://bedrock-agentcore.{region}.amazonaws.com"
@@ -162,7 +141,7 @@ def _call_agentcore(
     )
 
     with urllib.request.urlopen(req, timeout=120) as response:
-        return response.read().decode()
+        yield from iter_text_deltas(response)
 
 
 def handler(event, context):
@@ -183,15 +162,16 @@ def handler(event, context):
     owner_user_id = os.environ["OWNER_TWITTER_USER_ID"]
     region = os.environ.get("AGENTCORE_REGION", "ap-northeast-1")
 
-    # Get Cognito client secret from SSM
+    # Get a Cognito M2M token (cached across warm invocations)
+    cognito_args = (cognito_client_id, ssm_cognito_secret, cognito_endpoint, cognito_scope)
     try:
-        ssm = boto3.client("ssm")
-        cognito_client_secret = ssm.get_parameter(
-            Name=ssm_cognito_secret, WithDecryption=True
-        )["Parameter"]["Value"]
-    except Exception:
+        access_token = cognito_token.get_access_token(*cognito_args)
+    except cognito_token.ClientSecretError:
         logger.exception("Failed to get Cognito client secret from SSM")
         return {"statusCode": 500, "body": "SSM Parameter Store access failed"}
+    except Exception:
+        logger.exception("Failed to get Cognito access token")
+        return {"statusCode": 500, "body": "Cognito token request failed"}
 
     # Build prompt and session ID
     now_jst = datetime.now(JST)
@@ -199,24 +179,30 @@ def handler(event, context):
     prompt = _build_prompt(owner_user_id, now_str)
     session_id = f"tonari-tweet-pipeline-{now_jst.strftime('%Y-%m-%d-%H%M%S')}"
 
-    # Get Cognito token and invoke AgentCore
+    # Invoke AgentCore
     try:
-        access_token = _get_cognito_token(
-            cognito_client_id,
-            cognito_client_secret,
-            cognito_endpoint,
-            cognito_scope,
-        )
-
-        response_body = _call_agentcore(prompt, access_token, runtime_arn, session_id, region)
-
-        logger.info("AgentCore response: %s", response_body[:2000])
+        # The agent posts the tweet itself; keep only a preview for the log
+        preview = []
+        preview_len = 0
+        for text in _call_agentcore(prompt, access_token, runtime_arn, session_id, region):
+            if preview_len < LOG_PREVIEW_CHARS:
+                preview.append(text)
+                preview_len += len(text)
+
+        logger.info("AgentCore response: %s", "".join(preview)[:LOG_PREVIEW_CHARS])
         logger.info("Tweet pipeline completed successfully")
         return {"statusCode": 200, "body": "Tweet pipeline completed"}
 
+    except AgentCoreStreamError as e:
+        logger.error("AgentCore stream error: %s", e)
+        return {"statusCode": 500, "body": f"AgentCore stream error: {e}"}
+
     except urllib.error.HTTPError as e:
         error_body = e.read().decode() if e.fp else "No response body"
         logger.error("AgentCore HTTP %d: %s", e.code, error_body)
+        if e.code in (400, 401):
+            # Token may have been revoked or the secret rotated; fetch both again next time
+            cognito_token.invalidate(*cognito_args)
         return {"statusCode": 500, "body": f"AgentCore HTTP {e.code}: {error_body}"}
 
     except Exception:
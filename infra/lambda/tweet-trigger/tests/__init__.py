@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# secrets_cache is deployed as a Lambda layer from infra/lambda/shared
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "shared"))
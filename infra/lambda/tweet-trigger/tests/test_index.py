@@ -14,6 +14,10 @@ class TestHandler(unittest.TestCase):
 
     def setUp(self):
         """Set up common environment variables."""
+        import cognito_token
+
+        # Tokens are cached per process; start every test from a cold cache
+        cognito_token.clear()
         self.env = {
             "AGENTCORE_RUNTIME_ARN": "arn:aws:bedrock-agentcore:ap-northeast-1:123456:runtime/test-runtime",
             "COGNITO_TOKEN_ENDPOINT": "https://test.auth.ap-northeast-1.amazoncognito.com/oauth2/token",
@@ -24,18 +28,14 @@ class TestHandler(unittest.TestCase):
         }
 
     @patch("index.urllib.request.urlopen")
-    @patch("index.boto3.client")
-    def test_invokes_agentcore_successfully(self, mock_boto_client, mock_urlopen):
+    @patch("cognito_token.secrets_cache.get_parameter")
+    def test_invokes_agentcore_successfully(self, mock_get_parameter, mock_urlopen):
         """Cognito認証後、AgentCore Runtimeを正常に呼び出す。"""
         import index
 
         with patch.dict("os.environ", self.env):
             # Mock SSM
-            ssm = MagicMock()
-            ssm.get_parameter.return_value = {
-                "Parameter": {"Value": "test-cognito-secret"}
-            }
-            mock_boto_client.return_value = ssm
+            mock_get_parameter.return_value = "test-cognito-secret"
 
             # Mock Cognito token response
             cognito_response = MagicMock()
@@ -47,7 +47,7 @@ class TestHandler(unittest.TestCase):
 
             # Mock AgentCore response
             agentcore_response = MagicMock()
-            agentcore_response.read.return_value = b'data: "Tweet posted"\n\n'
+            agentcore_response.__iter__.return_value = iter([b'data: "Tweet posted"\n', b"\n"])
             agentcore_response.__enter__ = MagicMock(return_value=agentcore_response)
             agentcore_response.__exit__ = MagicMock(return_value=False)
 
@@ -59,17 +59,14 @@ class TestHandler(unittest.TestCase):
             self.assertEqual(mock_urlopen.call_count, 2)
 
     @patch("index.urllib.request.urlopen")
-    @patch("index.boto3.client")
-    def test_prompt_contains_owner_user_id(self, mock_boto_client, mock_urlopen):
+    @patch("cognito_token.secrets_cache.get_parameter")
+    def test_prompt_contains_owner_user_id(self, mock_get_parameter, mock_urlopen):
         """プロンプトにオーナーのユーザーIDが埋め込まれている。"""
         import index
 
         with patch.dict("os.environ", self.env):
-            ssm = MagicMock()
-            ssm.get_parameter.return_value = {
-                "Parameter": {"Value": "test-cognito-secret"}
-            }
-            mock_boto_client.return_value = ssm
+            # Mock SSM
+            mock_get_parameter.return_value = "test-cognito-secret"
 
             cognito_response = MagicMock()
             cognito_response.read.return_value = json.dumps(
@@ -79,7 +76,7 @@ class TestHandler(unittest.TestCase):
             cognito_response.__exit__ = MagicMock(return_value=False)
 
             agentcore_response = MagicMock()
-            agentcore_response.read.return_value = b'data: "ok"\n\n'
+            agentcore_response.__iter__.return_value = iter([b'data: "ok"\n', b"\n"])
             agentcore_response.__enter__ = MagicMock(return_value=agentcore_response)
             agentcore_response.__exit__ = MagicMock(return_value=False)
 
@@ -94,17 +91,14 @@ class TestHandler(unittest.TestCase):
             self.assertIn("1234567890", body["prompt"])
 
     @patch("index.urllib.request.urlopen")
-    @patch("index.boto3.client")
-    def test_prompt_contains_quality_criteria(self, mock_boto_client, mock_urlopen):
+    @patch("cognito_token.secrets_cache.get_parameter")
+    def test_prompt_contains_quality_criteria(self, mock_get_parameter, mock_urlopen):
         """プロンプトに品質基準（120文字目標、140文字上限）が含まれている。"""
         import index
 
         with patch.dict("os.environ", self.env):
-            ssm = MagicMock()
-            ssm.get_parameter.return_value = {
-                "Parameter": {"Value": "test-cognito-secret"}
-            }
-            mock_boto_client.return_value = ssm
+            # Mock SSM
+            mock_get_parameter.return_value = "test-cognito-secret"
 
             cognito_response = MagicMock()
             cognito_response.read.return_value = json.dumps(
@@ -114,7 +108,7 @@ class TestHandler(unittest.TestCase):
             cognito_response.__exit__ = MagicMock(return_value=False)
 
             agentcore_response = MagicMock()
-            agentcore_response.read.return_value = b'data: "ok"\n\n'
+            agentcore_response.__iter__.return_value = iter([b'data: "ok"\n', b"\n"])
             agentcore_response.__enter__ = MagicMock(return_value=agentcore_response)
             agentcore_response.__exit__ = MagicMock(return_value=False)
 
@@ -129,17 +123,14 @@ class TestHandler(unittest.TestCase):
             self.assertIn("140", body["prompt"])
 
     @patch("index.urllib.request.urlopen")
-    @patch("index.boto3.client")
-    def test_prompt_contains_pipeline_steps(self, mock_boto_client, mock_urlopen):
+    @patch("cognito_token.secrets_cache.get_parameter")
+    def test_prompt_contains_pipeline_steps(self, mock_get_parameter, mock_urlopen):
         """プロンプトにパイプライン手順（fetch, review, post）が含まれている。"""
         import index
 
         with patch.dict("os.environ", self.env):
-            ssm = MagicMock()
-            ssm.get_parameter.return_value = {
-                "Parameter": {"Value": "test-cognito-secret"}
-            }
-            mock_boto_client.return_value = ssm
+            # Mock SSM
+            mock_get_parameter.return_value = "test-cognito-secret"
 
             cognito_response = MagicMock()
             cognito_response.read.return_value = json.dumps(
@@ -149,7 +140,7 @@ class TestHandler(unittest.TestCase):
             cognito_response.__exit__ = MagicMock(return_value=False)
 
             agentcore_response = MagicMock()
-            agentcore_response.read.return_value = b'data: "ok"\n\n'
+            agentcore_response.__iter__.return_value = iter([b'data: "ok"\n', b"\n"])
             agentcore_response.__enter__ = MagicMock(return_value=agentcore_response)
             agentcore_response.__exit__ = MagicMock(return_value=False)
 
@@ -164,17 +155,14 @@ class TestHandler(unittest.TestCase):
             self.assertIn("post_tweet", body["prompt"])
 
     @patch("index.urllib.request.urlopen")
-    @patch("index.boto3.client")
-    def test_session_id_format(self, mock_boto_client, mock_urlopen):
+    @patch("cognito_token.secrets_cache.get_parameter")
+    def test_session_id_format(self, mock_get_parameter, mock_urlopen):
         """セッションIDがtonari-tweet-{日付}-{時間}形式である。"""
         import index
 
         with patch.dict("os.environ", self.env):
-            ssm = MagicMock()
-            ssm.get_parameter.return_value = {
-                "Parameter": {"Value": "test-cognito-secret"}
-            }
-            mock_boto_client.return_value = ssm
+            # Mock SSM
+            mock_get_parameter.return_value = "test-cognito-secret"
 
             cognito_response = MagicMock()
             cognito_response.read.return_value = json.dumps(
@@ -184,7 +172,7 @@ class TestHandler(unittest.TestCase):
             cognito_response.__exit__ = MagicMock(return_value=False)
 
             agentcore_response = MagicMock()
-            agentcore_response.read.return_value = b'data: "ok"\n\n'
+            agentcore_response.__iter__.return_value = iter([b'data: "ok"\n', b"\n"])
             agentcore_response.__enter__ = MagicMock(return_value=agentcore_response)
             agentcore_response.__exit__ = MagicMock(return_value=False)
 
@@ -204,15 +192,13 @@ class TestHandler(unittest.TestCase):
             )
             self.assertEqual(body["actor_id"], "tonari-owner")
 
-    @patch("index.boto3.client")
-    def test_returns_error_on_ssm_failure(self, mock_boto_client):
+    @patch("cognito_token.secrets_cache.get_parameter")
+    def test_returns_error_on_ssm_failure(self, mock_get_parameter):
         """SSM取得失敗時はログ記録して正常終了する。"""
         import index
 
         with patch.dict("os.environ", self.env):
-            ssm = MagicMock()
-            ssm.get_parameter.side_effect = Exception("SSM error")
-            mock_boto_client.return_value = ssm
+            mock_get_parameter.side_effect = Exception("SSM error")
 
             result = index.handler({}, None)
 
@@ -220,17 +206,14 @@ class TestHandler(unittest.TestCase):
             self.assertIn("SSM", result["body"])
 
     @patch("index.urllib.request.urlopen")
-    @patch("index.boto3.client")
-    def test_returns_error_on_cognito_failure(self, mock_boto_client, mock_urlopen):
+    @patch("cognito_token.secrets_cache.get_parameter")
+    def test_returns_error_on_cognito_failure(self, mock_get_parameter, mock_urlopen):
         """Cognito認証失敗時はログ記録して正常終了する。"""
         import index
 
         with patch.dict("os.environ", self.env):
-            ssm = MagicMock()
-            ssm.get_parameter.return_value = {
-                "Parameter": {"Value": "test-cognito-secret"}
-            }
-            mock_boto_client.return_value = ssm
+            # Mock SSM
+            mock_get_parameter.return_value = "test-cognito-secret"
 
             mock_urlopen.side_effect = Exception("Cognito error")
 
@@ -239,17 +222,14 @@ class TestHandler(unittest.TestCase):
             self.assertEqual(result["statusCode"], 500)
 
     @patch("index.urllib.request.urlopen")
-    @patch("index.boto3.client")
-    def test_returns_error_on_agentcore_failure(self, mock_boto_client, mock_urlopen):
+    @patch("cognito_token.secrets_cache.get_parameter")
+    def test_returns_error_on_agentcore_failure(self, mock_get_parameter, mock_urlopen):
         """AgentCore呼び出し失敗時はログ記録して正常終了する。"""
         import index
 
         with patch.dict("os.environ", self.env):
-            ssm = MagicMock()
-            ssm.get_parameter.return_value = {
-                "Parameter": {"Value": "test-cognito-secret"}
-            }
-            mock_boto_client.return_value = ssm
+            # Mock SSM
+            mock_get_parameter.return_value = "test-cognito-secret"
 
             cognito_response = MagicMock()
             cognito_response.read.return_value = json.dumps(
@@ -267,6 +247,44 @@ class TestHandler(unittest.TestCase):
 
             self.assertEqual(result["statusCode"], 500)
 
+    @patch("index.urllib.request.urlopen")
+    @patch("cognito_token.secrets_cache.get_parameter")
+    def test_stops_reading_on_agent_error_event(self, mock_get_parameter, mock_urlopen):
+        """ストリームのエラーイベントで読み込みを打ち切り、500を返す。"""
+        import index
+
+        with patch.dict("os.environ", self.env):
+            mock_get_parameter.return_value = "test-cognito-secret"
+
+            cognito_response = MagicMock()
+            cognito_response.read.return_value = json.dumps(
+                {"access_token": "test-access-token"}
+            ).encode()
+            cognito_response.__enter__ = MagicMock(return_value=cognito_response)
+            cognito_response.__exit__ = MagicMock(return_value=False)
+
+            lines = iter([
+                b'data: "thinking"\n',
+                b"\n",
+                b'data: {"type": "error", "message": "model timeout"}\n',
+                b"\n",
+                b'data: "never read"\n',
+                b"\n",
+            ])
+            agentcore_response = MagicMock()
+            agentcore_response.__iter__.return_value = lines
+            agentcore_response.__enter__ = MagicMock(return_value=agentcore_response)
+            agentcore_response.__exit__ = MagicMock(return_value=False)
+
+            mock_urlopen.side_effect = [cognito_response, agentcore_response]
+
+            result = index.handler({}, None)
+
+            self.assertEqual(result["statusCode"], 500)
+            self.assertIn("model timeout", result["body"])
+            self.assertEqual(next(lines), b'data: "never read"\n')
+            agentcore_response.__exit__.assert_called_once()
+
 
 if __name__ == "__main__":
     unittest.main()
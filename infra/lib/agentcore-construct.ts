@@ -526,7 +526,7 @@ export class AgentCoreConstruct extends Construct {
         SsmAccess: new iam.PolicyDocument({
           statements: [
             new iam.PolicyStatement({
-              actions: ['ssm:GetParameter'],
+              actions: ['ssm:GetParameter', 'ssm:GetParameters'],
               resources: [
                 `arn:aws:ssm:${region}:${account}:parameter/tonari/openrouter-api-key`,
                 `arn:aws:ssm:${region}:${account}:parameter/tonari/google/*`,
@@ -49,6 +49,7 @@ export class WorkloadConstruct extends Construct {
   public readonly newsNotificationTopic?: sns.Topic
   public readonly newsTable?: dynamodb.Table
   public readonly newsTriggerLambda?: python.PythonFunction
+  public readonly sharedLayer: python.PythonLayerVersion
 
   constructor(scope: Construct, id: string, props: WorkloadConstructProps) {
     super(scope, id)
@@ -60,6 +61,13 @@ export class WorkloadConstruct extends Construct {
     const region = stack.region
     const account = stack.account
 
+    // Shared Python modules for Lambdas (secrets_cache, cognito_token, dynamo_scan, dynamo_counter, agentcore_stream)
+    this.sharedLayer = new python.PythonLayerVersion(stack, 'SharedPythonLayer', {
+      layerVersionName: 'tonari-shared',
+      entry: path.join(__dirname, '../lambda/shared'),
+      compatibleRuntimes: [lambda.Runtime.PYTHON_3_12],
+    })
+
     // DynamoDB Table (PK=brand, SK=name)
     this.perfumeTable = new dynamodb.Table(stack, 'PerfumeTable', {
       tableName: 'tonari-perfumes',
@@ -77,6 +85,7 @@ export class WorkloadConstruct extends Construct {
         functionName: 'tonari-perfume-search',
         entry: path.join(__dirname, '../lambda/perfume-search'),
         runtime: lambda.Runtime.PYTHON_3_12,
+        layers: [this.sharedLayer],
         handler: 'handler',
         timeout: cdk.Duration.seconds(30),
         memorySize: 128,
@@ -94,6 +103,7 @@ export class WorkloadConstruct extends Construct {
       functionName: 'tonari-perfume-crud',
       entry: path.join(__dirname, '../lambda/perfume-crud'),
       runtime: lambda.Runtime.PYTHON_3_12,
+      layers: [this.sharedLayer],
       handler: 'handler',
       timeout: cdk.Duration.seconds(30),
       memorySize: 128,
@@ -289,6 +299,14 @@ export class WorkloadConstruct extends Construct {
       timeToLiveAttribute: 'ttl',
     })
 
+    // Sparse GSI: only incomplete tasks carry taskStatus, so queries read active tasks only
+    this.tasksTable.addGlobalSecondaryIndex({
+      indexName: 'taskStatus-sortOrder-index',
+      partitionKey: { name: 'taskStatus', type: dynamodb.AttributeType.STRING },
+      sortKey: { name: 'sortOrder', type: dynamodb.AttributeType.NUMBER },
+      projectionType: dynamodb.ProjectionType.ALL,
+    })
+
     // Task CRUD Lambda (API Gateway)
     this.taskCrudLambda = new python.PythonFunction(
       stack,
@@ -297,6 +315,7 @@ export class WorkloadConstruct extends Construct {
         functionName: 'tonari-task-crud',
         entry: path.join(__dirname, '../lambda/task-crud'),
         runtime: lambda.Runtime.PYTHON_3_12,
+        layers: [this.sharedLayer],
         handler: 'handler',
         timeout: cdk.Duration.seconds(30),
         memorySize: 128,
@@ -332,6 +351,7 @@ export class WorkloadConstruct extends Construct {
         functionName: 'tonari-task-tool',
         entry: path.join(__dirname, '../lambda/task-tool'),
         runtime: lambda.Runtime.PYTHON_3_12,
+        layers: [this.sharedLayer],
         handler: 'handler',
         timeout: cdk.Duration.seconds(30),
         memorySize: 128,
@@ -366,6 +386,7 @@ export class WorkloadConstruct extends Construct {
           functionName: 'tonari-tweet-trigger',
           entry: path.join(__dirname, '../lambda/tweet-trigger'),
           runtime: lambda.Runtime.PYTHON_3_12,
+          layers: [this.sharedLayer],
           handler: 'handler',
           timeout: cdk.Duration.minutes(5),
           memorySize: 128,
@@ -382,7 +403,7 @@ export class WorkloadConstruct extends Construct {
 
       this.tweetTriggerLambda.addToRolePolicy(
         new iam.PolicyStatement({
-          actions: ['ssm:GetParameter'],
+          actions: ['ssm:GetParameters'],
           resources: [
             `arn:aws:ssm:${region}:${account}:parameter${ts.ssmCognitoClientSecret}`,
           ],
@@ -498,6 +519,7 @@ export class WorkloadConstruct extends Construct {
           functionName: 'tonari-news-trigger',
           entry: path.join(__dirname, '../lambda/news-trigger'),
           runtime: lambda.Runtime.PYTHON_3_12,
+          layers: [this.sharedLayer],
           handler: 'handler',
           timeout: cdk.Duration.minutes(5),
           memorySize: 256,
@@ -517,7 +539,7 @@ export class WorkloadConstruct extends Construct {
       // IAM permissions
       this.newsTriggerLambda.addToRolePolicy(
         new iam.PolicyStatement({
-          actions: ['ssm:GetParameter'],
+          actions: ['ssm:GetParameters'],
           resources: [
             `arn:aws:ssm:${region}:${account}:parameter${ns.ssmCognitoClientSecret}`,
           ],
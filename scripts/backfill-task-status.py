@@ -0,0 +1,85 @@
+"""
+Task Status Backfill Script
+
+Sets taskStatus on existing tasks so they appear in the sparse
+taskStatus-sortOrder-index GSI, which task-crud, task-tool and news-trigger
+query for active tasks:
+- incomplete tasks without taskStatus get taskStatus = "active"
+- completed tasks that still carry taskStatus have it removed
+
+Run once right after deploying the stack that adds the index; until then,
+tasks created before the deployment do not show up in active task lists.
+The script is idempotent and can be re-run safely.
+
+Usage:
+    pip install boto3
+    python scripts/backfill-task-status.py [--table tonari-tasks] [--dry-run]
+"""
+
+import argparse
+import os
+import sys
+
+import boto3
+from botocore.exceptions import ClientError
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "infra", "lambda", "shared"))
+
+from dynamo_scan import scan_items  # noqa: E402
+
+AWS_REGION = "ap-northeast-1"
+ACTIVE_STATUS = "active"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--table", default="tonari-tasks")
+    parser.add_argument("--region", default=AWS_REGION)
+    parser.add_argument("--dry-run", action="store_true", help="Only report what would change")
+    args = parser.parse_args()
+
+    table = boto3.resource("dynamodb", region_name=args.region).Table(args.table)
+
+    activated = deactivated = unchanged = skipped = 0
+    for item in scan_items(table, attributes=["taskId", "completed", "taskStatus"], total_segments=4):
+        if item["taskId"].startswith("__counter__"):
+            # sortOrder counter item, not a task
+            continue
+        completed = item.get("completed", False)
+        has_status = "taskStatus" in item
+        key = {"taskId": item["taskId"]}
+
+        if not completed and item.get("taskStatus") != ACTIVE_STATUS:
+            if args.dry_run:
+                activated += 1
+                continue
+            try:
+                table.update_item(
+                    Key=key,
+                    UpdateExpression="SET taskStatus = :active",
+                    # Skip tasks completed or deleted since the scan read them
+                    ConditionExpression="completed = :false",
+                    ExpressionAttributeValues={":active": ACTIVE_STATUS, ":false": False},
+                )
+                activated += 1
+            except ClientError as e:
+                if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                    raise
+                skipped += 1
+        elif completed and has_status:
+            deactivated += 1
+            if not args.dry_run:
+                table.update_item(Key=key, UpdateExpression="REMOVE taskStatus")
+        else:
+            unchanged += 1
+
+    prefix = "[dry-run] " if args.dry_run else ""
+    print(
+        f"{prefix}activated: {activated}, deactivated: {deactivated}, "
+        f"unchanged: {unchanged}, skipped: {skipped}"
+    )
+
+
+if __name__ == "__main__":
+    main()
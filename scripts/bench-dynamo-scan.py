@@ -0,0 +1,112 @@
+"""
+DynamoDB Scan Benchmark
+
+Compares scan strategies against an in-memory table stand-in that mimics
+DynamoDB's 1 MB page limit and per-request latency:
+- single:    one table.scan() call (the old behaviour; truncated past 1 MB)
+- paginated: scan_items() following LastEvaluatedKey
+- projected: scan_items() reading only the attributes a list view needs
+- parallel:  projected scan_items() with TotalSegments
+
+Usage:
+    python scripts/bench-dynamo-scan.py [--items 20000] [--segments 4] [--latency-ms 15]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "infra", "lambda", "shared"))
+
+from dynamo_scan import scan_items  # noqa: E402
+
+PAGE_LIMIT_BYTES = 1024 * 1024
+LIST_ATTRIBUTES = ("taskId", "title", "dueDate", "sortOrder", "completed", "createdAt")
+
+
+class InMemoryTable:
+    """Table stand-in: pages at 1 MB of read data, sleeps per request."""
+
+    def __init__(self, items: list[dict], latency_ms: float, mb_per_second: float):
+        self.items = items
+        self.sizes = [len(json.dumps(item)) for item in items]
+        self.latency = latency_ms / 1000
+        self.bytes_per_second = mb_per_second * 1024 * 1024
+        self.requests = 0
+
+    def scan(self, **kwargs):
+        self.requests += 1
+        segment = kwargs.get("Segment", 0)
+        total = kwargs.get("TotalSegments", 1)
+        position = kwargs.get("ExclusiveStartKey", {}).get("pos", segment)
+
+        names = kwargs.get("ExpressionAttributeNames", {})
+        projection = None
+        if "ProjectionExpression" in kwargs:
+            projection = [names.get(p.strip(), p.strip()) for p in kwargs["ProjectionExpression"].split(",")]
+
+        page, read = [], 0
+        while position < len(self.items) and read < PAGE_LIMIT_BYTES:
+            item = self.items[position]
+            # Scans are billed and paged on the full item size, projection only shrinks the response
+            read += self.sizes[position]
+            page.append({a: item[a] for a in projection if a in item} if projection else item)
+            position += total
+        sent = sum(len(json.dumps(item)) for item in page)
+        time.sleep(self.latency + sent / self.bytes_per_second)
+
+        result = {"Items": page}
+        if position < len(self.items):
+            result["LastEvaluatedKey"] = {"pos": position}
+        return result
+
+
+def _make_items(count: int) -> list[dict]:
+    return [
+        {
+            "taskId": f"task-{i:06d}",
+            "title": f"Task {i}",
+            "dueDate": "2026-01-01",
+            "sortOrder": i,
+            "completed": i % 3 == 0,
+            "createdAt": "2026-01-01T00:00:00+09:00",
+            "notes": "n" * 400,
+        }
+        for i in range(count)
+    ]
+
+
+def _run(name: str, table: InMemoryTable, fn) -> None:
+    table.requests = 0
+    started = time.perf_counter()
+    count = fn()
+    elapsed = (time.perf_counter() - started) * 1000
+    print(f"{name:<12} {count:>8} items {table.requests:>5} requests {elapsed:>9.1f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=20000)
+    parser.add_argument("--segments", type=int, default=4)
+    parser.add_argument("--latency-ms", type=float, default=15.0)
+    parser.add_argument("--mb-per-second", type=float, default=50.0)
+    args = parser.parse_args()
+
+    table = InMemoryTable(_make_items(args.items), args.latency_ms, args.mb_per_second)
+    print(f"{args.items} items, {sum(table.sizes) / 1024 / 1024:.1f} MB, {args.latency_ms} ms/request")
+
+    _run("single", table, lambda: len(table.scan()["Items"]))
+    _run("paginated", table, lambda: sum(1 for _ in scan_items(table)))
+    _run("projected", table, lambda: sum(1 for _ in scan_items(table, attributes=LIST_ATTRIBUTES)))
+    _run(
+        f"parallel/{args.segments}",
+        table,
+        lambda: sum(1 for _ in scan_items(table, attributes=LIST_ATTRIBUTES, total_segments=args.segments)),
+    )
+
+
+if __name__ == "__main__":
+    main()
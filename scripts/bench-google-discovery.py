@@ -0,0 +1,80 @@
+"""
+Google API Service Startup Benchmark
+
+Measures cold-start service construction in fresh interpreter processes:
+- build():               googleapiclient's default path (bundled full discovery document)
+- build_from_document(): vendored, trimmed document (scripts/vendor-google-discovery.py)
+
+Each run covers reading the document, building the service and creating
+the first request object, which is what a cold Lambda invocation pays for.
+
+Usage:
+    pip install google-api-python-client google-auth
+    python scripts/bench-google-discovery.py [--runs 20]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DISCOVERY_DIR = os.path.join(ROOT, "agentcore", "src", "agent", "discovery")
+
+CHILD = """
+import sys, time
+from google.oauth2.credentials import Credentials
+from googleapiclient.discovery import build, build_from_document
+
+api, version, mode, path = sys.argv[1:5]
+credentials = Credentials(token="bench")
+started = time.perf_counter()
+if mode == "build":
+    service = build(api, version, credentials=credentials, cache_discovery=False)
+else:
+    with open(path, encoding="utf-8") as f:
+        service = build_from_document(f.read(), credentials=credentials)
+if api == "calendar":
+    service.events().list(calendarId="primary")
+else:
+    service.users().messages().list(userId="me")
+print((time.perf_counter() - started) * 1000)
+"""
+
+APIS = (("calendar", "v3"), ("gmail", "v1"))
+
+
+def _measure(api: str, version: str, mode: str, runs: int) -> list[float]:
+    path = os.path.join(DISCOVERY_DIR, f"{api}.{version}.json")
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", CHILD, api, version, mode, path],
+            check=True, capture_output=True, text=True,
+        )
+        samples.append(float(out.stdout.strip()))
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'api':<12}{'mode':<22}{'median ms':>10}{'p90 ms':>10}")
+    for api, version in APIS:
+        medians = {}
+        for mode in ("build", "document"):
+            samples = sorted(_measure(api, version, mode, args.runs))
+            medians[mode] = statistics.median(samples)
+            p90 = samples[int(len(samples) * 0.9) - 1]
+            label = "build()" if mode == "build" else "build_from_document()"
+            print(f"{api + ' ' + version:<12}{label:<22}{medians[mode]:>10.2f}{p90:>10.2f}")
+        delta = medians["build"] - medians["document"]
+        print(f"{'':<12}{'delta':<22}{delta:>10.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
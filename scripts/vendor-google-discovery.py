@@ -0,0 +1,136 @@
+"""
+Google API Discovery Document Vendoring Script
+
+Generates trimmed discovery documents for Calendar v3 and Gmail v1 and writes
+them next to the code that builds the services, so they can be loaded with
+googleapiclient.discovery.build_from_document() instead of build().
+
+Only the resources the tools call are kept, plus the schemas they reference.
+Description strings are dropped (they are only used for generated docstrings).
+
+Usage:
+    pip install google-api-python-client
+    python scripts/vendor-google-discovery.py
+"""
+
+import json
+import os
+import sys
+
+from googleapiclient import discovery_cache
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# (api, version) -> resource paths to keep
+APIS = {
+    ("calendar", "v3"): [("events",), ("freebusy",)],
+    ("gmail", "v1"): [("users", "messages"), ("users", "drafts")],
+}
+
+# Output directories for each API
+TARGETS = {
+    ("calendar", "v3"): [
+        "agentcore/src/agent/discovery",
+        "infra/lambda/calendar-tool",
+    ],
+    ("gmail", "v1"): [
+        "agentcore/src/agent/discovery",
+        "infra/lambda/gmail-tool",
+    ],
+}
+
+TOP_LEVEL_KEYS = (
+    "kind", "discoveryVersion", "id", "name", "version", "revision",
+    "rootUrl", "mtlsRootUrl", "servicePath", "basePath", "baseUrl", "batchPath",
+    "protocol", "parameters", "auth",
+)
+
+
+def _load_bundled(api: str, version: str) -> dict:
+    path = os.path.join(
+        os.path.dirname(discovery_cache.__file__), "documents", f"{api}.{version}.json"
+    )
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _strip_descriptions(node):
+    if isinstance(node, dict):
+        return {
+            k: _strip_descriptions(v)
+            for k, v in node.items()
+            # Schema properties named "description" are dicts, not strings
+            if not (k == "description" and isinstance(v, str))
+        }
+    if isinstance(node, list):
+        return [_strip_descriptions(v) for v in node]
+    return node
+
+
+def _pick_resources(resources: dict, paths: list[tuple[str, ...]]) -> dict:
+    picked: dict = {}
+    for path in paths:
+        src, dst = resources, picked
+        for i, name in enumerate(path):
+            node = src[name]
+            if i == len(path) - 1:
+                dst[name] = node
+            else:
+                # Keep intermediate resources (e.g. users) without their other children
+                dst = dst.setdefault(name, {k: v for k, v in node.items() if k != "resources"})
+                dst = dst.setdefault("resources", {})
+                src = node["resources"]
+    return picked
+
+
+def _collect_refs(node, refs: set[str]) -> None:
+    if isinstance(node, dict):
+        ref = node.get("$ref")
+        if isinstance(ref, str):
+            refs.add(ref)
+        for v in node.values():
+            _collect_refs(v, refs)
+    elif isinstance(node, list):
+        for v in node:
+            _collect_refs(v, refs)
+
+
+def _reachable_schemas(resources: dict, schemas: dict) -> dict:
+    pending: set[str] = set()
+    _collect_refs(resources, pending)
+    seen: set[str] = set()
+    while pending:
+        name = pending.pop()
+        if name in seen or name not in schemas:
+            continue
+        seen.add(name)
+        _collect_refs(schemas[name], pending)
+    return {name: schemas[name] for name in sorted(seen)}
+
+
+def trim_document(doc: dict, paths: list[tuple[str, ...]]) -> dict:
+    """Keep only the given resources and the schemas they reference."""
+    resources = _pick_resources(doc["resources"], paths)
+    trimmed = {k: doc[k] for k in TOP_LEVEL_KEYS if k in doc}
+    trimmed["resources"] = resources
+    trimmed["schemas"] = _reachable_schemas(resources, doc.get("schemas", {}))
+    return _strip_descriptions(trimmed)
+
+
+def main():
+    for (api, version), paths in APIS.items():
+        doc = _load_bundled(api, version)
+        trimmed = trim_document(doc, paths)
+        body = json.dumps(trimmed, ensure_ascii=False, separators=(",", ":"), sort_keys=True)
+        for target in TARGETS[(api, version)]:
+            out = os.path.join(ROOT, target, f"{api}.{version}.json")
+            os.makedirs(os.path.dirname(out), exist_ok=True)
+            with open(out, "w", encoding="utf-8") as f:
+                f.write(body + "\n")
+            print(f"{api} {version} (revision {doc.get('revision')}): "
+                  f"{len(json.dumps(doc))} -> {len(body)} bytes -> {target}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -634,17 +634,11 @@ export const TaskListPanel = () => {
 
   const handleTaskDragEnd = useCallback(async () => {
     if (dragItemId && dragOverIndex !== null) {
-      const currentIndex = tasks.findIndex((t) => t.taskId === dragItemId)
-      if (currentIndex !== -1 && currentIndex !== dragOverIndex) {
-        const newTasks = [...tasks]
-        const [moved] = newTasks.splice(currentIndex, 1)
-        newTasks.splice(dragOverIndex, 0, moved)
-        await taskStore.getState().reorderTasks(newTasks.map((t) => t.taskId))
-      }
+      await taskStore.getState().moveTask(dragItemId, dragOverIndex)
     }
     setDragItemId(null)
     setDragOverIndex(null)
-  }, [dragItemId, dragOverIndex, tasks])
+  }, [dragItemId, dragOverIndex])
 
   if (!mounted) return null
 
@@ -1,8 +1,39 @@
 import settingsStore from '@/features/stores/settings'
 
+export type TokenUsage = {
+  inputTokens: number
+  outputTokens: number
+  totalTokens: number
+}
+
+// サブエージェント内のツール進捗（parent: 親ツール名、elapsed_ms: 親ツール開始からの経過時間）
+export type SubToolEvent =
+  | {
+      type: 'sub_tool_start'
+      parent: string
+      tool: string
+      elapsed_ms: number
+      usage: TokenUsage
+    }
+  | {
+      type: 'sub_tool_end'
+      parent: string
+      tool: string
+      elapsed_ms: number
+      duration_ms: number
+      usage: TokenUsage
+    }
+  | {
+      type: 'sub_agent_end'
+      parent: string
+      elapsed_ms: number
+      usage: TokenUsage
+    }
+
 export type ToolEvent =
   | { type: 'tool_start' | 'tool_end'; tool?: string }
   | { type: 'image'; url: string }
+  | SubToolEvent
 export type StreamChunk = string | ToolEvent
 
 /**
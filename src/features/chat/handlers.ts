@@ -96,6 +96,26 @@ const TOOL_DISPLAY_NAMES: Record<string, string> = {
   execute_python: 'コードを実行中',
   get_aws_cost: 'AWSコストを取得中',
   skills: 'スキルを読み込み中',
+  // サブエージェント内のツール
+  calendar_list_events: '予定を確認中',
+  calendar_check_availability: '空き状況を確認中',
+  calendar_create_event: '予定を作成中',
+  calendar_update_event: '予定を更新中',
+  calendar_delete_event: '予定を削除中',
+  calendar_suggest_schedule: '候補日を検索中',
+  gmail_search_emails: 'メールを検索中',
+  gmail_get_email: 'メールを取得中',
+  gmail_create_draft: '下書きを作成中',
+  gmail_archive_email: 'メールをアーカイブ中',
+  notion_search_pages: 'Notionを検索中',
+  notion_get_page: 'Notionのページを取得中',
+  notion_create_page: 'Notionにページを作成中',
+  notion_update_page: 'Notionのページを更新中',
+  notion_query_database: 'Notionのデータベースを検索中',
+  notion_get_database: 'Notionのデータベースを取得中',
+  twitter_get_todays_tweets: 'ツイートを確認中',
+  twitter_post_tweet: 'ツイートを投稿中',
+  briefing_sources: '情報を集めています',
 }
 
 const TOOL_STATUS_ID = 'tool-status'
@@ -541,6 +561,32 @@ export const processAIResponse = async (
             })
           } else if (toolEvent.type === 'tool_end') {
             removeToolStatus()
+          } else if (
+            toolEvent.type === 'sub_tool_start' ||
+            toolEvent.type === 'sub_tool_end'
+          ) {
+            // サブエージェント内のツール進捗: 実行中の内部ツールをステータスに表示
+            const parentName =
+              TOOL_DISPLAY_NAMES[toolEvent.parent] || toolEvent.parent
+            const childName =
+              TOOL_DISPLAY_NAMES[toolEvent.tool] || toolEvent.tool
+            homeStore.getState().upsertMessage({
+              id: TOOL_STATUS_ID,
+              role: 'tool-status',
+              content:
+                toolEvent.type === 'sub_tool_start'
+                  ? `${parentName}（${childName}）`
+                  : parentName,
+            })
+            if (toolEvent.type === 'sub_tool_end') {
+              console.debug(
+                `[${toolEvent.parent}] ${toolEvent.tool}: ${toolEvent.duration_ms}ms`
+              )
+            }
+          } else if (toolEvent.type === 'sub_agent_end') {
+            console.debug(
+              `[${toolEvent.parent}] ${toolEvent.elapsed_ms}ms, tokens: ${toolEvent.usage.totalTokens}`
+            )
           } else if (toolEvent.type === 'image' && 'url' in toolEvent) {
             // Code Interpreter からのグラフ画像イベント（S3署名付きURL）
             const imgEvent = toolEvent as ToolEvent & { url: string }
@@ -34,6 +34,7 @@ interface TaskState {
   completeTask: (taskId: string) => Promise<void>
   deleteTask: (taskId: string) => Promise<void>
   reorderTasks: (taskIds: string[]) => Promise<void>
+  moveTask: (taskId: string, toIndex: number) => Promise<void>
 }
 
 function getUrgentTaskCount(tasks: Task[]): number {
@@ -288,6 +289,51 @@ const taskStore = create<TaskState & { urgentTaskCount: number }>()(
           set({ tasks: prevTasks })
         }
       },
+
+      moveTask: async (taskId: string, toIndex: number) => {
+        const prevTasks = [...get().tasks]
+        const fromIndex = prevTasks.findIndex((t) => t.taskId === taskId)
+        if (fromIndex === -1 || fromIndex === toIndex) return
+
+        const newTasks = [...prevTasks]
+        const [moved] = newTasks.splice(fromIndex, 1)
+        newTasks.splice(toIndex, 0, moved)
+        const prevTask = newTasks[toIndex - 1]
+        const nextTask = newTasks[toIndex + 1]
+        if (!prevTask && !nextTask) return
+
+        // Optimistic update (the server assigns the actual rank)
+        set({ tasks: newTasks })
+
+        try {
+          const res = await fetch('/api/admin/tasks/reorder', {
+            method: 'PUT',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({
+              taskId,
+              prevTaskId: prevTask?.taskId ?? null,
+              nextTaskId: nextTask?.taskId ?? null,
+            }),
+          })
+
+          if (!res.ok) {
+            set({ tasks: prevTasks })
+            return
+          }
+
+          const data = await res.json()
+          const sortOrders: Record<string, number> = data.sortOrders ?? {}
+          set((s) => ({
+            tasks: s.tasks.map((t) =>
+              t.taskId in sortOrders
+                ? { ...t, sortOrder: sortOrders[t.taskId] }
+                : t
+            ),
+          }))
+        } catch {
+          set({ tasks: prevTasks })
+        }
+      },
     }),
     {
       name: 'tonari-tasks',
@@ -33,7 +33,7 @@ function parseSSEData(value: string): string | Record<string, unknown> | null {
       return parsed
     }
     if (typeof parsed === 'object' && parsed !== null) {
-      // JSONオブジェクト ({"type": "tool_start"})
+      // JSONオブジェクト ({"type": "tool_start"}, {"type": "sub_tool_start", "parent": ...} など)
       return parsed as Record<string, unknown>
     }
     return null